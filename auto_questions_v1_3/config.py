@@ -65,6 +65,21 @@ SETTINGS_FILE = "settings.json5"
 GRAPH_FILE = "graph.txt"
 # 从命题库中选择命题的规则
 PROP_CHOOSE_RULE_FILE = KNOWLEDGE_BASE_DIR / "prop_choose_rule.json5"
+# 试题指纹库文件名称，保存在试题配置文件夹中
+FINGERPRINT_FILE = "fingerprints.sqlite3"
+"""试题指纹库文件名称"""
+# 进程级推理结果缓存的最大条目数
+RULE_MEMO_SIZE = 200000
+"""进程级推理结果缓存的最大条目数"""
+# 每个推理图缓存的层级视图的最大数量
+LAYER_VIEW_CACHE_SIZE = 16
+"""每个推理图缓存的层级视图的最大数量"""
+# 出题流水线中等待翻译的试题和等待写入的批次的最大数量
+PIPELINE_QUEUE_SIZE = 64
+"""出题流水线中等待翻译的试题和等待写入的批次的最大数量"""
+# 推理图二进制导出文件夹，保存在试题配置文件夹中
+GRAPH_DUMP_DIR = "graph_dump"
+"""推理图二进制导出文件夹名称"""
 # 05-02新增：外部知识库文件夹
 EXTERNAL_KNOWLEDGE_DIR = KNOWLEDGE_BASE_DIR / "external_knowledge"
 """外部知识库文件夹"""
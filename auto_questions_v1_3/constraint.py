@@ -283,11 +283,12 @@ class ConstraintMachine:
         else:
             raise ValueError(f"函数_get_temporal_time()不支持的事件类型{e.kind}")
     
-    def get_time_props(self, events: Sequence[event.Event]) -> list[prop.Proposition]:
+    def get_time_props(self, events: Sequence[event.Event], resample: bool = True) -> list[prop.Proposition]:
         """根据事件生成时间命题
 
         Args:
             events (Sequence[event.Event]): 事件列表
+            resample (bool, optional): 是否重新随机生成所有事件的时间，为False时沿用上一次生成的时间. 默认为True.
 
         Raises:
             ValueError: 事件类型不合法
@@ -295,11 +296,12 @@ class ConstraintMachine:
         Returns:
             list[prop.Proposition]: 时间命题列表
         """
-        self._forward()
-        # 后向传播，随机生成时间
-        self._backward()
-        # 获得时间值
-        self._set_time()
+        if resample:
+            self._forward()
+            # 后向传播，随机生成时间
+            self._backward()
+            # 获得时间值
+            self._set_time()
         # 03-11新增：清空event_order
         self.event_order.clear()
         time_props: list[prop.Proposition] = []
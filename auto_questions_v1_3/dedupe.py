@@ -0,0 +1,163 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""试题的结构指纹与去重存储，避免在多次提问、多次重置和多次运行之间生成重复的试题
+"""
+
+import config
+import element
+import machine
+import proposition as prop
+import sqlite3
+import hashlib
+import math
+import time
+from pathlib import Path
+from typing import Any, Optional
+from collections.abc import Sequence
+
+def question_fingerprint(chosen_props: Sequence[prop.Proposition], question_info: dict[str, Any]) -> str:
+    """计算试题的结构指纹\n
+    指纹由已知命题集合、被提问的命题、提问属性和选项集合的规范键计算得到，与翻译得到的文本无关
+
+    Args:
+        chosen_props (Sequence[prop.Proposition]): 作为已知信息的命题
+        question_info (dict[str, Any]): 提问机生成的问题信息字典
+
+    Returns:
+        str: 试题的结构指纹
+    """
+    premise_keys = sorted(repr(p.key()) for p in chosen_props)
+    question: element.Element = question_info[machine.QUESTION]
+    option_keys = sorted(repr(element.element_key(o)) for o in question_info[machine.OPTIONS].values())
+    canonical = repr((tuple(premise_keys), repr(question.key()), question_info[machine.ASK_ATTR], tuple(option_keys)))
+    return hashlib.sha1(canonical.encode("utf8")).hexdigest()
+
+class BloomFilter:
+    """简单的布隆过滤器，用于在指纹数量很大时减少数据库查询
+    """
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        """初始化布隆过滤器
+
+        Args:
+            capacity (int): 预计存放的指纹数量
+            error_rate (float, optional): 可以接受的误判率. 默认为0.001.
+        """
+        assert capacity > 0, "布隆过滤器的容量必须大于0"
+        assert 0 < error_rate < 1, "布隆过滤器的误判率必须在0和1之间"
+        self.size: int = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        """位数组的长度"""
+        self.hash_num: int = max(1, round(self.size / capacity * math.log(2)))
+        """哈希函数的数量"""
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        digest = hashlib.blake2b(item.encode("utf8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_num)]
+
+    def add(self, item: str):
+        """向布隆过滤器中加入元素
+
+        Args:
+            item (str): 元素
+        """
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class FingerprintStore:
+    """保存在试题配置文件夹中的持久化指纹库，基于SQLite
+
+    本次运行中新的指纹先保存在内存中，结果文件写入成功后再调用commit()写入指纹库，
+    避免运行中断或结果文件被覆盖时，未保存的试题的指纹仍然阻止这些试题再次生成
+    """
+    def __init__(self, setting_dir: str | Path, bloom_capacity: Optional[int] = None):
+        """打开(或新建)试题配置文件夹中的指纹库
+
+        Args:
+            setting_dir (str | Path): 试题配置文件夹
+            bloom_capacity (Optional[int], optional): 布隆过滤器的容量，为None时不使用布隆过滤器. 默认为None.
+        """
+        self.setting_dir = Path(setting_dir)
+        self.path: Path = self.setting_dir / config.FINGERPRINT_FILE
+        """指纹库文件路径"""
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS fingerprints (fingerprint TEXT PRIMARY KEY, question_type TEXT, created REAL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS runs (question_type TEXT, checked INTEGER, duplicates INTEGER, finished REAL)")
+        self.conn.commit()
+        self.bloom: Optional[BloomFilter] = None
+        """可选的布隆过滤器，未命中时可以确定指纹不存在，无需查询数据库"""
+        if bloom_capacity is not None:
+            self.bloom = BloomFilter(bloom_capacity)
+            for (fp,) in self.conn.execute("SELECT fingerprint FROM fingerprints"):
+                self.bloom.add(fp)
+        self.checked: int = 0
+        """本次运行检查过的试题数量"""
+        self.duplicates: int = 0
+        """本次运行发现的重复试题数量"""
+        self.pending: dict[str, str] = {}
+        """本次运行中尚未写入指纹库的新指纹到问题类型的映射"""
+
+    def __contains__(self, fingerprint: str) -> bool:
+        if fingerprint in self.pending:
+            return True
+        if self.bloom is not None and fingerprint not in self.bloom:
+            return False
+        row = self.conn.execute("SELECT 1 FROM fingerprints WHERE fingerprint = ?", (fingerprint,)).fetchone()
+        return row is not None
+
+    def add(self, fingerprint: str, question_type: str = "") -> bool:
+        """检查试题指纹，新的指纹暂时保存在内存中，调用commit()后才写入指纹库
+
+        Args:
+            fingerprint (str): 试题指纹
+            question_type (str, optional): 问题类型. 默认为"".
+
+        Returns:
+            bool: 指纹是新的返回True，重复返回False
+        """
+        self.checked += 1
+        if fingerprint in self:
+            self.duplicates += 1
+            return False
+        self.pending[fingerprint] = question_type
+        return True
+
+    def commit(self):
+        """将本次运行中新的指纹写入指纹库，应在试题已经保存后调用
+        """
+        now = time.time()
+        self.conn.executemany("INSERT OR IGNORE INTO fingerprints VALUES (?, ?, ?)", [(fp, question_type, now) for fp, question_type in self.pending.items()])
+        self.conn.commit()
+        if self.bloom is not None:
+            for fp in self.pending:
+                self.bloom.add(fp)
+        self.pending = {}
+
+    def report(self, question_type: str = "") -> dict[str, Any]:
+        """输出并记录本次运行的重复率，以及该配置文件夹历次运行的重复率
+
+        Args:
+            question_type (str, optional): 问题类型. 默认为"".
+
+        Returns:
+            dict[str, Any]: 重复率统计信息
+        """
+        self.conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?)", (question_type, self.checked, self.duplicates, time.time()))
+        self.conn.commit()
+        total_checked, total_duplicates = self.conn.execute("SELECT COALESCE(SUM(checked), 0), COALESCE(SUM(duplicates), 0) FROM runs").fetchone()
+        stored = self.conn.execute("SELECT COUNT(*) FROM fingerprints").fetchone()[0]
+        run_rate = self.duplicates / self.checked if self.checked else 0.0
+        total_rate = total_duplicates / total_checked if total_checked else 0.0
+        print(f"{self.setting_dir}：本次检查{self.checked}道试题，重复{self.duplicates}道，重复率{run_rate:.2%}")
+        print(f"{self.setting_dir}：历次运行共检查{total_checked}道试题，重复{total_duplicates}道，重复率{total_rate:.2%}，指纹库中共有{stored}个指纹")
+        return {"checked": self.checked, "duplicates": self.duplicates, "rate": run_rate, "total_checked": total_checked, "total_duplicates": total_duplicates, "total_rate": total_rate, "stored": stored}
+
+    def close(self):
+        """关闭指纹库
+        """
+        self.conn.close()
@@ -8,7 +8,7 @@
 import abc
 from typing import Any
 import warnings
-from collections.abc import Sequence
+from collections.abc import Sequence, Hashable
 
 class Element(metaclass = abc.ABCMeta):
     """内部数据结构中元素的抽象基类，包含名称、类型和属性
@@ -24,6 +24,7 @@ class Element(metaclass = abc.ABCMeta):
         self.name: str = name # 元素的名称
         self.kind: str = kind # 元素的类型
         self.attrs: dict[str, Any] = kwargs # 元素的属性
+        self._key: Hashable | None = None # 元素的规范键缓存
 
     def kind_infer(self):
         """对元素的类型进行自动推断\n请注意自动推断未必准确
@@ -92,6 +93,28 @@ class Element(metaclass = abc.ABCMeta):
         if key in self.attrs:
             warnings.warn(f"属性'{key}'已存在，将被覆盖", UserWarning)
         self.attrs[key] = value
+        # 属性改变后，规范键需要重新计算
+        self._key = None
+
+    def _key_attrs(self) -> list[str]:
+        """参与规范键计算的属性名，与__eq__比较的属性保持一致
+
+        Returns:
+            list[str]: 属性名列表
+        """
+        return list(self.attrs)
+
+    def key(self) -> Hashable:
+        """获取元素的规范键\n
+        规范键是可哈希的，两个元素相等当且仅当它们的规范键相等，可用于字典和集合的索引
+
+        Returns:
+            Hashable: 元素的规范键
+        """
+        if getattr(self, "_key", None) is None:
+            attr_keys = tuple(sorted(((k, element_key(self.attrs[k])) for k in self._key_attrs()), key=lambda x: x[0]))
+            self._key = (type(self).__name__, self.kind, attr_keys)
+        return self._key
 
     def is_contained(self, element_list: list["Element"]) -> bool:
         """判断一个元素是否在一个元素集中
@@ -144,6 +167,23 @@ class Element(metaclass = abc.ABCMeta):
         else:
             self[name] = value
     '''
+def element_key(value: Any) -> Hashable:
+    """将元素或属性值转换为可哈希的规范键
+
+    Args:
+        value (Any): 元素或属性值
+
+    Returns:
+        Hashable: 规范键
+    """
+    if isinstance(value, Element):
+        return value.key()
+    if isinstance(value, dict):
+        return tuple(sorted(((k, element_key(v)) for k, v in value.items()), key=lambda x: x[0]))
+    if isinstance(value, (list, tuple)):
+        return tuple(element_key(v) for v in value)
+    return value
+
 def name_is_unique(elements: Sequence[Element]) -> bool:
     """判断元素的名称是否唯一
 
@@ -0,0 +1,184 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""使用并查集维护等价关系(simultaneous、same_len等)的传递闭包\n
+等价关系由三部分规则声明：两个条件首尾相接的传递规则(如SimultaneousTrans)，以及交换两个事件的对称relation规则，
+自反的情况由传递规则的判断条件排除。对于大小为k的等价类，逐对推理会产生O(k^3)个候选组合和大量重复推导；
+这里用并查集划分等价类，只处理出现了新命题的等价类，并在类内沿广度优先搜索树为每个新的命题对构造一条推导：
+(x, z)由(x, y)和(y, z)推出，其中y是搜索树中z的父节点，因此每个命题对只对应一个推理节点
+这改变了推理图的语义：命题集合与逐对推理相同，但其余的推导被丢弃，只选择部分初始命题作为已知条件时，
+能够推出的命题和命题的层级都可能与逐对推理不同，因此只在显式开启equivalence_classes时使用
+"""
+
+import element
+import proposition as prop
+import mynode
+import rule
+import instrument
+import re
+from collections import deque
+from collections.abc import Hashable, Sequence
+from typing import Optional
+
+_CHAIN_PATTERN = re.compile(r"^\s*(\w+)\['(\w+)'\]\s*(==|!=)\s*(\w+)\['(\w+)'\]\s*$")
+STATS: dict[str, int] = {"calls": 0, "classes": 0, "pairs": 0}
+"""并查集推理的统计信息：执行次数、处理的等价类数量、得到的新命题对数量"""
+instrument.register("等价类推理", lambda: dict(STATS))
+
+class EquivalenceSpec:
+    """等价关系的描述
+    """
+    def __init__(self, kind: str, first_attr: str, second_attr: str):
+        self.kind = kind
+        """等价关系命题的类型"""
+        self.first_attr = first_attr
+        """命题中第一个元素的属性名"""
+        self.second_attr = second_attr
+        """命题中第二个元素的属性名"""
+
+class UnionFind:
+    """带路径压缩和按大小合并的并查集
+    """
+    def __init__(self):
+        self.parent: dict[Hashable, Hashable] = {}
+        self.size: dict[Hashable, int] = {}
+
+    def find(self, x: Hashable) -> Hashable:
+        """查找元素所在集合的代表元素，元素不存在时将其加入
+
+        Args:
+            x (Hashable): 元素
+
+        Returns:
+            Hashable: 代表元素
+        """
+        if x not in self.parent:
+            self.parent[x] = x
+            self.size[x] = 1
+            return x
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, x: Hashable, y: Hashable):
+        """合并两个元素所在的集合
+
+        Args:
+            x (Hashable): 元素
+            y (Hashable): 元素
+        """
+        rx, ry = self.find(x), self.find(y)
+        if rx == ry:
+            return
+        if self.size[rx] < self.size[ry]:
+            rx, ry = ry, rx
+        self.parent[ry] = rx
+        self.size[rx] += self.size[ry]
+
+def find_equivalences(rules: Sequence[rule.Rule]) -> dict[int, EquivalenceSpec]:
+    """在推理规则中查找声明了等价关系的传递规则
+
+    传递规则需要有两个同类型的条件，判断条件为first['b'] == second['a']和first['a'] != second['b']，
+    结论为同类型的命题(first['a'], second['b'])；同时规则中需要有将(a, b)映射为(b, a)的对称relation规则
+
+    Args:
+        rules (Sequence[rule.Rule]): 推理规则
+
+    Returns:
+        dict[int, EquivalenceSpec]: 传递规则对象的id到等价关系描述的映射
+    """
+    symmetric: set[tuple[str, str, str]] = set()
+    for r in rules:
+        if r.kind != rule.RELATION:
+            continue
+        condition, conclusion = r[rule.CONDITION], r[rule.CONCLUSION]
+        if condition[rule.KIND] == conclusion[rule.KIND] and len(condition[rule.ATTRS]) == 2 and list(conclusion[rule.ATTRS]) == list(reversed(condition[rule.ATTRS])):
+            symmetric.add((condition[rule.KIND], *condition[rule.ATTRS]))
+    specs: dict[int, EquivalenceSpec] = {}
+    for r in rules:
+        spec = _parse_transitive(r)
+        if spec is not None and (spec.kind, spec.first_attr, spec.second_attr) in symmetric:
+            specs[id(r)] = spec
+    return specs
+
+def _parse_transitive(r: rule.Rule) -> Optional[EquivalenceSpec]:
+    if r.kind != rule.RULE or len(r[rule.CONDITION]) != 2 or len(r[rule.CONCLUSION]) != 1 or len(r[rule.JUDGE]) != 2:
+        return None
+    first, second = r[rule.CONDITION]
+    attrs = list(first[rule.ATTRS])
+    if first[rule.KIND] != second[rule.KIND] or len(attrs) != 2 or list(second[rule.ATTRS]) != attrs:
+        return None
+    a, b = attrs
+    expected = {
+        ("==", first["name"], b, second["name"], a),
+        ("!=", first["name"], a, second["name"], b),
+    }
+    judges = set()
+    for judge in r[rule.JUDGE]:
+        match = _CHAIN_PATTERN.match(judge)
+        if match is None:
+            return None
+        left, left_attr, op, right, right_attr = match.groups()
+        judges.add((op, left, left_attr, right, right_attr))
+    conclusion = r[rule.CONCLUSION][0]
+    expected_attrs = {a: f"{first['name']}['{a}']", b: f"{second['name']}['{b}']"}
+    if judges != expected or conclusion[rule.KIND] != first[rule.KIND] or dict(conclusion[rule.ATTRS]) != expected_attrs:
+        return None
+    return EquivalenceSpec(first[rule.KIND], a, b)
+
+def reason(r: rule.Rule, spec: EquivalenceSpec, old_props: rule.PropIndexView, new_props: rule.PropIndexView) -> list[mynode.Node]:
+    """推理等价关系的传递闭包中尚不存在的命题对，每个命题对只构造一条推导
+
+    Args:
+        r (rule.Rule): 传递规则
+        spec (EquivalenceSpec): 等价关系描述
+        old_props (rule.PropIndexView): 旧命题
+        new_props (rule.PropIndexView): 新命题
+
+    Returns:
+        list[mynode.Node]: 推理得到的新命题节点
+    """
+    attrs = [spec.first_attr, spec.second_attr]
+    old_list = old_props.select(spec.kind, attrs)
+    new_list = new_props.select(spec.kind, attrs)
+    STATS["calls"] += 1
+    if len(new_list) == 0:
+        return []
+    # 命题对按照两个元素的规范键保存，同一命题对只保留第一个命题
+    pairs: dict[tuple[Hashable, Hashable], prop.Proposition] = {}
+    adjacency: dict[Hashable, list[Hashable]] = {}
+    uf = UnionFind()
+    for p in old_list + new_list:
+        x, y = element.element_key(p[spec.first_attr]), element.element_key(p[spec.second_attr])
+        if (x, y) in pairs:
+            continue
+        pairs[(x, y)] = p
+        adjacency.setdefault(x, []).append(y)
+        uf.union(x, y)
+    touched = {uf.find(element.element_key(p[spec.first_attr])) for p in new_list}
+    STATS["classes"] += len(touched)
+    results: list[mynode.Node] = []
+    # 按照元素第一次出现的顺序作为搜索的起点，保证结果的顺序确定
+    for x in adjacency:
+        if uf.find(x) not in touched:
+            continue
+        visited = {x}
+        queue = deque([x])
+        while queue:
+            y = queue.popleft()
+            for z in adjacency.get(y, []):
+                if z in visited:
+                    continue
+                visited.add(z)
+                queue.append(z)
+                if (x, z) in pairs or (x, y) not in pairs:
+                    continue
+                # (x, z)由(x, y)和(y, z)推出，(x, y)在搜索树中先于(x, z)得到
+                for node in r.derive((pairs[(x, y)], pairs[(y, z)])):
+                    pairs[(x, z)] = node[mynode.CONCLUSION]
+                    results.append(node)
+                    STATS["pairs"] += 1
+    return results
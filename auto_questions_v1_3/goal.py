@@ -0,0 +1,86 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""目标导向的出题：先确定提问命题的类型，再沿着规则依赖反向查找推出该类型命题所需的推理规则\n
+完整的正向推理会计算所有命题类型的推理闭包，而每道试题只需要提问命题及其从已知命题出发的推导。推理规则是单调的，
+某一类型命题的任何推导只会用到在规则依赖图中能够到达该类型的规则，而条件类型不能由初始命题和知识命题推出的规则不会得到任何结果，
+因此先从初始命题和知识命题的类型出发正向去掉不会执行的规则，再从目标类型出发反向搜索得到所需的规则，
+只用它们推理得到的目标类型命题和推理节点与完整推理相同，提问、选项的真假判断和推理链都不受影响。
+推理图中只有初始命题、知识命题和推出目标类型所经过的命题，已知命题也只从这些命题中选择
+"""
+
+import rule
+import instrument
+from collections.abc import Iterable, Sequence
+from typing import Optional
+
+_SLICES: dict[tuple[tuple[str, ...], frozenset[str], Optional[frozenset[str]]], list[int]] = {}
+"""(规则定义哈希, 目标命题类型, 初始命题类型)到所需规则序号的缓存"""
+STATS: dict[str, int] = {"slices": 0, "hits": 0, "rules": 0, "kept_rules": 0}
+"""反向查找的统计信息：实际查找的次数、命中缓存的次数、查找时的规则总数和保留的规则数量"""
+instrument.register("目标导向推理", lambda: dict(STATS))
+MIN_GOAL_PROPS = 4
+"""目标类型至少需要的可询问命题数量，与默认的选项数量相同"""
+
+def backward_slice(rules: Sequence[rule.Rule], goal_kinds: Sequence[str], base_kinds: Optional[Iterable[str]] = None) -> list[rule.Rule]:
+    """从目标命题类型出发反向查找推出这些类型的命题所需的推理规则
+
+    Args:
+        rules (Sequence[rule.Rule]): 推理规则
+        goal_kinds (Sequence[str]): 目标命题类型
+        base_kinds (Optional[Iterable[str]], optional): 初始命题和知识命题的类型，设置后只保留条件类型都能由这些类型推出的规则. 默认为None.
+
+    Returns:
+        list[rule.Rule]: 所需的推理规则，保持在rules中的顺序
+    """
+    base: Optional[frozenset[str]] = None if base_kinds is None else frozenset(base_kinds)
+    key = (tuple(r.definition_hash for r in rules), frozenset(goal_kinds), base)
+    if key in _SLICES:
+        STATS["hits"] += 1
+        return [rules[i] for i in _SLICES[key]]
+    live: set[int] = set(range(len(rules)))
+    if base is not None:
+        # 正向推出所有可能出现的命题类型，条件类型不能全部出现的规则不会得到结果
+        reached: set[str] = set(base)
+        live = set()
+        while True:
+            added = {i for i, r in enumerate(rules) if i not in live and r.input_kinds() <= reached}
+            if len(added) == 0:
+                break
+            live |= added
+            for i in added:
+                reached |= rules[i].output_kinds()
+    producers: dict[str, list[int]] = {}
+    for i, r in enumerate(rules):
+        if i not in live:
+            continue
+        for kind in r.output_kinds():
+            producers.setdefault(kind, []).append(i)
+    needed: set[str] = set(goal_kinds)
+    stack: list[str] = list(needed)
+    kept: set[int] = set()
+    while stack:
+        kind = stack.pop()
+        for i in producers.get(kind, []):
+            if i in kept:
+                continue
+            kept.add(i)
+            for input_kind in rules[i].input_kinds() - needed:
+                needed.add(input_kind)
+                stack.append(input_kind)
+    _SLICES[key] = sorted(kept)
+    STATS["slices"] += 1
+    STATS["rules"] += len(rules)
+    STATS["kept_rules"] += len(kept)
+    return [rules[i] for i in _SLICES[key]]
+
+def get_goal_kinds(rules: Sequence[rule.Rule]) -> list[str]:
+    """获取可以作为提问目标的命题类型，即推理规则的结论类型
+
+    Args:
+        rules (Sequence[rule.Rule]): 推理规则
+
+    Returns:
+        list[str]: 命题类型，按照在规则中第一次出现的顺序排列
+    """
+    return list(dict.fromkeys(kind for r in rules for kind in sorted(r.output_kinds())))
@@ -5,45 +5,228 @@
 """
 
 import config
+import element
 import proposition as prop
 import mynode
+import nodetable
 import rule
-from tqdm import tqdm
+import timeline
+import equivalence
+import instrument
 import math
-from collections.abc import Sequence
-from typing import Optional
+import copy
+import time
+import numpy as np
+import networkx as nx
+from collections import OrderedDict
+from collections.abc import Hashable, Sequence
+from typing import Any, Optional
 from pathlib import Path
 
+COMPACT_STATS: dict[str, int] = {"calls": 0, "removed_nodes": 0, "removed_props": 0, "kept_nodes": 0, "kept_props": 0}
+"""推理图压缩的统计信息：压缩次数、删除和保留的节点数量、删除和保留的命题数量"""
+instrument.register("推理图压缩", lambda: dict(COMPACT_STATS))
+# 推理预算耗尽时的停止原因
+MAX_ROUNDS = "max_rounds"
+"""推理轮数达到上限"""
+MAX_NODES = "max_nodes"
+"""节点数量达到上限"""
+MAX_SECONDS = "max_seconds"
+"""推理时间达到上限"""
+BUDGET_STATS: dict[str, Any] = {"reasons": 0, "stopped": 0, MAX_ROUNDS: 0, MAX_NODES: 0, MAX_SECONDS: 0, "last_stop": None}
+"""推理预算的统计信息：推理次数、因预算耗尽而停止的次数、各停止原因的次数，以及最近一次的停止原因"""
+instrument.register("推理预算", lambda: dict(BUDGET_STATS))
+
+LAYER_VIEW_STATS: dict[str, int] = {"computed": 0, "reused": 0}
+"""层级视图的统计信息：计算的次数、复用缓存的次数"""
+instrument.register("层级视图", lambda: dict(LAYER_VIEW_STATS))
+
+class LayerView:
+    """二次推理(设置层级)的结果，创建后不可修改\n
+    层级只由推理图和已知命题集合决定，因此同一个推理图可以同时为多组已知命题提供层级视图，已知命题集合重复时直接复用
+    """
+    __slots__ = ("key", "layers", "condition_layers", "prop_layers", "deepest_layer", "reachable_ids")
+
+    def __init__(self, key: Hashable, layers: np.ndarray, condition_layers: np.ndarray, prop_layers: np.ndarray, deepest_layer: int, reachable_ids: np.ndarray):
+        """初始化层级视图，数组会被设置为只读
+
+        Args:
+            key (Hashable): 已知命题集合的规范键
+            layers (np.ndarray): 节点的层级，与节点ID一一对应
+            condition_layers (np.ndarray): 条件的层级，与节点表的premise_ids一一对应
+            prop_layers (np.ndarray): 命题的层级，与命题ID一一对应
+            deepest_layer (int): 最深的层级
+            reachable_ids (np.ndarray): 可达命题的ID，按照在节点中第一次出现的顺序排列
+        """
+        for name, value in (("key", key), ("layers", layers), ("condition_layers", condition_layers), ("prop_layers", prop_layers), ("deepest_layer", deepest_layer), ("reachable_ids", reachable_ids)):
+            if isinstance(value, np.ndarray):
+                value.flags.writeable = False
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value):
+        raise AttributeError("层级视图不能修改")
+
 class ReasoningGraph:
     """推理图，内含全面的推理结果，是程序的核心组件之一\n
     reason()方法执行一次推理\n
     set_node_layers()方法设置节点的层级(执行二次推理)\n
     """
 
-    def __init__(self, init_props: Sequence[prop.Proposition], rules: Sequence[rule.Rule], knowledge_props: Optional[Sequence[prop.Proposition]] = None):
+    def __init__(self, init_props: Sequence[prop.Proposition], rules: Sequence[rule.Rule], knowledge_props: Optional[Sequence[prop.Proposition]] = None, max_derivations: Optional[int] = None, materialise_timeline: bool = False, equivalence_classes: bool = False, max_rounds: Optional[int] = None, max_nodes: Optional[int] = None, max_seconds: Optional[float] = None):
         """初始化推理图
 
         Args:
             init_props (Sequence[prop.Proposition]): 推理图中的初始命题
             rules (Sequence[rule.Rule]): 推理图中可用的推理规则
             knowledge_props (Optional[Sequence[prop.Proposition]], optional): 知识命题. 默认为None.
+            max_derivations (Optional[int], optional): 每个结论命题最多保留的最短推导数量，为None时保留全部推导. 默认为None.
+            materialise_timeline (bool, optional): 是否根据时间值直接计算成对比较规则的推理结果. 默认为False.
+            equivalence_classes (bool, optional): 是否使用并查集推理等价关系的传递闭包，每个命题对只保留一条推导，部分已知命题能推出的命题和层级与逐对推理不同. 默认为False.
+            max_rounds (Optional[int], optional): 每次推理最多执行的轮数，为None时不限制. 默认为None.
+            max_nodes (Optional[int], optional): 推理图最多包含的节点数量，为None时不限制. 默认为None.
+            max_seconds (Optional[float], optional): 每次推理最多使用的秒数，为None时不限制. 默认为None.
         """
+        assert max_derivations is None or max_derivations > 0, "每个结论命题至少保留一个推导"
+        assert max_rounds is None or max_rounds > 0, "推理轮数的上限必须为正数"
+        assert max_nodes is None or max_nodes > 0, "节点数量的上限必须为正数"
+        assert max_seconds is None or max_seconds > 0, "推理时间的上限必须为正数"
         self.init_props: list[prop.Proposition] = list(init_props) # 推理图中的初始命题
         print("初始命题：", *[p.translate(lang=config.CHINESE) for p in self.init_props])
         self.reasoning_rules: list[rule.Rule] = list(rules) # 推理图中可用的推理规则
         # print("可用规则", *[r.name for r in self.reasoning_rules])
         self.knowledge_props: list[prop.Proposition] = list(knowledge_props) if knowledge_props is not None else []
         print("知识命题：", *[p.translate(lang=config.CHINESE) for p in self.knowledge_props])
-        self.nodes: list[mynode.Node] = [] # 推理图中的节点
+        # 10-19修改：节点改为按列保存在节点表中，命题保存在命题表中并以整数ID表示
+        self.prop_table: nodetable.PropTable = nodetable.PropTable()
+        """命题表，命题按照在节点中第一次出现的顺序(条件在前，结论在后)编号"""
+        self.node_table: nodetable.NodeTable = nodetable.NodeTable()
+        """节点表，按列保存推理图中的节点"""
+        self._conclusion_index: Optional[tuple[np.ndarray, np.ndarray]] = None
+        """按照结论命题ID排序的节点ID及排序后的结论命题ID，用于回溯，在节点变化后重新建立"""
         self.deepest_layer: int = -1 # 推理图中最深的层级
+        self._attr_index: Optional[dict[tuple, list[prop.Proposition]]] = None
+        """命题属性索引，键为(命题类型, 属性名, 属性值的规范键)，值为命题列表，在节点变化后重新建立"""
+        self.closure_props: list[prop.Proposition] = []
+        """推理闭包中的所有命题，包括初始命题、知识命题和推理得到的命题，用于增量推理"""
+        self._closure_keys: set = set()
+        """推理闭包中命题的规范键"""
+        self._prop_index: rule.PropIndex = rule.PropIndex()
+        """推理闭包的命题索引，与closure_props的顺序一致，各条推理规则共用"""
+        self._rule_strata: Optional[list[list[rule.Rule]]] = None
+        """按照规则依赖图分层的推理规则，在规则变化后重新计算"""
+        self._node_keys: dict[tuple[int, tuple[int, ...], int], int] = {}
+        """节点规范键(规则ID, 排序后的条件命题ID, 结论命题ID)到节点ID的映射，用于合并重复节点"""
+        self.max_derivations: Optional[int] = max_derivations
+        """每个结论命题最多保留的最短推导数量，为None时保留全部推导"""
+        self.materialise_timeline: bool = materialise_timeline
+        """是否根据时间值直接计算成对比较规则的推理结果"""
+        self.equivalence_classes: bool = equivalence_classes
+        """是否使用并查集推理等价关系的传递闭包，开启后每个传递得到的命题对只保留一条推导"""
+        self._equivalences: Optional[dict[int, equivalence.EquivalenceSpec]] = None
+        """声明了等价关系的传递规则，在规则变化后重新查找"""
+        self.compacted: bool = False
+        """是否已经删除了与出题无关的节点，压缩后的推理图不能继续推理或撤回命题"""
+        self.max_rounds: Optional[int] = max_rounds
+        """每次推理最多执行的轮数，为None时不限制"""
+        self.max_nodes: Optional[int] = max_nodes
+        """推理图最多包含的节点数量，为None时不限制"""
+        self.max_seconds: Optional[float] = max_seconds
+        """每次推理最多使用的秒数，为None时不限制"""
+        self.stop_reason: Optional[str] = None
+        """最近一次推理因预算耗尽而停止的原因，为None时推理闭包完整"""
+        self.layer_view: Optional[LayerView] = None
+        """最近一次set_node_layers()得到的层级视图，各查询方法未指定层级视图时使用"""
+        self._layer_views: OrderedDict[Hashable, LayerView] = OrderedDict()
+        """已知命题集合的规范键到层级视图的缓存，在节点变化后清空"""
+
+    def copy(self) -> "ReasoningGraph":
+        """复制推理图，复制后的推理图可以独立地进行增量推理和二次推理，命题和规则对象与原推理图共用
+
+        Returns:
+            ReasoningGraph: 推理图的副本
+        """
+        graph = copy.copy(self)
+        graph.init_props = list(self.init_props)
+        graph.reasoning_rules = list(self.reasoning_rules)
+        graph._rule_strata = None
+        graph._equivalences = None
+        graph.knowledge_props = list(self.knowledge_props)
+        graph.prop_table = self.prop_table.copy()
+        graph.node_table = self.node_table.copy()
+        graph._node_keys = dict(self._node_keys)
+        graph.closure_props = list(self.closure_props)
+        graph._closure_keys = set(self._closure_keys)
+        graph._prop_index = rule.PropIndex(graph.closure_props)
+        graph._attr_index = None
+        graph._conclusion_index = None
+        graph._layer_views = OrderedDict()
+        return graph
+
+    @property
+    def nodes(self) -> nodetable.NodeList:
+        """推理图中的节点，元素为节点视图
+        """
+        return nodetable.NodeList(self.node_table, self.prop_table)
 
     def add_nodes(self, nodes: Sequence[mynode.Node]):
-        """添加节点
+        """添加节点，节点中的命题按照出现顺序加入命题表\n
+        10-19修改：规则、条件命题集合和结论命题都相同的节点只保留第一个，之后的节点只增加其推出次数
 
         Args:
             nodes (Sequence[mynode.Node]): 节点序列
         """
-        self.nodes.extend(nodes)
+        premises: list[list[int]] = []
+        conclusions: list[int] = []
+        rules: list[int] = []
+        duplicate_ids: list[int] = []
+        base: int = len(self.node_table)
+        for node in nodes:
+            premise_ids = [self.prop_table.intern(p) for p in node[mynode.CONDITION]]
+            conclusion_id = self.prop_table.intern(node[mynode.CONCLUSION])
+            rule_id = self.node_table.rule_id(node[mynode.RULE])
+            key = (rule_id, tuple(sorted(premise_ids)), conclusion_id)
+            node_id = self._node_keys.get(key)
+            if node_id is not None:
+                duplicate_ids.append(node_id)
+                continue
+            self._node_keys[key] = base + len(conclusions)
+            premises.append(premise_ids)
+            conclusions.append(conclusion_id)
+            rules.append(rule_id)
+        self.node_table.extend(premises, conclusions, rules)
+        np.add.at(self.node_table.derivation_counts, np.asarray(duplicate_ids, dtype=nodetable.ID_DTYPE), 1)
+        self._attr_index = None
+        self._conclusion_index = None
+        self._layer_views = OrderedDict()
+
+    def _build_node_keys(self):
+        """根据节点表重新建立节点规范键到节点ID的映射
+        """
+        t = self.node_table
+        self._node_keys = {(int(t.rule_ids[i]), tuple(sorted(t.premises_of(i).tolist())), int(t.conclusion_ids[i])): i for i in range(len(t))}
+
+    def _build_attr_index(self):
+        """根据推理图中的所有命题建立命题属性索引，索引中命题的顺序与get_all_props()一致
+        """
+        self._attr_index = {}
+        for p in self.get_all_props():
+            for attr in p.main_attrs():
+                self._attr_index.setdefault((p.kind, attr, element.element_key(p[attr])), []).append(p)
+
+    def get_props_by_attr(self, kind: str, attr: str, value: element.Element) -> list[prop.Proposition]:
+        """获取推理图中类型为kind、属性attr的值等于value的所有命题
+
+        Args:
+            kind (str): 命题类型
+            attr (str): 属性名
+            value (element.Element): 属性值
+
+        Returns:
+            list[prop.Proposition]: 命题列表
+        """
+        if self._attr_index is None:
+            self._build_attr_index()
+        return self._attr_index.get((kind, attr, element.element_key(value)), [])
 
     def add_rules(self, rules: Sequence[rule.Rule]):
         """添加推理规则
@@ -51,13 +234,15 @@ class ReasoningGraph:
         Args:
             rules (Sequence[rule.Rule]): 推理规则序列
         """
-        name_set: set[str] = [i.name for i in self.reasoning_rules]
+        name_set: set[str] = {i.name for i in self.reasoning_rules}
         for r in rules:
             if r.name not in name_set:
                 self.reasoning_rules.append(r)
                 name_set.add(r.name)
             else:
                 print(f"增加规则时，发现规则{r.name}已存在")
+        self._rule_strata = None
+        self._equivalences = None
 
     def get_conclusions(self) -> list[prop.Proposition]:
         """获取推理图中的所有结论命题
@@ -65,12 +250,7 @@ class ReasoningGraph:
         Returns:
             list[prop.Proposition]: 结论命题列表
         """
-        conclusions: list[prop.Proposition] = []
-        for node in self.nodes:
-            node_conclusion: prop.Proposition = node[mynode.CONCLUSION]
-            if not node_conclusion.is_contained(conclusions):
-                conclusions.append(node_conclusion)
-        return conclusions
+        return self._to_props(nodetable.first_occurrence(self.node_table.conclusion_ids))
 
     def get_all_props(self, use_askable: bool = False) -> list[prop.Proposition]:
         """获取推理图中的所有命题
@@ -81,25 +261,42 @@ class ReasoningGraph:
         Returns:
             list[prop.Proposition]: 命题列表
         """
-        all_props: list[prop.Proposition] = []
-        for node in self.nodes:
-            condition: list[prop.Proposition] = node[mynode.CONDITION]
-            conclusion: prop.Proposition = node[mynode.CONCLUSION]
-            for p in condition:
-                if not p.is_contained(all_props):
-                    all_props.append(p)
-            if not conclusion.is_contained(all_props):
-                all_props.append(conclusion)
+        # 命题表只在添加节点时按照出现顺序加入命题，因此其顺序即为命题在节点中第一次出现的顺序
+        all_props: list[prop.Proposition] = list(self.prop_table.props)
         if use_askable:
             all_props = [p for p in all_props if p[prop.ASKABLE]]
         return all_props
 
+    def _to_props(self, prop_ids: np.ndarray, use_askable: bool = False) -> list[prop.Proposition]:
+        """将命题ID序列转换为命题列表
+
+        Args:
+            prop_ids (np.ndarray): 命题ID序列
+            use_askable (bool, optional): 是否只获取可询问的命题. 默认为False.
+
+        Returns:
+            list[prop.Proposition]: 命题列表
+        """
+        props: list[prop.Proposition] = [self.prop_table[int(i)] for i in prop_ids]
+        if use_askable:
+            props = [p for p in props if p[prop.ASKABLE]]
+        return props
+
     def reason(self, new_props: Optional[list[prop.Proposition]] = None):
-        """执行推理，得到完整的推理图
+        """执行推理，得到完整的推理图\n
+        设置了推理预算时，预算耗尽后停止推理，推理图中只保留已经加入的节点，stop_reason记录停止的原因
 
         Args:
             new_props (Optional[list[prop.Proposition]], optional): 新的命题. 用于增量式推理. 默认为None.
         """
+        assert not self.compacted, "推理图已经压缩，不能继续推理"
+        if new_props is not None and self.stop_reason is not None:
+            # 上一次推理因预算耗尽而停止，推理闭包不完整，增量推理会遗漏组合，需要从头推理
+            self._clear()
+            new_props = None
+        self.stop_reason = None
+        start_time: float = time.perf_counter()
+        deadline: Optional[float] = None if self.max_seconds is None else start_time + self.max_seconds
         """
         # 删除graph.txt文件
         if Path(config.CURR_SETTING_DIR).exists():
@@ -109,148 +306,536 @@ class ReasoningGraph:
         """
         reason_count: int = 0
         if new_props is None:
-            old_prop_list: list[prop.Proposition] = []
             curr_prop_list: list[prop.Proposition] = self.init_props + self.knowledge_props
         else:
-            assert len(self.nodes) > 0, "没有节点，不适用增量推理"
-            old_prop_list: list[prop.Proposition] = self.get_all_props()
-            curr_prop_list: list[prop.Proposition] = new_props
+            # 10-19修改：增量推理以推理闭包作为旧命题，只推理至少使用一个新命题的组合
+            assert len(self.closure_props) > 0, "没有推理闭包，不适用增量推理"
+            curr_prop_list: list[prop.Proposition] = list(new_props)
         assert len(curr_prop_list) > 0, "没有命题可以推理"
         assert len(self.reasoning_rules) > 0, "没有推理规则"
-        while True:
-            reason_count += 1
-            curr_nodes: list[mynode.Node] = []
-            for rule in self.reasoning_rules:
-                rule_result = rule.reason(old_prop_list, curr_prop_list, reason_count)
-                curr_nodes.extend(rule_result)
-            curr_conclusions: list[prop.Proposition] = [i[mynode.CONCLUSION] for i in curr_nodes]
-            new_prop_list: list[prop.Proposition] = []
-            for p in tqdm(curr_conclusions, desc="检查新结论命题是否已存在"):
-                if not p.is_contained(old_prop_list) and not p.is_contained(curr_prop_list) and not p.is_contained(new_prop_list):
-                    new_prop_list.append(p)
-            """
-            with open(Path(config.CURR_SETTING_DIR) / config.GRAPH_FILE, "a", encoding="utf8") as f:
-                for node in curr_nodes:
-                    conditions: str = " && ".join([p.translate(config.CHINESE) for p in node[mynode.CONDITION]])
-                    conclusion: str = node[mynode.CONCLUSION].translate(config.CHINESE)
-                    f.write(f"{conditions} => {conclusion}\n")
-            """
-            if len(new_prop_list) == 0:
+        # 推理闭包中start之后的命题为本次推理的新命题
+        start: int = len(self.closure_props)
+        self._extend_closure(curr_prop_list)
+        if len(self.closure_props) == start:
+            print("新命题都已在推理闭包中，无需推理")
+            return
+        # 10-19修改：按照规则依赖图的强连通分量分层推理，每层推理到不再产生新命题为止，
+        # 每一轮只执行条件类型中出现了新命题的规则
+        for stratum in self._get_rule_strata():
+            seen: int = start
+            while True:
+                # 10-19修改：各条规则共用推理闭包的命题索引，旧命题和新命题以只读视图的形式交给规则
+                old_props: rule.PropIndexView = self._prop_index.view(0, seen)
+                curr_props: rule.PropIndexView = self._prop_index.view(seen)
+                curr_kinds: set[str] = {p.kind for p in self.closure_props[seen:]}
+                active_rules: list[rule.Rule] = [r for r in stratum if not r.input_kinds().isdisjoint(curr_kinds)]
+                if len(active_rules) == 0:
+                    break
+                # 10-19新增：每一轮开始前检查推理预算
+                self.stop_reason = self._check_budget(reason_count, start_time)
+                if self.stop_reason is not None:
+                    break
+                reason_count += 1
+                curr_nodes: list[mynode.Node] = []
+                for r in active_rules:
+                    # 10-19修改：每条规则执行前后都检查推理预算，规则的连接过程中也会在到达停止时刻或得到足够的节点后停止
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        self.stop_reason = MAX_SECONDS
+                        break
+                    # 多得到一个节点即可判断节点数量超过上限
+                    max_results: Optional[int] = None if self.max_nodes is None else max(self.max_nodes - len(self.node_table) - len(curr_nodes), 0) + 1
+                    rule_result: Optional[list[mynode.Node]] = None
+                    # 10-19新增：等价关系的传递规则使用并查集推理
+                    spec = self._get_equivalences().get(id(r)) if self.equivalence_classes else None
+                    if spec is not None:
+                        rule_result = equivalence.reason(r, spec, old_props, curr_props)
+                    # 10-19新增：成对比较规则的结果可以由时间值的两两之差直接求出
+                    elif self.materialise_timeline:
+                        rule_result = timeline.materialise(r, old_props, curr_props)
+                    if rule_result is None:
+                        rule_result = r.reason(old_props, curr_props, reason_count, deadline, max_results)
+                    curr_nodes.extend(rule_result)
+                    if self.max_nodes is not None and len(self.node_table) + len(curr_nodes) > self.max_nodes:
+                        # 只加入不超过节点数量上限的节点，结论命题只来自已加入的节点
+                        curr_nodes = curr_nodes[:self.max_nodes - len(self.node_table)]
+                        self.stop_reason = MAX_NODES
+                        break
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        self.stop_reason = MAX_SECONDS
+                        break
+                """
+                with open(Path(config.CURR_SETTING_DIR) / config.GRAPH_FILE, "a", encoding="utf8") as f:
+                    for node in curr_nodes:
+                        conditions: str = " && ".join([p.translate(config.CHINESE) for p in node[mynode.CONDITION]])
+                        conclusion: str = node[mynode.CONCLUSION].translate(config.CHINESE)
+                        f.write(f"{conditions} => {conclusion}\n")
+                """
                 self.add_nodes(curr_nodes)
-                print("所有新结论命题都已存在，推理结束")
+                # 10-19修改：使用推理闭包中命题的规范键判断新结论命题是否已存在
+                seen = len(self.closure_props)
+                self._extend_closure([n[mynode.CONCLUSION] for n in curr_nodes])
+                if self.stop_reason is not None or len(self.closure_props) == seen:
+                    break
+            if self.stop_reason is not None:
                 break
-            self.add_nodes(curr_nodes)
-            old_prop_list.extend(curr_prop_list)
-            curr_prop_list = new_prop_list
-        print(f"推理结束，共执行{reason_count}次推理，得到{len(self.get_all_props())}个命题，{len(self.nodes)}个节点")
+        merged = int(self.node_table.derivation_counts.sum()) - len(self.node_table)
+        print(f"推理结束，共执行{reason_count}次推理，得到{len(self.prop_table)}个命题，{len(self.nodes)}个节点，合并{merged}个重复节点")
+        BUDGET_STATS["reasons"] += 1
+        if self.stop_reason is not None:
+            BUDGET_STATS["stopped"] += 1
+            BUDGET_STATS[self.stop_reason] += 1
+            BUDGET_STATS["last_stop"] = self.stop_reason
+            print(f"推理预算{self.stop_reason}已耗尽，推理提前停止，推理图只包含已得到的命题和节点")
+        if self.max_derivations is not None:
+            self.keep_shortest_derivations(self.max_derivations)
 
-    def set_node_layers(self, chosen_props: list[prop.Proposition]):
-        """设置节点的层级，本质上是第二轮推理
+    def _check_budget(self, reason_count: int, start_time: float) -> Optional[str]:
+        """检查推理预算是否已经耗尽
 
         Args:
-            chosen_props (list[prop.Proposition]): 选择的命题
+            reason_count (int): 本次推理已经执行的轮数
+            start_time (float): 本次推理开始的时间，由time.perf_counter()得到
+
+        Returns:
+            Optional[str]: 预算耗尽的原因，预算未耗尽时返回None
+        """
+        if self.max_rounds is not None and reason_count >= self.max_rounds:
+            return MAX_ROUNDS
+        if self.max_nodes is not None and len(self.node_table) >= self.max_nodes:
+            return MAX_NODES
+        if self.max_seconds is not None and time.perf_counter() - start_time >= self.max_seconds:
+            return MAX_SECONDS
+        return None
+
+    def keep_shortest_derivations(self, k: int):
+        """每个结论命题只保留推导深度最小的k个节点，推导深度相同时保留条件数量少、较早加入的节点\n
+        推导深度从初始命题和知识命题(深度为0)出发计算，节点的推导深度为其条件的最大深度+1，命题的推导深度为以其为结论的节点的最小深度。
+        删除节点后只保留仍出现在节点中的命题，命题和节点的顺序不变
+
+        Args:
+            k (int): 每个结论命题最多保留的节点数量
+        """
+        t = self.node_table
+        if len(t) == 0:
+            return
+        prop_depths: np.ndarray = np.full(len(self.prop_table), np.inf, dtype=nodetable.LAYER_DTYPE)
+        base_ids = [self.prop_table.find(p) for p in self.init_props + self.knowledge_props]
+        prop_depths[[i for i in base_ids if i >= 0]] = 0
+        while True:
+            node_depths = np.maximum.reduceat(prop_depths[t.premise_ids], t.premise_ptr[:-1]) + 1
+            new_depths = prop_depths.copy()
+            np.minimum.at(new_depths, t.conclusion_ids, node_depths)
+            if np.array_equal(new_depths, prop_depths):
+                break
+            prop_depths = new_depths
+        # 按照(结论命题ID, 推导深度, 条件数量, 节点ID)排序，每个结论命题的前k个节点保留
+        order = np.lexsort((np.arange(len(t)), t.premise_counts(), node_depths, t.conclusion_ids))
+        sorted_conclusions = t.conclusion_ids[order]
+        starts = np.flatnonzero(np.concatenate([[True], sorted_conclusions[1:] != sorted_conclusions[:-1]]))
+        ranks = np.arange(len(t)) - np.repeat(starts, np.diff(np.concatenate([starts, [len(t)]])))
+        node_keep: np.ndarray = np.zeros(len(t), dtype=bool)
+        node_keep[order[ranks < k]] = True
+        if node_keep.all():
+            return
+        used: np.ndarray = np.zeros(len(self.prop_table), dtype=bool)
+        used[t.premise_ids[np.repeat(node_keep, t.premise_counts())]] = True
+        used[t.conclusion_ids[node_keep]] = True
+        self.prop_table, id_map = self.prop_table.select(used)
+        self.node_table = t.select(node_keep, id_map)
+        self._build_node_keys()
+        self._attr_index = None
+        self._conclusion_index = None
+        self._layer_views = OrderedDict()
+        print(f"每个结论命题保留最短的{k}个推导，删除{int((~node_keep).sum())}个节点，剩余{len(self.prop_table)}个命题，{len(self.node_table)}个节点")
+
+    def compact(self, keep_kinds: Sequence[str]):
+        """删除与出题无关的命题和节点，压缩后的推理图不能继续推理或撤回命题\n
+        需要保留的命题为可询问的命题以及keep_kinds中类型的命题(选择已知命题的范围)，其余命题只有在作为需要保留的命题的某个推导的条件时才保留。
+        需要保留的命题的所有推导都会保留，因此这些命题的层级和回溯得到的推理链与压缩前相同；
+        被删除的命题不会出现在层级视图中，最深层级只在保留的命题中计算
+
+        Args:
+            keep_kinds (Sequence[str]): 需要保留的命题类型，如选择已知命题时使用的命题类型
+        """
+        t = self.node_table
+        kinds = set(keep_kinds)
+        needed: np.ndarray = np.fromiter((p.kind in kinds or bool(p[prop.ASKABLE]) for p in self.prop_table.props), dtype=bool, count=len(self.prop_table))
+        node_keep: np.ndarray = np.zeros(len(t), dtype=bool)
+        # 从需要保留的命题出发，沿着节点反向标记条件命题，直到不再有新的命题需要保留
+        while len(t) > 0:
+            node_keep = needed[t.conclusion_ids]
+            premise_needed = needed.copy()
+            premise_needed[t.premise_ids[np.repeat(node_keep, t.premise_counts())]] = True
+            if np.array_equal(premise_needed, needed):
+                break
+            needed = premise_needed
+        used: np.ndarray = np.zeros(len(self.prop_table), dtype=bool)
+        used[t.premise_ids[np.repeat(node_keep, t.premise_counts())]] = True
+        used[t.conclusion_ids[node_keep]] = True
+        removed_nodes, removed_props = int((~node_keep).sum()), int((~used).sum())
+        self.prop_table, id_map = self.prop_table.select(used)
+        self.node_table = t.select(node_keep, id_map)
+        self._build_node_keys()
+        self._attr_index = None
+        self._conclusion_index = None
+        self._layer_views = OrderedDict()
+        self.compacted = True
+        COMPACT_STATS["calls"] += 1
+        COMPACT_STATS["removed_nodes"] += removed_nodes
+        COMPACT_STATS["removed_props"] += removed_props
+        COMPACT_STATS["kept_nodes"] += len(self.node_table)
+        COMPACT_STATS["kept_props"] += len(self.prop_table)
+        print(f"压缩推理图，删除{removed_nodes}个节点，{removed_props}个命题，剩余{len(self.prop_table)}个命题，{len(self.node_table)}个节点")
+
+    def _get_rule_strata(self) -> list[list[rule.Rule]]:
+        """根据规则依赖图将推理规则分层
+
+        规则依赖图中，命题类型指向以其为条件的规则，规则指向其结论的命题类型。
+        依赖图的每个强连通分量为一层，各层按照拓扑顺序排列，层内的规则保持reasoning_rules中的顺序，
+        因此不递归的规则只需在其条件类型都推理完毕后执行一次
+
+        Returns:
+            list[list[rule.Rule]]: 分层后的推理规则
+        """
+        if self._rule_strata is not None:
+            return self._rule_strata
+        dependency = nx.DiGraph()
+        for i, r in enumerate(self.reasoning_rules):
+            dependency.add_node(i)
+            for kind in r.input_kinds():
+                dependency.add_edge(("kind", kind), i)
+            for kind in r.output_kinds():
+                dependency.add_edge(i, ("kind", kind))
+        condensed = nx.condensation(dependency)
+        get_rule_ids = lambda c: sorted(i for i in condensed.nodes[c]["members"] if isinstance(i, int))
+        self._rule_strata = []
+        for component in nx.lexicographical_topological_sort(condensed, key=lambda c: (get_rule_ids(c) or [-1])[0]):
+            rule_ids = get_rule_ids(component)
+            if len(rule_ids) > 0:
+                self._rule_strata.append([self.reasoning_rules[i] for i in rule_ids])
+        return self._rule_strata
+
+    def _get_equivalences(self) -> dict[int, equivalence.EquivalenceSpec]:
+        """获取声明了等价关系的传递规则
+
+        Returns:
+            dict[int, equivalence.EquivalenceSpec]: 传递规则对象的id到等价关系描述的映射
+        """
+        if self._equivalences is None:
+            self._equivalences = equivalence.find_equivalences(self.reasoning_rules)
+        return self._equivalences
+
+    def _extend_closure(self, props: Sequence[prop.Proposition]):
+        """将命题加入推理闭包
+
+        Args:
+            props (Sequence[prop.Proposition]): 命题序列
         """
-        # 重置节点的层级
-        for node in self.nodes:
-            node[mynode.LAYER] = math.inf
-            node[mynode.CONDITION_LAYERS] = [math.inf] * len(node[mynode.CONDITION])
-        # 08-25修改：不再保存与上一层节点相关的命题，不再对两层节点的命题作比较
-        # post_layer_props: list[prop.Proposition] = []
-        curr_layer_props: list[prop.Proposition] = chosen_props + self.knowledge_props
-        next_layer_props: list[prop.Proposition] = []
+        for p in props:
+            if p.key() not in self._closure_keys:
+                self._closure_keys.add(p.key())
+                self.closure_props.append(p)
+                self._prop_index.extend([p])
+
+    def add_init_props(self, props: Sequence[prop.Proposition]):
+        """向推理图中加入初始命题，已有推理闭包时只推理新初始命题带来的结论
+
+        Args:
+            props (Sequence[prop.Proposition]): 初始命题序列
+        """
+        props = list(props)
+        if len(props) == 0:
+            return
+        self.init_props.extend(props)
+        self.reason(props if len(self.closure_props) > 0 else None)
+
+    def add_knowledge_props(self, props: Sequence[prop.Proposition]):
+        """向已完成推理的推理图中加入知识命题，只推理新知识命题带来的结论
+
+        Args:
+            props (Sequence[prop.Proposition]): 知识命题序列
+        """
+        props = list(props)
+        if len(props) == 0:
+            return
+        print("新增知识命题：", *[p.translate(lang=config.CHINESE) for p in props])
+        self.knowledge_props.extend(props)
+        self.reason(props)
+
+    def retract_props(self, props: Sequence[prop.Proposition]):
+        """从初始命题和知识命题中撤回命题，并删除不再能推出的命题和节点
+
+        推理图中保存了推理闭包内所有的推理节点，因此只需从剩余的初始命题和知识命题出发，沿着已有节点重新推导，
+        无法重新推出的命题和条件不全的节点即被删除
+
+        Args:
+            props (Sequence[prop.Proposition]): 需要撤回的命题
+        """
+        assert not self.compacted, "推理图已经压缩，不能撤回命题"
+        retracted_keys = {p.key() for p in props}
+        self.init_props = [p for p in self.init_props if p.key() not in retracted_keys]
+        self.knowledge_props = [p for p in self.knowledge_props if p.key() not in retracted_keys]
+        node_alive = self._keep_derivable(self.init_props + self.knowledge_props)
+        print(f"撤回{len(retracted_keys)}个命题，删除{int((~node_alive).sum())}个节点，剩余{len(self.prop_table)}个命题，{len(self.node_table)}个节点")
+
+    def _keep_derivable(self, base_props: Sequence[prop.Proposition]) -> np.ndarray:
+        """从基础命题出发沿着已有节点重新推导，只保留能够推出的命题和条件都能推出的节点
+
+        Args:
+            base_props (Sequence[prop.Proposition]): 基础命题，即初始命题和知识命题
+
+        Returns:
+            np.ndarray: 与原节点ID一一对应的布尔数组，表示节点是否保留
+        """
+        t = self.node_table
+        alive: np.ndarray = np.zeros(len(self.prop_table), dtype=bool)
+        base_ids = [self.prop_table.find(p) for p in base_props]
+        alive[[i for i in base_ids if i >= 0]] = True
+        node_alive: np.ndarray = np.zeros(len(t), dtype=bool)
+        while len(t) > 0:
+            node_alive = np.logical_and.reduceat(alive[t.premise_ids], t.premise_ptr[:-1])
+            rederived = node_alive & ~alive[t.conclusion_ids]
+            if not rederived.any():
+                break
+            alive[t.conclusion_ids[rederived]] = True
+        # 只保留仍出现在节点中的命题，与重新推理得到的推理图一致
+        used: np.ndarray = np.zeros(len(self.prop_table), dtype=bool)
+        used[t.premise_ids[np.repeat(node_alive, t.premise_counts())]] = True
+        used[t.conclusion_ids[node_alive]] = True
+        base_keys = {p.key() for p in base_props}
+        self.closure_props = [p for p in self.closure_props if p.key() in base_keys or (p in self.prop_table and alive[self.prop_table.find(p)])]
+        self._closure_keys = {p.key() for p in self.closure_props}
+        self._prop_index = rule.PropIndex(self.closure_props)
+        self.prop_table, id_map = self.prop_table.select(used)
+        self.node_table = t.select(node_alive, id_map)
+        self._build_node_keys()
+        self._attr_index = None
+        self._conclusion_index = None
+        self._layer_views = OrderedDict()
+        self.deepest_layer = -1
+        self.layer_view = None
+        return node_alive
+
+    def project(self, init_props: Sequence[prop.Proposition], knowledge_props: Sequence[prop.Proposition]) -> "ReasoningGraph":
+        """将推理图投影到初始命题和知识命题的子集上，得到以子集为基础命题的推理图\n
+        推理规则是单调的，子集的推理闭包包含于当前推理闭包，因此子集推理得到的节点都已在推理图中，
+        从子集出发沿着已有节点重新推导即可得到与重新推理相同的命题和节点集合，不需要执行推理规则
+
+        Args:
+            init_props (Sequence[prop.Proposition]): 新的初始命题，需要都在当前推理闭包中
+            knowledge_props (Sequence[prop.Proposition]): 新的知识命题，需要都在当前推理闭包中
+
+        Returns:
+            ReasoningGraph: 投影得到的推理图，命题和规则对象与原推理图共用
+        """
+        assert self.max_derivations is None and not self.equivalence_classes and not self.compacted, "推理图只保留了部分推导，不能投影"
+        assert all(p.key() in self._closure_keys for p in list(init_props) + list(knowledge_props)), "投影的命题需要都在推理闭包中"
+        graph = copy.copy(self)
+        graph.init_props = list(init_props)
+        graph.knowledge_props = list(knowledge_props)
+        graph.reasoning_rules = list(self.reasoning_rules)
+        graph._rule_strata = None
+        graph._equivalences = None
+        node_alive = graph._keep_derivable(graph.init_props + graph.knowledge_props)
+        print(f"投影推理图，保留{int(node_alive.sum())}个节点，共{len(graph.prop_table)}个命题")
+        return graph
+
+    def rebase(self, init_props: Sequence[prop.Proposition], knowledge_props: Sequence[prop.Proposition]):
+        """将推理图的初始命题和知识命题替换为新的命题，先撤回不再使用的命题，再增量推理新加入的命题
+
+        Args:
+            init_props (Sequence[prop.Proposition]): 新的初始命题
+            knowledge_props (Sequence[prop.Proposition]): 新的知识命题
+        """
+        old_keys = {p.key() for p in self.init_props + self.knowledge_props}
+        new_keys = {p.key() for p in list(init_props) + list(knowledge_props)}
+        removed = [p for p in self.init_props + self.knowledge_props if p.key() not in new_keys]
+        added = [p for p in list(init_props) + list(knowledge_props) if p.key() not in old_keys]
+        if len(removed) > 0 and (self.max_derivations is not None or self.stop_reason is not None):
+            # 只保留最短推导或推理预算耗尽时节点不完整，无法沿着已有节点撤回命题，需要重新推理
+            self._clear()
+        elif len(removed) > 0:
+            self.retract_props(removed)
+        self.init_props = list(init_props)
+        self.knowledge_props = list(knowledge_props)
+        self.deepest_layer = -1
+        self.layer_view = None
+        print(f"更新推理图，撤回{len(removed)}个命题，新增{len(added)}个命题")
+        if len(self.closure_props) == 0:
+            self.reason()
+        elif len(added) > 0:
+            self.reason(added)
+
+    def _clear(self):
+        """清空推理图中的节点、命题和推理闭包，保留初始命题、知识命题和推理规则
+        """
+        self.prop_table = nodetable.PropTable()
+        self.node_table = nodetable.NodeTable()
+        self._node_keys = {}
+        self.closure_props = []
+        self._closure_keys = set()
+        self._prop_index = rule.PropIndex()
+        self._attr_index = None
+        self._conclusion_index = None
+        self._layer_views = OrderedDict()
+        self.deepest_layer = -1
+        self.layer_view = None
+        self.stop_reason = None
+
+    def compute_layers(self, chosen_props: Sequence[prop.Proposition]) -> LayerView:
+        """计算以chosen_props和知识命题为已知命题时的层级，本质上是第二轮推理，不修改推理图\n
+        结果按照已知命题集合缓存，已知命题集合相同时直接返回缓存的层级视图
+
+        Args:
+            chosen_props (Sequence[prop.Proposition]): 选择的命题
+
+        Returns:
+            LayerView: 层级视图
+        """
+        key = frozenset(p.key() for p in list(chosen_props) + self.knowledge_props)
+        view = self._layer_views.get(key)
+        if view is not None:
+            self._layer_views.move_to_end(key)
+            LAYER_VIEW_STATS["reused"] += 1
+            return view
+        # 10-19修改：在节点表上按层整体计算，命题的层级为1(已知命题)或以其为结论的节点的最小层级+1，节点的层级为其条件层级的最大值
+        t = self.node_table
+        assert len(t) == 0 or t.premise_counts().min() > 0, "推理图中存在没有条件的节点"
+        prop_layers: np.ndarray = np.full(len(self.prop_table), np.inf, dtype=nodetable.LAYER_DTYPE)
+        known_ids = [self.prop_table.find(p) for p in list(chosen_props) + self.knowledge_props]
+        prop_layers[[i for i in known_ids if i >= 0]] = 1
+        node_layers: np.ndarray = np.full(len(t), np.inf, dtype=nodetable.LAYER_DTYPE)
         layer: int = 0
         while True:
             layer += 1
-            for node in tqdm([x for x in self.nodes if x[mynode.LAYER] > layer], desc=f"设置第{layer}层节点"):
-                # 08-25修改：set_layer函数不再提供返回
-                # conclusion = node.set_layer(layer, curr_layer_props)
-                node.set_layer(layer, curr_layer_props)
-                # 08-25修改：不再对两层节点的命题作比较，以提高运行效率
-                '''
-                if conclusion and (not conclusion.is_contained(post_layer_props)) and (not conclusion.is_contained(curr_layer_props)) and (not conclusion.is_contained(next_layer_props)):
-                    next_layer_props.append(conclusion)
-                '''
-                # 08-25修改：改为直接取当前层节点的结论命题进入下一步
-                if node[mynode.LAYER] == layer:
-                    next_layer_props.append(node[mynode.CONCLUSION])
-            print(f"第{layer}层节点设置完毕，已经设置{len(next_layer_props)}个结论命题")
-            if len(next_layer_props) == 0:
-                self.deepest_layer = layer if any([n for n in self.nodes if n[mynode.LAYER] == layer]) else layer - 1
-                print(f"设置层级结束，共设置{self.deepest_layer}层")
+            if len(t) > 0:
+                node_layers = np.maximum.reduceat(prop_layers[t.premise_ids], t.premise_ptr[:-1])
+            curr_layer_nodes: np.ndarray = node_layers == layer
+            # 当前层节点的结论命题进入下一层
+            np.minimum.at(prop_layers, t.conclusion_ids[curr_layer_nodes], layer + 1)
+            next_layer_num = int(curr_layer_nodes.sum())
+            print(f"第{layer}层节点设置完毕，已经设置{next_layer_num}个结论命题")
+            if next_layer_num == 0:
+                deepest_layer = layer - 1
+                print(f"设置层级结束，共设置{deepest_layer}层")
                 break
-            # 08-25修改：不再保存与上一层节点相关的命题
-            # post_layer_props = curr_layer_props
-            curr_layer_props = next_layer_props
-            next_layer_props = []
+        reachable_ids = nodetable.first_occurrence(t.prop_sequence(np.flatnonzero(node_layers <= deepest_layer)))
+        view = LayerView(key, node_layers.astype(nodetable.LAYER_DTYPE), prop_layers[t.premise_ids], prop_layers, deepest_layer, reachable_ids)
+        LAYER_VIEW_STATS["computed"] += 1
+        self._layer_views[key] = view
+        if len(self._layer_views) > config.LAYER_VIEW_CACHE_SIZE:
+            self._layer_views.popitem(last=False)
+        return view
+
+    def set_node_layers(self, chosen_props: list[prop.Proposition]) -> LayerView:
+        """设置节点的层级，本质上是第二轮推理\n
+        10-19修改：层级由compute_layers()计算，得到的层级视图作为推理图当前的层级视图，并写回节点表，
+        以便通过节点视图和导出文件读取层级
+
+        Args:
+            chosen_props (list[prop.Proposition]): 选择的命题
+
+        Returns:
+            LayerView: 层级视图
+        """
+        view = self.compute_layers(chosen_props)
+        t = self.node_table
+        t.layers = view.layers.copy()
+        t.condition_layers = view.condition_layers.copy()
+        self.deepest_layer = view.deepest_layer
+        self.layer_view = view
+        return view
+
+    def _get_layer_view(self, view: Optional[LayerView]) -> LayerView:
+        """获取查询使用的层级视图，未指定时使用推理图当前的层级视图
+
+        Args:
+            view (Optional[LayerView]): 指定的层级视图
 
-    def get_deepest_conclusions(self, use_askable: bool = False) -> list[prop.Proposition]:
+        Returns:
+            LayerView: 层级视图
+        """
+        if view is None:
+            view = self.layer_view
+        assert view is not None, "尚未进行二次推理"
+        assert len(view.layers) == len(self.node_table), "层级视图与推理图不一致"
+        return view
+
+    def get_deepest_conclusions(self, use_askable: bool = False, view: Optional[LayerView] = None) -> list[prop.Proposition]:
         """获取最深层次推理图节点的结论命题
 
         Args:
             use_askable (bool, optional): 是否只获取可询问的命题. 默认为False.
+            view (Optional[LayerView], optional): 层级视图，为None时使用推理图当前的层级视图. 默认为None.
 
         Returns:
             list[prop.Proposition]: 最深层次推理图节点的结论命题
         """
-        assert self.deepest_layer >= 0, "尚未进行二次推理"
-        conclusion_list: list[prop.Proposition] = []
-        for node in (n for n in self.nodes if n[mynode.LAYER] == self.deepest_layer):
-            node_conclusion: prop.Proposition = node[mynode.CONCLUSION]
-            if not node_conclusion.is_contained(conclusion_list):
-                conclusion_list.append(node_conclusion)
-        if use_askable:
-            conclusion_list = [p for p in conclusion_list if p[prop.ASKABLE]]
-        return conclusion_list
+        view = self._get_layer_view(view)
+        t = self.node_table
+        return self._to_props(nodetable.first_occurrence(t.conclusion_ids[view.layers == view.deepest_layer]), use_askable)
 
-    def get_reachable_props(self, use_askable: bool = False) -> list[prop.Proposition]:
+    def get_reachable_props(self, use_askable: bool = False, view: Optional[LayerView] = None) -> list[prop.Proposition]:
         """获取推理图中经过第二次推理后所有可达的命题
 
         Args:
             use_askable (bool, optional): 是否只获取可询问的命题. 默认为False
+            view (Optional[LayerView], optional): 层级视图，为None时使用推理图当前的层级视图. 默认为None.
 
         Returns:
             list[prop.Proposition]: 可达的命题
         """
-        all_props: list[prop.Proposition] = []
-        for node in filter(lambda x: x[mynode.LAYER] <= self.deepest_layer, self.nodes):
-            condition: list[prop.Proposition] = node[mynode.CONDITION]
-            conclusion: prop.Proposition = node[mynode.CONCLUSION]
-            for p in condition:
-                if not p.is_contained(all_props):
-                    all_props.append(p)
-            if not conclusion.is_contained(all_props):
-                all_props.append(conclusion)
-        if use_askable:
-            all_props = [p for p in all_props if p[prop.ASKABLE]]
-        return all_props
+        return self._to_props(self._get_layer_view(view).reachable_ids, use_askable)
 
-    def backtrace(self, curr_prop: prop.Proposition) -> list[mynode.Node]:
+    def backtrace(self, curr_prop: prop.Proposition, view: Optional[LayerView] = None) -> list[mynode.NodeView]:
         """回溯推理图，获取命题的推理路径
 
         Args:
             curr_prop (prop.Proposition): 当前命题
+            view (Optional[LayerView], optional): 层级视图，为None时使用推理图当前的层级视图. 默认为None.
+
+        Returns:
+            list[mynode.NodeView]: 推理路径
+        """
+        view = self._get_layer_view(view)
+        pid = self.prop_table.find(curr_prop)
+        # 如果命题不在推理图中，返回空列表
+        if pid < 0:
+            return []
+        return [mynode.NodeView(self.node_table, self.prop_table, i) for i in self._backtrace_ids(pid, view)]
+
+    def _backtrace_ids(self, pid: int, view: LayerView) -> list[int]:
+        """回溯推理图，获取命题ID对应的推理路径中的节点ID
+
+        Args:
+            pid (int): 命题ID
+            view (LayerView): 层级视图
 
         Returns:
-            list[mynode.Node]: 推理路径
+            list[int]: 推理路径中的节点ID
         """
-        assert self.deepest_layer >= 0, "尚未进行二次推理"
-        # 获得以curr_prop为结论的节点
-        curr_nodes: list[mynode.Node] = [n for n in self.nodes if n[mynode.CONCLUSION] == curr_prop]
+        t = self.node_table
+        if self._conclusion_index is None:
+            order = np.argsort(t.conclusion_ids, kind="stable")
+            self._conclusion_index = (order, t.conclusion_ids[order])
+        order, sorted_conclusions = self._conclusion_index
+        # 获得以pid为结论的节点，保持节点原有的顺序
+        curr_nodes = order[np.searchsorted(sorted_conclusions, pid, "left"):np.searchsorted(sorted_conclusions, pid, "right")]
         # 如果没有找到节点，返回空列表
         if len(curr_nodes) == 0:
             return []
-        # 对curr_nodes按照节点层级进行排序，同层节点按照条件数量排序
-        curr_nodes.sort(key=lambda x: (x[mynode.LAYER], len(x[mynode.CONDITION])))
-        pre_step = curr_nodes[0] # 选择第一个节点作为前一步
-        # 递归回溯
-        pre_trace: list[mynode.Node] = [] # 前一步的推理路径
+        # 按照节点层级选择节点，同层节点按照条件数量选择，均相同时选择最早的节点
+        pre_step = int(curr_nodes[np.lexsort((t.premise_ptr[curr_nodes + 1] - t.premise_ptr[curr_nodes], view.layers[curr_nodes]))[0]])
         # 08-23新增：如果pre_step的层数为inf, 则直接返回推理路径
-        if pre_step[mynode.LAYER] == math.inf:
+        if view.layers[pre_step] == math.inf:
             return [pre_step]
-        for condition, clayer in zip(pre_step[mynode.CONDITION], pre_step[mynode.CONDITION_LAYERS]):
+        # 递归回溯
+        pre_trace: list[int] = [] # 前一步的推理路径
+        start, end = t.premise_ptr[pre_step], t.premise_ptr[pre_step + 1]
+        for condition, clayer in zip(t.premise_ids[start:end], view.condition_layers[start:end]):
             # 如果条件的层级为1，不再回溯
             if clayer == 1:
                 continue
-            pre_trace.extend(self.backtrace(condition))
+            pre_trace.extend(self._backtrace_ids(int(condition), view))
         pre_trace.append(pre_step)
-        return pre_trace
\ No newline at end of file
+        return pre_trace
@@ -0,0 +1,224 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""推理图的二进制导出与只读分析\n
+导出文件的格式(版本2，所有整数均为小端序)：\n
+- 0-7字节：魔数b"AQGRAPH\\0"
+- 8-11字节：uint32，格式版本号
+- 12-15字节：uint32，头部JSON的字节数
+- 16字节起：utf8编码的头部JSON，记录节点数量、命题数量、最深层级、规则名称、命题类型名称，以及每个数组的dtype、shape和在文件中的偏移量
+- 头部之后：按照ARRAY_ALIGN字节对齐依次存放各个数组，可以直接用numpy.memmap打开\n
+数组与节点表一致：premise_ptr、premise_ids(CSR格式的条件命题ID)、conclusion_ids、rule_ids、layers、condition_layers、derivation_counts；
+命题表保存为prop_text_ptr、prop_text(命题规范键的utf8文本)、prop_kind_ids和prop_askable
+"""
+
+import graph as mygraph
+import proposition as prop
+import numpy as np
+import json
+import struct
+import argparse
+from pathlib import Path
+from typing import Any
+
+MAGIC = b"AQGRAPH\0"
+"""导出文件的魔数"""
+VERSION = 2
+"""导出文件的格式版本号"""
+ARRAY_ALIGN = 64
+"""数组在文件中的对齐字节数"""
+_PREFIX = struct.Struct("<8sII")
+
+def _align(offset: int) -> int:
+    return (offset + ARRAY_ALIGN - 1) // ARRAY_ALIGN * ARRAY_ALIGN
+
+def dump_graph(graph: mygraph.ReasoningGraph, path: str | Path):
+    """将推理图的命题表和节点表导出为二进制文件
+
+    Args:
+        graph (mygraph.ReasoningGraph): 推理图
+        path (str | Path): 导出文件路径
+    """
+    t = graph.node_table
+    props: list[prop.Proposition] = graph.prop_table.props
+    kinds: list[str] = list(dict.fromkeys(p.kind for p in props))
+    kind_ids = {k: i for i, k in enumerate(kinds)}
+    texts = [repr(p.key()).encode("utf8") for p in props]
+    arrays: dict[str, np.ndarray] = {
+        "premise_ptr": t.premise_ptr,
+        "premise_ids": t.premise_ids,
+        "conclusion_ids": t.conclusion_ids,
+        "rule_ids": t.rule_ids,
+        "layers": t.layers,
+        "condition_layers": t.condition_layers,
+        "derivation_counts": t.derivation_counts,
+        "prop_text_ptr": np.concatenate([[0], np.cumsum([len(s) for s in texts], dtype=np.int64)]).astype(np.int64),
+        "prop_text": np.frombuffer(b"".join(texts), dtype=np.uint8),
+        "prop_kind_ids": np.asarray([kind_ids[p.kind] for p in props], dtype=np.int32),
+        "prop_askable": np.asarray([bool(p[prop.ASKABLE]) for p in props], dtype=np.uint8),
+    }
+    arrays = {name: np.ascontiguousarray(a, dtype=a.dtype.newbyteorder("<")) for name, a in arrays.items()}
+    header: dict[str, Any] = {
+        "node_num": len(t),
+        "prop_num": len(props),
+        "deepest_layer": graph.deepest_layer,
+        "rules": [getattr(r, "name", str(r)) for r in t.rules],
+        "kinds": kinds,
+        "arrays": {},
+    }
+    # 头部长度会影响数组的偏移量，先估计头部长度，再根据实际长度确定偏移量
+    header_len = 0
+    while True:
+        offset = _align(_PREFIX.size + header_len)
+        for name, a in arrays.items():
+            header["arrays"][name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+            offset = _align(offset + a.nbytes)
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf8")
+        if len(header_bytes) <= header_len:
+            break
+        header_len = len(header_bytes) + ARRAY_ALIGN
+    header_bytes = header_bytes.ljust(header_len, b" ")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, VERSION, header_len))
+        f.write(header_bytes)
+        for name, a in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(a.tobytes())
+        f.truncate(offset)
+    print(f"推理图已导出至{path}，共{len(props)}个命题，{len(t)}个节点")
+
+class GraphDump:
+    """推理图导出文件的只读视图，数组通过numpy.memmap按需读取，不会构造命题对象
+    """
+    def __init__(self, path: str | Path):
+        """打开推理图导出文件
+
+        Args:
+            path (str | Path): 导出文件路径
+
+        Raises:
+            ValueError: 文件格式或版本不支持
+        """
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path}不是推理图导出文件")
+            if version != VERSION:
+                raise ValueError(f"不支持的推理图导出文件版本{version}，当前版本为{VERSION}")
+            self.header: dict[str, Any] = json.loads(f.read(header_len).decode("utf8"))
+            """导出文件的头部信息"""
+        self.rules: list[str] = self.header["rules"]
+        """按照规则ID排列的规则名称"""
+        self.kinds: list[str] = self.header["kinds"]
+        """按照类型ID排列的命题类型"""
+        self.arrays: dict[str, np.ndarray] = {}
+        """导出文件中的数组"""
+        for name, info in self.header["arrays"].items():
+            shape = tuple(info["shape"])
+            if int(np.prod(shape)) == 0:
+                self.arrays[name] = np.empty(shape, dtype=info["dtype"])
+            else:
+                self.arrays[name] = np.memmap(self.path, dtype=info["dtype"], mode="r", offset=info["offset"], shape=shape)
+        self.premise_ptr: np.ndarray = self.arrays["premise_ptr"]
+        self.premise_ids: np.ndarray = self.arrays["premise_ids"]
+        self.conclusion_ids: np.ndarray = self.arrays["conclusion_ids"]
+        self.rule_ids: np.ndarray = self.arrays["rule_ids"]
+        self.layers: np.ndarray = self.arrays["layers"]
+        self.condition_layers: np.ndarray = self.arrays["condition_layers"]
+        self.derivation_counts: np.ndarray = self.arrays["derivation_counts"]
+
+    def __len__(self) -> int:
+        return self.header["node_num"]
+
+    @property
+    def prop_num(self) -> int:
+        """命题数量"""
+        return self.header["prop_num"]
+
+    def prop_text(self, pid: int) -> str:
+        """获取命题的规范键文本
+
+        Args:
+            pid (int): 命题ID
+
+        Returns:
+            str: 命题的规范键文本
+        """
+        start, end = self.arrays["prop_text_ptr"][pid], self.arrays["prop_text_ptr"][pid + 1]
+        return bytes(self.arrays["prop_text"][start:end]).decode("utf8")
+
+    def find_props(self, text: str) -> list[int]:
+        """查找规范键文本中包含text的命题
+
+        Args:
+            text (str): 需要查找的文本
+
+        Returns:
+            list[int]: 命题ID
+        """
+        return [pid for pid in range(self.prop_num) if text in self.prop_text(pid)]
+
+    def premises_of(self, node_id: int) -> np.ndarray:
+        """获取节点的条件命题ID
+
+        Args:
+            node_id (int): 节点ID
+
+        Returns:
+            np.ndarray: 条件命题ID
+        """
+        return self.premise_ids[self.premise_ptr[node_id]:self.premise_ptr[node_id + 1]]
+
+    def derivers(self, pid: int) -> np.ndarray:
+        """获取以命题为结论的所有节点
+
+        Args:
+            pid (int): 命题ID
+
+        Returns:
+            np.ndarray: 节点ID
+        """
+        return np.flatnonzero(self.conclusion_ids == pid)
+
+    def depth_histogram(self) -> dict[float, int]:
+        """统计每个层级的节点数量，未到达的节点层级为inf
+
+        Returns:
+            dict[float, int]: 层级到节点数量的映射
+        """
+        layers, counts = np.unique(self.layers, return_counts=True)
+        return {float(l): int(c) for l, c in zip(layers, counts)}
+
+    def rule_fan_out(self) -> dict[str, int]:
+        """统计每条推理规则得到的节点数量
+
+        Returns:
+            dict[str, int]: 规则名称到节点数量的映射
+        """
+        counts = np.bincount(self.rule_ids, minlength=len(self.rules))
+        return {name: int(c) for name, c in zip(self.rules, counts)}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="推理图导出文件分析")
+    parser.add_argument("path", type=str, help="推理图导出文件路径")
+    parser.add_argument("--derive", type=str, help="查询推导出规范键中包含该文本的命题的节点", default=None)
+    parser.add_argument("--depth", action="store_true", help="输出层级直方图")
+    parser.add_argument("--fanout", action="store_true", help="输出每条推理规则得到的节点数量")
+    args = parser.parse_args()
+    dump = GraphDump(args.path)
+    print(f"{dump.path}：{dump.prop_num}个命题，{len(dump)}个节点，最深层级为{dump.header['deepest_layer']}")
+    if args.derive is not None:
+        for pid in dump.find_props(args.derive):
+            print(f"命题{pid} {dump.prop_text(pid)}")
+            for node_id in dump.derivers(pid):
+                premises = ", ".join(str(i) for i in dump.premises_of(node_id))
+                print(f"  节点{node_id}：规则{dump.rules[dump.rule_ids[node_id]]}，层级{dump.layers[node_id]}，推出{dump.derivation_counts[node_id]}次，条件[{premises}]")
+    if args.depth:
+        for layer, count in dump.depth_histogram().items():
+            print(f"第{layer}层：{count}个节点")
+    if args.fanout:
+        for name, count in sorted(dump.rule_fan_out().items(), key=lambda x: -x[1]):
+            print(f"{name}：{count}个节点")
@@ -0,0 +1,36 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""运行过程中的统计信息，各模块注册统计函数，程序结束时统一输出
+"""
+
+from collections.abc import Callable
+from typing import Any
+
+SOURCES: dict[str, Callable[[], dict[str, Any]]] = {}
+"""已注册的统计来源，键为名称，值为返回统计信息字典的函数"""
+
+def register(name: str, source: Callable[[], dict[str, Any]]):
+    """注册统计来源
+
+    Args:
+        name (str): 统计来源的名称
+        source (Callable[[], dict[str, Any]]): 返回统计信息字典的函数
+    """
+    SOURCES[name] = source
+
+def collect() -> dict[str, dict[str, Any]]:
+    """收集所有统计来源的统计信息
+
+    Returns:
+        dict[str, dict[str, Any]]: 统计来源名称到统计信息的映射
+    """
+    return {name: source() for name, source in SOURCES.items()}
+
+def report():
+    """输出所有统计来源的统计信息
+    """
+    print("运行统计：")
+    for name, stats in collect().items():
+        items = "，".join(f"{k}: {v:.2%}" if isinstance(v, float) else f"{k}: {v}" for k, v in stats.items())
+        print(f"  {name}: {items}")
@@ -31,6 +31,16 @@ ANSWER = "answer"
 COT_LENGTH = "cot_length"
 """获得提问命题的推理链长度"""
 
+def get_choose_kinds() -> list[str]:
+    """获取选择已知命题时使用的命题类型
+
+    Returns:
+        list[str]: 命题类型，按照在选择规则文件中第一次出现的顺序排列
+    """
+    with open(config.PROP_CHOOSE_RULE_FILE, "r", encoding = "utf8") as f:
+        choose_rule: dict[str, list[dict[str, str]]] = json5.load(f)[CHOOSE_RULE]
+    return list(dict.fromkeys(rule["kind"] for rules in choose_rule.values() for rule in rules))
+
 class PropChooseMachine:
     """时间推理题已知命题选择器
     """
@@ -43,7 +53,6 @@ class PropChooseMachine:
         """
         self.sorted_events = sorted_events
         self.graph = g
-        self.all_props = self.graph.get_all_props()
         self.choose_rule: dict[str, list[dict[str, str]]] = {}
         with open(config.PROP_CHOOSE_RULE_FILE, "r", encoding = "utf8") as f:
             self.choose_rule = json5.load(f)[CHOOSE_RULE]
@@ -64,9 +73,13 @@ class PropChooseMachine:
         if e.kind not in self.choose_rule:
             raise ValueError(f"输入的事件具有未知的类型：{e.kind}")
         for rule in self.choose_rule[e.kind]:
-            temp_props = list(filter(lambda x: x.kind == rule["kind"], self.all_props))
-            temp_props = list(filter(lambda x: e == x[rule["attr"]], temp_props))
-            candidate_props.extend(temp_props)
+            # 通过推理图的命题属性索引直接获取候选命题
+            candidate_props.extend(self.graph.get_props_by_attr(rule["kind"], rule["attr"], e))
+            # 10-19新增：目标导向推理时，没有被任何规则使用的初始命题不在推理图中，仍然可以作为已知命题
+            candidate_props.extend(p for p in self.graph.init_props if p.kind == rule["kind"] and rule["attr"] in p.attrs and element.element_key(p[rule["attr"]]) == element.element_key(e) and self.graph.prop_table.find(p) < 0)
+        if len(candidate_props) == 0:
+            # 推理预算耗尽时，推理图中可能没有表示这一事件的命题
+            raise ValueError(f"推理图中没有可以表示事件{e.translate(config.CHINESE)}的命题")
         chosen_prop = random.choice(candidate_props)
         return chosen_prop
 
@@ -112,18 +125,50 @@ class PropChooseMachine:
 class OptionGenerator:
     """选项生成器
     """
-    def __init__(self, g: graph.ReasoningGraph):
+    def __init__(self, g: graph.ReasoningGraph, view: Optional[graph.LayerView] = None):
         """初始化选项生成器
 
         Args:
             g (graph.ReasoningGraph): 推理图
+            view (Optional[graph.LayerView], optional): 层级视图，为None时使用推理图当前的层级视图. 默认为None.
         """
         self.graph = g
         """推理图"""
-        self.reachable_props = g.get_reachable_props()
+        self.reachable_props = g.get_reachable_props(view=view)
         """选项选取时可达的命题"""
         self.attr_range: dict[str, dict[str, list[element.Element]]] = defaultdict(dict)
         """不同命题类型、不同属性值的可选值域范围"""
+        self.fact_index: dict[tuple, set] = defaultdict(set)
+        """可达命题的事实索引，键为(命题类型, 空缺属性, 其余主要属性的规范键)，值为空缺属性所有成立取值的规范键"""
+        self.attr_values: dict[str, dict[str, list[element.Element]]] = defaultdict(lambda: defaultdict(list))
+        """可达命题中不同命题类型、不同属性出现过的取值，保持首次出现的顺序"""
+        self._build_fact_index()
+
+    @staticmethod
+    def _fact_key(p: prop.Proposition, slot: str) -> tuple:
+        """获取命题在事实索引中的键
+
+        Args:
+            p (prop.Proposition): 命题
+            slot (str): 空缺的属性
+
+        Returns:
+            tuple: (命题类型, 空缺属性, 其余主要属性的规范键)
+        """
+        rest = tuple(sorted((a, element.element_key(p[a])) for a in p.main_attrs() if a != slot))
+        return (p.kind, slot, rest)
+
+    def _build_fact_index(self):
+        """根据可达命题建立事实索引和属性取值表
+        """
+        seen_values: set[tuple] = set()
+        for p in self.reachable_props:
+            for attr in p.main_attrs():
+                value_key = element.element_key(p[attr])
+                self.fact_index[self._fact_key(p, attr)].add(value_key)
+                if (p.kind, attr, value_key) not in seen_values:
+                    seen_values.add((p.kind, attr, value_key))
+                    self.attr_values[p.kind][attr].append(p[attr])
 
     def set_attr_range(self, prop_kind: str, attr: str, attr_range: list[element.Element]):
         """设置属性值的可选值域范围
@@ -135,6 +180,58 @@ class OptionGenerator:
         """
         self.attr_range[prop_kind][attr] = attr_range
 
+    def get_true_values(self, asked_prop: prop.Proposition, ask_attr: str) -> set:
+        """查询事实索引，获得使命题成立的属性取值
+
+        Args:
+            asked_prop (prop.Proposition): 被询问的命题
+            ask_attr (str): 被询问的属性
+
+        Returns:
+            set: 被询问属性所有成立取值的规范键
+        """
+        return self.fact_index.get(self._fact_key(asked_prop, ask_attr), set())
+
+    def _get_attr_range(self, asked_prop: prop.Proposition, ask_attr: str) -> list[element.Element]:
+        """获取被询问属性的候选取值，已排除命题中出现过的属性值
+
+        Args:
+            asked_prop (prop.Proposition): 被询问的命题
+            ask_attr (str): 被询问的属性
+
+        Returns:
+            list[element.Element]: 候选取值列表
+        """
+        ask_kind = asked_prop.kind
+        if ask_kind in self.attr_range and ask_attr in self.attr_range[ask_kind]:
+            temp_range = self.attr_range[ask_kind][ask_attr]
+        else:
+            temp_range: list[element.Element] = self.attr_values[ask_kind][ask_attr]
+        # 06-20修改：需要排除的是命题中所有已经出现过的属性值
+        existed_keys = {element.element_key(i) for i in asked_prop.all_attr_elements()}
+        return [i for i in temp_range if element.element_key(i) not in existed_keys] # 需要排除被提问的命题中已有的属性值
+
+    def can_supply(self, asked_prop: prop.Proposition, ask_attr: str, num: int = 1, correct_num: Optional[int] = None) -> bool:
+        """判断命题的某个属性能否提供足够的选项，判断条件与get_element_options()一致
+
+        Args:
+            asked_prop (prop.Proposition): 被询问的命题
+            ask_attr (str): 被询问的属性
+            num (int, optional): 选择的元素数量. 默认为1.
+            correct_num (Optional[int], optional): 正确元素的数量. 默认为None(此时不指定元素的正确性).
+
+        Returns:
+            bool: 能否提供足够的选项
+        """
+        temp_range = self._get_attr_range(asked_prop, ask_attr)
+        if len(temp_range) < num:
+            return False
+        if correct_num is None:
+            return True
+        true_values = self.get_true_values(asked_prop, ask_attr)
+        true_count = sum(1 for i in temp_range if element.element_key(i) in true_values)
+        return true_count >= correct_num and len(temp_range) - true_count >= num - correct_num
+
     def get_element_options(self, asked_prop: prop.Proposition, ask_attr: str, num: int = 1, correct_num: Optional[int] = None, **kwargs) -> list[tuple[element.Element, bool]]:
         """从命题和属性的可选值域范围中选择一定量的元素
 
@@ -150,38 +247,22 @@ class OptionGenerator:
         Returns:
             list[tuple[element.Element, bool]]: 选择的元素列表，以及这些元素对应的正确性
         """
-        ask_kind = asked_prop.kind
-        if ask_kind in self.attr_range and ask_attr in self.attr_range[ask_kind]:
-            temp_range = self.attr_range[ask_kind][ask_attr]
-        else:
-            temp_range: list[element.Element] = []
-            for p in filter(lambda x: x.kind == ask_kind, self.reachable_props):
-                temp_element: element.Element = p[ask_attr]
-                if not temp_element.is_contained(temp_range):
-                    temp_range.append(temp_element)
-        # 06-20修改：需要排除的是命题中所有已经出现过的属性值
-        temp_range = [i for i in temp_range if not i.is_contained(asked_prop.all_attr_elements())] # 需要排除被提问的命题中已有的属性值
+        temp_range = self._get_attr_range(asked_prop, ask_attr)
         if len(temp_range) < num:
             raise ValueError(f"可选值域范围不足，只有{len(temp_range)}个元素，少于{num}个")
+        # 通过事实索引判断元素的正确性，不再复制命题并逐一比较
+        true_values = self.get_true_values(asked_prop, ask_attr)
         res_list: list[tuple[element.Element, bool]] = []
         if correct_num is None:
             samples = random.sample(temp_range, num)
             for s in samples:
-                new_prop = copy.deepcopy(asked_prop)
-                new_prop[ask_attr] = s
-                res_list.append((s, new_prop.is_contained(self.reachable_props)))
+                res_list.append((s, element.element_key(s) in true_values))
         else:
             assert correct_num <= num, f"正确元素数量{correct_num}大于总元素数量{num}"
-            # 06-20修改: element_judge的长度改为与temp_range的长度相同
-            element_judge = [False] * len(temp_range)
-            for i, t in enumerate(temp_range):
-                new_prop = copy.deepcopy(asked_prop)
-                new_prop[ask_attr] = t
-                element_judge[i] = new_prop.is_contained(self.reachable_props)
-            assert sum(element_judge) >= correct_num, f"正确元素数量{sum(element_judge)}小于要求的数量{correct_num}"
-            assert sum([not i for i in element_judge]) >= num - correct_num, f"错误元素数量{sum([not i for i in element_judge])}小于要求的数量{num - correct_num}"
-            true_elements = [i for i, j in zip(temp_range, element_judge) if j]
-            false_elements = [i for i, j in zip(temp_range, element_judge) if not j]
+            true_elements = [i for i in temp_range if element.element_key(i) in true_values]
+            false_elements = [i for i in temp_range if element.element_key(i) not in true_values]
+            assert len(true_elements) >= correct_num, f"正确元素数量{len(true_elements)}小于要求的数量{correct_num}"
+            assert len(false_elements) >= num - correct_num, f"错误元素数量{len(false_elements)}小于要求的数量{num - correct_num}"
             # 06-20修订：如果正确元素或错误元素数量为0或要求为0，则不进行采样
             if len(true_elements) == 0 or correct_num == 0:
                 true_samples = []
@@ -263,11 +344,24 @@ class IncStatQuestion(element.Element):
 class AskMachine:
     """提问机，根据推理图和选项生成器生成问题、选项、答案
     """
-    def __init__(self, g: graph.ReasoningGraph, gen: OptionGenerator):
+    def __init__(self, g: graph.ReasoningGraph, gen: OptionGenerator, view: Optional[graph.LayerView] = None):
+        """初始化提问机
+
+        Args:
+            g (graph.ReasoningGraph): 推理图
+            gen (OptionGenerator): 选项生成器
+            view (Optional[graph.LayerView], optional): 层级视图，为None时使用推理图当前的层级视图. 默认为None.
+        """
         self.graph = g
         """推理图"""
         self.option_generator = gen
         """选项生成器"""
+        self.view = view
+        """提问使用的层级视图，为None时使用推理图当前的层级视图"""
+        self._candidate_cache: dict[tuple, list[prop.Proposition]] = {}
+        """按照(命题选择方式, 命题类型)缓存的候选命题"""
+        self._option_pools: dict[tuple, list[tuple[prop.Proposition, str]]] = {}
+        """按照(命题选择方式, 命题类型, 选项数量, 正确选项数量)缓存的可以提供足够选项的(命题, 属性)组合"""
 
     def _get_candidate_props(self, prop_type: Literal["random", "deepest", "certain"], **kwargs) -> list[prop.Proposition]:
         """根据命题候选方式，获取候选命题
@@ -288,14 +382,86 @@ class AskMachine:
             list[prop.Proposition]: 候选命题列表
         """
         if prop_type == "random":
-            return self.graph.get_reachable_props(use_askable=True)
+            return self.graph.get_reachable_props(use_askable=True, view=self.view)
         elif prop_type == "deepest":
-            return self.graph.get_deepest_conclusions(use_askable=True)
+            return self.graph.get_deepest_conclusions(use_askable=True, view=self.view)
         elif prop_type == "certain":
-            return [i for i in self.graph.get_reachable_props(use_askable=True) if i.kind == kwargs["kind"]]
+            return [i for i in self.graph.get_reachable_props(use_askable=True, view=self.view) if i.kind == kwargs["kind"]]
         else:
             raise ValueError(f"未知的命题选择方式：{prop_type}")
     
+    def _get_cached_candidates(self, prop_type: Literal["random", "deepest", "certain"], **kwargs) -> list[prop.Proposition]:
+        """获取候选命题，同一次分层的结果只计算一次
+
+        Args:
+            prop_type (Literal[&quot;random&quot;, &quot;deepest&quot;, &quot;certain&quot;]): 命题选择方式
+
+        Returns:
+            list[prop.Proposition]: 候选命题列表
+        """
+        cache_key = (prop_type, kwargs.get("kind"))
+        if cache_key not in self._candidate_cache:
+            self._candidate_cache[cache_key] = self._get_candidate_props(prop_type, **kwargs)
+        return self._candidate_cache[cache_key]
+
+    def _get_option_pool(self, prop_type: Literal["random", "deepest", "certain"], num: int, correct_num: Optional[int], **kwargs) -> list[tuple[prop.Proposition, str]]:
+        """获取可以提供足够选项的(命题, 属性)组合，同一次分层的结果只计算一次
+
+        Args:
+            prop_type (Literal[&quot;random&quot;, &quot;deepest&quot;, &quot;certain&quot;]): 命题选择方式
+            num (int): 需要的选项数量
+            correct_num (Optional[int]): 需要的正确选项数量
+
+        Returns:
+            list[tuple[prop.Proposition, str]]: (命题, 属性)组合列表
+        """
+        pool_key = (prop_type, kwargs.get("kind"), num, correct_num)
+        if pool_key not in self._option_pools:
+            candidate_props = self._get_cached_candidates(prop_type, **kwargs)
+            self._option_pools[pool_key] = [(p, a) for p in candidate_props for a in p.main_attrs() if self.option_generator.can_supply(p, a, num, correct_num)]
+        return self._option_pools[pool_key]
+
+    def _sample_statement_props(self, prop_type: Literal["random", "deepest", "certain"], be_corrects: list[bool], **kwargs) -> tuple[list[prop.Proposition], list[str]]:
+        """为“以下选项正确/不正确的是”问题选取互不相同的命题及其提问属性\n
+        需要生成错误选项的位置只从能够提供错误取值的(命题, 属性)组合中选取
+
+        Args:
+            prop_type (Literal[&quot;random&quot;, &quot;deepest&quot;, &quot;certain&quot;]): 命题选择方式
+            be_corrects (list[bool]): 每个位置上的选项是否应当为正确命题
+
+        Raises:
+            ValueError: 候选命题不足以生成选项
+
+        Returns:
+            tuple[list[prop.Proposition], list[str]]: 命题列表和对应的提问属性列表
+        """
+        candidate_props = self._get_cached_candidates(prop_type, **kwargs)
+        wrong_attrs: dict[int, list[str]] = defaultdict(list)
+        wrong_props: list[prop.Proposition] = []
+        for p, a in self._get_option_pool(prop_type, 1, 0, **kwargs):
+            if id(p) not in wrong_attrs:
+                wrong_props.append(p)
+            wrong_attrs[id(p)].append(a)
+        wrong_num = be_corrects.count(False)
+        if len(candidate_props) < len(be_corrects) or len(wrong_props) < wrong_num:
+            raise ValueError(f"获取选项失败：共有{len(candidate_props)}个候选命题，其中{len(wrong_props)}个可以生成错误选项，无法满足{len(be_corrects)}个选项(其中{wrong_num}个错误选项)的要求")
+        wrong_chosen = random.sample(wrong_props, wrong_num)
+        chosen_ids = {id(p) for p in wrong_chosen}
+        right_chosen = random.sample([p for p in candidate_props if id(p) not in chosen_ids], len(be_corrects) - wrong_num)
+        wrong_iter, right_iter = iter(wrong_chosen), iter(right_chosen)
+        ask_props: list[prop.Proposition] = []
+        ask_attrs: list[str] = []
+        for be_correct in be_corrects:
+            if be_correct:
+                p = next(right_iter)
+                ask_props.append(p)
+                ask_attrs.append(p.ask_attr())
+            else:
+                p = next(wrong_iter)
+                ask_props.append(p)
+                ask_attrs.append(random.choice(wrong_attrs[id(p)]))
+        return ask_props, ask_attrs
+
     def _get_options_and_answer(self, options: list[tuple[element.Element, bool]]) -> tuple[dict[str, element.Element], list[str]]:
         """根据元素和元素的正误生成选项和答案
 
@@ -330,16 +496,15 @@ class AskMachine:
         Returns:
             dict[str, Any]: 问题、提问属性、选项、答案
         """
-        candidate_props = self._get_candidate_props(prop_type, **kwargs)
-        while True:
-            try:
-                asked_prop = random.choice(candidate_props)
-                ask_attr = asked_prop.ask_attr()
-                other_options = self.option_generator.get_element_options(asked_prop, ask_attr, option_num - 1, correct_num, **kwargs)
-            except Exception as e:
-                print(f"获取选项失败：{e}")
-                continue
-            break
+        # 只从可以提供足够选项的(命题, 属性)组合中选取，避免无限重试
+        option_pool = self._get_option_pool(prop_type, option_num - 1, correct_num, **kwargs)
+        if len(option_pool) == 0:
+            candidate_num = len(self._get_cached_candidates(prop_type, **kwargs))
+            raise ValueError(f"获取选项失败：{candidate_num}个候选命题中没有可以提供{option_num - 1}个其他选项(正确选项数量要求为{correct_num})的(命题, 属性)组合")
+        # 权重与逐个命题、逐个属性随机重试时的抽样分布保持一致
+        weights = [1 / len(p.main_attrs()) for p, _ in option_pool]
+        asked_prop, ask_attr = random.choices(option_pool, weights=weights)[0]
+        other_options = self.option_generator.get_element_options(asked_prop, ask_attr, option_num - 1, correct_num, **kwargs)
         origin_element: element.Element = asked_prop[ask_attr]
         all_options = [(origin_element, True)] + other_options
         options_dict, answer_list = self._get_options_and_answer(all_options)
@@ -348,7 +513,7 @@ class AskMachine:
         print("选项：", [f"{k}: {v.translate(lang=config.CHINESE)}" for k, v in options_dict.items()])
         print("答案：", answer_list)
         # 05-02新增：增加获得提问命题的推理链
-        cot = self.graph.backtrace(asked_prop)
+        cot = self.graph.backtrace(asked_prop, self.view)
         return {QUESTION: asked_prop, ASK_ATTR: ask_attr, OPTIONS: options_dict, ANSWER: answer_list, COT_LENGTH: len(cot)}
 
     def correct_statements(self, prop_type: Literal["random", "deepest", "certain"] = "random", option_num: int = 4, correct_num: Optional[int] = None, **kwargs) -> dict[str, Any]:
@@ -365,20 +530,9 @@ class AskMachine:
         temp_correct = correct_num if correct_num else random.randint(1, option_num)
         temp_judge = [True] * temp_correct + [False] * (option_num - temp_correct)
         random.shuffle(temp_judge)
-        option_props: list[prop.Proposition] = []
-        while True:
-            try:
-                candidate_props = self._get_candidate_props(prop_type, **kwargs)
-                ask_props = random.sample(candidate_props, option_num)
-                ask_attrs = [i.ask_attr() for i in ask_props]
-                for i in range(option_num):
-                    option_props.append(self.option_generator.get_prop_option(ask_props[i], ask_attrs[i], temp_judge[i], **kwargs))
-            except Exception as e:
-                print(f"获取选项失败：{e}")
-                # 09-10新增：清除option_props，避免重复添加
-                option_props.clear()
-                continue
-            break
+        be_corrects: list[bool] = temp_judge
+        ask_props, ask_attrs = self._sample_statement_props(prop_type, be_corrects, **kwargs)
+        option_props: list[prop.Proposition] = [self.option_generator.get_prop_option(ask_props[i], ask_attrs[i], be_corrects[i], **kwargs) for i in range(option_num)]
         options_dict, answer_list = self._get_options_and_answer([(i, j) for i, j in zip(option_props, temp_judge)])
         # 05-04新增：判断最后一个选项是否为all_wrong，如果是，需要backtrace的命题移除最后一个；否则需要backtrace的命题为所有选项
         if isinstance(option_props[option_num - 1], AllWrongOption):
@@ -389,7 +543,7 @@ class AskMachine:
         print("被选择命题：", [i.translate(lang=config.CHINESE) for i in options_dict.values()])
         print("答案：", answer_list)
         # 05-02新增：增加获得提问命题的推理链
-        cots = [self.graph.backtrace(i) for i in backtrace_props]
+        cots = [self.graph.backtrace(i, self.view) for i in backtrace_props]
         cot_length = reduce(lambda x, y: x + y, [len(i) for i in cots])
         return {QUESTION: CorStatQuestion(), ASK_ATTR: "", OPTIONS: options_dict, ANSWER: answer_list, COT_LENGTH: cot_length}
 
@@ -407,20 +561,9 @@ class AskMachine:
         temp_correct = correct_num if correct_num else random.randint(1, option_num)
         temp_judge = [True] * temp_correct + [False] * (option_num - temp_correct)
         random.shuffle(temp_judge)
-        option_props: list[prop.Proposition] = []
-        while True:
-            try:
-                candidate_props = self._get_candidate_props(prop_type, **kwargs)
-                ask_props = random.sample(candidate_props, option_num)
-                ask_attrs = [i.ask_attr() for i in ask_props]
-                for i in range(option_num):
-                    option_props.append(self.option_generator.get_prop_option(ask_props[i], ask_attrs[i], (not temp_judge[i]), **kwargs))
-            except Exception as e:
-                print(f"获取选项失败：{e}")
-                # 09-10新增：清除option_props，避免重复添加
-                option_props.clear()
-                continue
-            break
+        be_corrects: list[bool] = [not j for j in temp_judge]
+        ask_props, ask_attrs = self._sample_statement_props(prop_type, be_corrects, **kwargs)
+        option_props: list[prop.Proposition] = [self.option_generator.get_prop_option(ask_props[i], ask_attrs[i], be_corrects[i], **kwargs) for i in range(option_num)]
         options_dict, answer_list = self._get_options_and_answer([(i, j) for i, j in zip(option_props, temp_judge)])
         # 05-04新增：判断最后一个选项是否为all_wrong，如果是，需要backtrace的命题移除最后一个；否则需要backtrace的命题为所有选项
         if isinstance(option_props[option_num - 1], AllWrongOption):
@@ -431,7 +574,7 @@ class AskMachine:
         print("被选择命题：", [i.translate(lang=config.CHINESE) for i in options_dict.values()])
         print("答案：", answer_list)
         # 05-02新增：增加获得提问命题的推理链
-        cots = [self.graph.backtrace(i) for i in backtrace_props]
+        cots = [self.graph.backtrace(i, self.view) for i in backtrace_props]
         cot_length = reduce(lambda x, y: x + y, [len(i) for i in cots])
         return {QUESTION: IncStatQuestion(), ASK_ATTR: "", OPTIONS: options_dict, ANSWER: answer_list, COT_LENGTH: cot_length}
 
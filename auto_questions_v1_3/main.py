@@ -17,19 +17,29 @@ import machine
 import level
 # 05-03新增：引入外部知识
 import knowledge
+# 引入试题指纹去重
+import dedupe
+import graphdump
+# 引入试题配额
+import quota
+import instrument
+import goal
+import sharedgraph
+import pipeline
 import json5
 import json
 import random
 import argparse
+import multiprocessing
 from pathlib import Path
-from typing import Any, Literal
+from typing import Any, Literal, Optional
 from itertools import combinations
 from collections.abc import Iterator, Sequence
-from functools import reduce
+from functools import partial, reduce
 # 05-03新增：引入time库计算程序运行时间
 import time
 # 05-03新增：引入defaultdict类记录选项设置情况
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
 # 05-04新增：引入statistics库以计算平均值
 import statistics
 
@@ -41,6 +51,18 @@ PROP_CHOOSE_MACHINE: machine.PropChooseMachine
 OPTION_GENERATOR: machine.OptionGenerator
 KNOWLEDGE_BASE: list[knowledge.Knowledge]
 """外部知识列表"""
+CLOSURE_CACHE: OrderedDict[tuple[frozenset, tuple[str, ...]], graph.ReasoningGraph] = OrderedDict()
+"""情景命题的推理闭包缓存，键为情景命题的规范键集合和推理规则的名称。情景命题与事件时间无关，每次重置都可以复用"""
+CLOSURE_CACHE_SIZE = 4
+"""推理闭包缓存的最大数量"""
+GRAPH_OPTIONS: dict[str, Any] = {}
+"""创建推理图时使用的可选参数，由settings.json5中的对应键设置"""
+FULL_GRAPH: Optional[graph.ReasoningGraph] = None
+"""压缩前的完整推理图，按照swap方式抽样事件时在其上增量更新"""
+EVENT_POOL: list[event.Event] = []
+"""可以抽样的全部事件"""
+POOL_GRAPHS: dict[tuple[str, ...], graph.ReasoningGraph] = {}
+"""按照project方式抽样事件时，由全部事件推理得到的推理图，键为推理规则的名称"""
 
 # settings.json5文件中的键
 GUIDE_KEY = "guide"
@@ -63,6 +85,48 @@ DISTRIBUTION_MODE_KEY = "distribution_mode"
 # 11-28新增：读取用户设置模板的键
 USER_TEMPLATE_KEY = "user_template"
 """读取用户设置模板的键"""
+# 试题去重相关的键
+DEDUPE_KEY = "dedupe"
+"""设置是否使用指纹库去重的键"""
+BLOOM_CAPACITY_KEY = "bloom_capacity"
+"""设置指纹库布隆过滤器容量的键"""
+QUOTA_KEY = "quota"
+"""设置试题目标配额的键"""
+DUMP_GRAPH_KEY = "dump_graph"
+"""设置是否导出推理图的键"""
+INCREMENTAL_KNOWLEDGE_KEY = "incremental_knowledge"
+"""设置是否缓存情景命题的推理闭包并增量加入初始命题和外部知识的键"""
+EVENT_SCHEDULE_KEY = "event_schedule"
+"""设置重置时事件抽样方式的键"""
+MAX_DERIVATIONS_KEY = "max_derivations"
+"""设置每个结论命题最多保留的最短推导数量的键"""
+MATERIALISE_TIMELINE_KEY = "materialise_timeline"
+"""设置是否根据时间值直接计算成对时间事实的键"""
+EQUIVALENCE_CLASSES_KEY = "equivalence_classes"
+"""设置是否使用并查集推理等价关系的键"""
+COMPACT_GRAPH_KEY = "compact_graph"
+"""设置是否在推理后删除与出题无关的节点的键"""
+MAX_ROUNDS_KEY = "max_rounds"
+"""设置每次推理最多执行的轮数的键"""
+MAX_NODES_KEY = "max_nodes"
+"""设置推理图最多包含的节点数量的键"""
+MAX_SECONDS_KEY = "max_seconds"
+"""设置每次推理最多使用的秒数的键"""
+GOAL_DIRECTED_KEY = "goal_directed"
+"""设置是否先确定提问命题类型、只用推出该类型所需的规则推理的键"""
+GOAL_KINDS_KEY = "goal_kinds"
+"""设置目标导向出题时可以提问的命题类型的键"""
+ASK_WORKERS_KEY = "ask_workers"
+"""设置每次重置中并行提问的工作进程数量的键"""
+PIPELINE_WORKERS_KEY = "pipeline_workers"
+"""设置流水线中翻译和序列化试题的工作进程数量的键"""
+# 事件抽样方式
+RANDOM_SCHEDULE = "random"
+"""每次重置时重新抽样全部事件，并重新生成事件时间"""
+SWAP_SCHEDULE = "swap"
+"""每次重置时只替换一到两个事件，沿用已生成的事件时间，推理图增量更新"""
+PROJECT_SCHEDULE = "project"
+"""每次重置时重新抽样全部事件，沿用已生成的事件时间，推理图由全部事件的推理图投影得到"""
 
 def set_random_seed(seed: int | float | None):
     """设置随机种子
@@ -91,29 +155,58 @@ def myobject_setup(myobject_attr_dicts: list[dict]) -> list[event.MyObject]:
     else:
         raise ValueError("MyObject对象的名称不唯一")
 
-def event_setup(event_attr_list: list[dict], myobject_list: list[event.MyObject], event_num: int | None) -> Iterator[tuple[event.Event]]:
-    """初始化数个Event对象
+def event_list_setup(event_attr_list: list[dict], myobject_list: list[event.MyObject]) -> list[event.Event]:
+    """初始化全部Event对象
 
     Args:
         event_attr_list (list[dict]): Event对象的属性字典列表
         myobject_list (list[event.MyObject]): MyObject对象列表
-        event_num (int | None): 事件数量，若为None则为全部事件
 
     Raises:
         ValueError: Event对象的名称不唯一
 
-    Yields:
-        Iterator[tuple[event.Event]]: Event对象的迭代器
+    Returns:
+        list[event.Event]: Event对象列表
     """
-    event_num = event_num if event_num is not None else len(event_attr_list)
     event_list: list[event.Event] = reduce(lambda x, y: x + y, [event.Event.build(event_attr, myobject_list) for event_attr in event_attr_list])
     if not element.name_is_unique(event_list):
         raise ValueError("Event对象的名称不唯一")
     print(f"Event对象列表初始化完成，共{len(event_list)}个对象")
+    return event_list
+
+def event_setup(event_list: list[event.Event], event_num: int | None, schedule: str = RANDOM_SCHEDULE) -> Iterator[tuple[event.Event]]:
+    """从全部Event对象中抽样数个Event对象
+
+    Args:
+        event_list (list[event.Event]): 全部Event对象
+        event_num (int | None): 事件数量，若为None则为全部事件
+        schedule (str, optional): 事件抽样方式，默认为"random". 目前可用的方式有：
+            - random: 每次调用时重新抽样
+            - swap: 每次调用时只替换上一次抽样中的一到两个事件
+            - project: 与random相同，每次调用时重新抽样
+
+    Raises:
+        ValueError: 事件抽样方式不合法
+
+    Yields:
+        Iterator[tuple[event.Event]]: Event对象的迭代器
+    """
+    event_num = event_num if event_num is not None else len(event_list)
     # 08-31修改：event的yield顺序改为每次调用时都重新采样，放弃使用combinations，以避免迭代耗尽的问题
     # random.shuffle(event_list)
     # for chosen_list in combinations(event_list, event_num):
         # yield chosen_list
+    if schedule == SWAP_SCHEDULE:
+        sampled_events = random.sample(event_list, event_num)
+        while True:
+            yield tuple(sampled_events)
+            rest_events = [e for e in event_list if not any(e is s for s in sampled_events)]
+            # 替换的数量不能超过未抽样的事件数量和抽样的事件数量
+            swap_num = min(random.choice([1, 2]), len(rest_events), event_num)
+            for index, e in zip(random.sample(range(event_num), swap_num), random.sample(rest_events, swap_num)):
+                sampled_events[index] = e
+    elif schedule not in (RANDOM_SCHEDULE, PROJECT_SCHEDULE):
+        raise ValueError(f"不支持的事件抽样方式{schedule}")
     while True:
         sampled_events = random.sample(event_list, event_num)
         yield tuple(sampled_events)
@@ -175,26 +268,137 @@ def external_knowledge_setup(time_unit: str, num: int = 5):
     knowledge_list = knowledge.get_selected_knowledge(time_unit, num)
     KNOWLEDGE_BASE = knowledge_list
 
-def graph_setup(events: Sequence[event.Event]):
-    """初始化推理图
+def graph_setup(events: Sequence[event.Event], incremental: bool = False, rebase: bool = False, compact: bool = False, goal_kinds: Optional[Sequence[str]] = None, project: bool = False, resample: bool = True):
+    """初始化推理图，推理图的可选参数见GRAPH_OPTIONS
+
+    Args:
+        events (Sequence[event.Event]): 事件序列
+        incremental (bool, optional): 是否复用情景命题的推理闭包，并增量加入初始命题和外部知识命题. 默认为False.
+        rebase (bool, optional): 是否沿用已生成的事件时间，在上一次的推理图上撤回和增量加入命题. 默认为False.
+        compact (bool, optional): 是否在推理后删除与出题无关的节点. 默认为False.
+        goal_kinds (Optional[Sequence[str]], optional): 提问命题的类型，设置后只使用由初始命题和知识命题推出这些类型所需的推理规则. 默认为None.
+        project (bool, optional): 是否沿用已生成的事件时间，由全部事件的推理图投影得到推理图. 默认为False.
+        resample (bool, optional): 是否重新生成事件时间，为False时沿用约束机器中已生成的事件时间. 默认为True.
+    """
+    global GRAPH, FULL_GRAPH
+    reason_graph(events, incremental, rebase, goal_kinds, project, resample)
+    if compact:
+        # 压缩后的推理图不能再撤回命题，保留完整的推理图用于之后的增量更新
+        FULL_GRAPH = GRAPH
+        GRAPH = GRAPH.copy()
+        GRAPH.compact(machine.get_choose_kinds())
+
+def reason_graph(events: Sequence[event.Event], incremental: bool = False, rebase: bool = False, goal_kinds: Optional[Sequence[str]] = None, project: bool = False, resample: bool = True):
+    """根据事件得到初始命题，并推理得到完整的推理图
 
     Args:
         events (Sequence[event.Event]): 事件序列
+        incremental (bool, optional): 是否复用情景命题的推理闭包，并增量加入初始命题和外部知识命题. 默认为False.
+        rebase (bool, optional): 是否沿用已生成的事件时间，在上一次的推理图上撤回和增量加入命题. 默认为False.
+        goal_kinds (Optional[Sequence[str]], optional): 提问命题的类型，设置后只使用由初始命题和知识命题推出这些类型所需的推理规则. 默认为None.
+        project (bool, optional): 是否沿用已生成的事件时间，由全部事件的推理图投影得到推理图. 默认为False.
+        resample (bool, optional): 是否重新生成事件时间，为False时沿用约束机器中已生成的事件时间. 默认为True.
     """
     global GRAPH, KNOWLEDGE_BASE, CONSTRAINT_MACHINE
-    initial_props = CONSTRAINT_MACHINE.get_time_props(events)
+    initial_props = CONSTRAINT_MACHINE.get_time_props(events, resample=resample and not rebase and not (project and len(POOL_GRAPHS) > 0))
     for t, e in CONSTRAINT_MACHINE.event_order:
         print(f"{e.translate(config.CHINESE)}: {t.translate(config.CHINESE)}")
     scenario_rules = SCENARIO.get_rules()
     knowledge_props = []
     knowledge_props.extend(SCENARIO.get_props()) # 将情景中的独有命题加入知识命题中
+    if goal_kinds is not None:
+        # 10-19修改：只保留由初始命题和知识命题推出提问命题类型所需的规则，已知命题从推理图中已有的命题中选择
+        external_kinds = {p.kind for k in KNOWLEDGE_BASE for p in k[knowledge.PROPOSITIONS]} if KNOWLEDGE_BASE else set()
+        base_kinds = {p.kind for p in initial_props + knowledge_props} | external_kinds
+        scenario_rules = goal.backward_slice(scenario_rules, goal_kinds, base_kinds)
+        print("目标导向推理使用的规则：", *[r.name for r in scenario_rules])
+        if len(scenario_rules) == 0:
+            # 提问命题的类型不能由初始命题和知识命题推出，推理图中没有该类型的命题，由调用者更换类型
+            print(f"初始命题和知识命题推不出{list(goal_kinds)}类型的命题")
+            GRAPH = graph.ReasoningGraph(initial_props, scenario_rules, knowledge_props, **GRAPH_OPTIONS)
+            return
+    if project:
+        # 10-19新增：全部事件共用一条时间线，只推理一次，之后每次重置由其投影得到推理图
+        pool_key = tuple(r.name for r in scenario_rules)
+        pool_graph = POOL_GRAPHS.get(pool_key)
+        if pool_graph is None:
+            print("推理全部事件的推理图")
+            pool_graph = graph.ReasoningGraph(CONSTRAINT_MACHINE.get_time_props(EVENT_POOL, resample=False), scenario_rules, knowledge_props, **GRAPH_OPTIONS)
+            pool_graph.reason()
+            POOL_GRAPHS[pool_key] = pool_graph
+            # 生成全部事件的时间命题会覆盖event_order，需要按照抽样的事件重新生成
+            CONSTRAINT_MACHINE.get_time_props(events, resample=False)
+        if pool_graph.stop_reason is not None:
+            # 推理预算耗尽时全部事件的推理图不完整，不能投影，由调用者跳过本次重置
+            GRAPH = pool_graph
+            return
+        GRAPH = pool_graph.project(initial_props, knowledge_props)
+        if KNOWLEDGE_BASE:
+            GRAPH.add_knowledge_props([p for k in KNOWLEDGE_BASE for p in k[knowledge.PROPOSITIONS]])
+        return
+    if rebase:
+        base_graph = FULL_GRAPH if FULL_GRAPH is not None else GRAPH
+        # 目标导向出题时，提问命题的类型变化后推理规则不同，不能在上一次的推理图上增量更新
+        if [r.name for r in base_graph.reasoning_rules] == [r.name for r in scenario_rules]:
+            external_props = [p for k in KNOWLEDGE_BASE for p in k[knowledge.PROPOSITIONS]] if KNOWLEDGE_BASE else []
+            GRAPH = base_graph
+            GRAPH.rebase(initial_props, knowledge_props + external_props)
+            return
+    if incremental:
+        # 初始命题的时间每次重置都重新抽样，只有情景命题及其推理闭包在重置之间保持不变，
+        # 因此缓存情景命题的推理闭包，每次重置复制后增量加入初始命题和外部知识命题
+        closure_key = (frozenset(p.key() for p in knowledge_props), tuple(r.name for r in scenario_rules))
+        base_graph = CLOSURE_CACHE.get(closure_key)
+        if base_graph is None:
+            base_graph = graph.ReasoningGraph([], scenario_rules, knowledge_props, **GRAPH_OPTIONS)
+            if len(knowledge_props) > 0:
+                base_graph.reason()
+            CLOSURE_CACHE[closure_key] = base_graph
+            if len(CLOSURE_CACHE) > CLOSURE_CACHE_SIZE:
+                CLOSURE_CACHE.popitem(last=False)
+        else:
+            print("复用已缓存的推理闭包")
+            CLOSURE_CACHE.move_to_end(closure_key)
+        GRAPH = base_graph.copy()
+        GRAPH.add_init_props(initial_props)
+        if KNOWLEDGE_BASE:
+            GRAPH.add_knowledge_props([p for k in KNOWLEDGE_BASE for p in k[knowledge.PROPOSITIONS]])
+        return
     # 05-03新增：将外部知识添加到推理图中
     if KNOWLEDGE_BASE:
         for k in KNOWLEDGE_BASE:
             knowledge_props.extend(k[knowledge.PROPOSITIONS])
-    GRAPH = graph.ReasoningGraph(initial_props, scenario_rules, knowledge_props)
+    GRAPH = graph.ReasoningGraph(initial_props, scenario_rules, knowledge_props, **GRAPH_OPTIONS)
     GRAPH.reason()
 
+def goal_graph_setup(events: Sequence[event.Event], candidate_kinds: Sequence[str], incremental: bool = False, rebase: bool = False, compact: bool = False, project: bool = False) -> str:
+    """目标导向出题时初始化推理图：随机确定提问命题的类型，只使用推出该类型所需的推理规则推理
+
+    Args:
+        events (Sequence[event.Event]): 事件序列
+        candidate_kinds (Sequence[str]): 可以提问的命题类型
+        incremental (bool, optional): 是否复用情景命题的推理闭包，并增量加入初始命题和外部知识命题. 默认为False.
+        rebase (bool, optional): 是否沿用已生成的事件时间，在上一次的推理图上撤回和增量加入命题. 默认为False.
+        compact (bool, optional): 是否在推理后删除与出题无关的节点. 默认为False.
+        project (bool, optional): 是否沿用已生成的事件时间，由全部事件的推理图投影得到推理图. 默认为False.
+
+    Raises:
+        ValueError: 所有命题类型的可询问命题都不足
+
+    Returns:
+        str: 提问命题的类型
+    """
+    global GRAPH
+    for attempt, kind in enumerate(random.sample(list(candidate_kinds), len(candidate_kinds))):
+        print(f"目标导向出题，提问命题的类型为{kind}")
+        # 更换类型时沿用第一次生成的事件时间，所有类型都在同一条时间线上判断
+        graph_setup(events, incremental, rebase, compact, [kind], project, resample=attempt == 0)
+        # 推理预算耗尽时不再尝试其他类型，由调用者跳过本次重置
+        if GRAPH.stop_reason is not None or sum(p.kind == kind for p in GRAPH.get_all_props(use_askable=True)) >= goal.MIN_GOAL_PROPS:
+            return kind
+        print(f"推理图中{kind}类型的可询问命题少于{goal.MIN_GOAL_PROPS}个，更换提问命题的类型")
+    raise ValueError(f"命题类型{list(candidate_kinds)}的可询问命题都少于{goal.MIN_GOAL_PROPS}个")
+
 def prop_choose() -> list[prop.Proposition]:
     """选择试题中作为已知信息出现的命题
 
@@ -206,29 +410,35 @@ def prop_choose() -> list[prop.Proposition]:
     PROP_CHOOSE_MACHINE = machine.PropChooseMachine(events, GRAPH)
     return PROP_CHOOSE_MACHINE.run()
 
-def second_reason(temp_props: list[prop.Proposition]):
+def second_reason(temp_props: list[prop.Proposition]) -> graph.LayerView:
     """执行二次推理，设置推理图上节点的层级
 
     Args:
         temp_props (list[prop.Proposition]): 二次推理的初始命题列表
+
+    Returns:
+        graph.LayerView: 层级视图
     """
     global GRAPH
-    GRAPH.set_node_layers(temp_props)
+    return GRAPH.set_node_layers(temp_props)
 
-def set_option_generator():
+def set_option_generator(view: Optional[graph.LayerView] = None):
     """初始化选项生成器，设置选项可以随机的范围
     提问器会根据选项生成器随机生成选项
+
+    Args:
+        view (Optional[graph.LayerView], optional): 层级视图，为None时使用推理图当前的层级视图. 默认为None.
     """
     print("初始化选项生成器...")
     global OPTION_GENERATOR, GRAPH, CONSTRAINT_MACHINE
-    OPTION_GENERATOR = machine.OptionGenerator(GRAPH)
+    OPTION_GENERATOR = machine.OptionGenerator(GRAPH, view)
     upper_time, lower_time = CONSTRAINT_MACHINE.upper_bound, CONSTRAINT_MACHINE.lower_bound
     time_range = represent.get_time_range(upper_time, lower_time)
     time_delta_range = represent.get_time_delta_range(upper_time, lower_time)
     # 05-03新增：记录已经查找过的项，避免重复设置
-    # TODO：这个位置可以做进一步优化
+    # 直接复用选项生成器中已经求得的可达命题，避免再次遍历推理图
     be_set_attrs = defaultdict(list)
-    for p in GRAPH.get_reachable_props():
+    for p in OPTION_GENERATOR.reachable_props:
         for attr in p.main_attrs():
             if attr in be_set_attrs[p.kind]:
                 continue
@@ -239,22 +449,106 @@ def set_option_generator():
                 OPTION_GENERATOR.set_attr_range(p.kind, attr, time_delta_range)
     print("选项生成器初始化完成")
 
-def question_generate(prop_type: Literal["random", "deepest", "certain"] = "random", question_type: Literal["precise", "correct", "incorrect"] = "precise", **kwargs) -> dict[str, Any]:
+def question_generate(prop_type: Literal["random", "deepest", "certain"] = "random", question_type: Literal["precise", "correct", "incorrect"] = "precise", view: Optional[graph.LayerView] = None, **kwargs) -> dict[str, Any]:
     """根据指定的参数生成问题
 
     Args:
         prop_type (Literal[&quot;random&quot;, &quot;deepest&quot;, &quot;certain&quot;], optional): 需要选择的命题类型，默认为"random"。
         question_type (Literal[&quot;precise&quot;, &quot;correct&quot;, &quot;incorrect&quot;], optional): 问题类型，默认为"precise"。
+        view (Optional[graph.LayerView], optional): 层级视图，为None时使用推理图当前的层级视图. 默认为None.
         **kwargs: 其他参数
     
     Returns:
         dict[str, Any]: 问题信息字典，包含问题的命题、选项和答案等信息
     """
     global GRAPH, OPTION_GENERATOR
-    ask_machine = machine.AskMachine(GRAPH, OPTION_GENERATOR)
+    ask_machine = machine.AskMachine(GRAPH, OPTION_GENERATOR, view)
     question_info = ask_machine.run(prop_type, question_type, **kwargs)
     return question_info
 
+def ask_once(question_type: Literal["precise", "correct", "incorrect"] = "precise", ask_kwargs: Optional[dict[str, Any]] = None, dump_path: Optional[Path] = None) -> tuple[list[prop.Proposition], dict[str, Any]]:
+    """在当前推理图上完成一次提问：选择已知命题、二次推理、初始化选项生成器并生成问题
+
+    Args:
+        question_type (Literal[&quot;precise&quot;, &quot;correct&quot;, &quot;incorrect&quot;], optional): 问题类型，默认为"precise"。
+        ask_kwargs (Optional[dict[str, Any]], optional): 传给question_generate()的提问参数，提问失败时改为随机提问. 默认为None.
+        dump_path (Optional[Path], optional): 推理图的导出路径，为None时不导出. 默认为None.
+
+    Returns:
+        tuple[list[prop.Proposition], dict[str, Any]]: 已知信息命题列表和问题信息字典
+    """
+    ask_kwargs = ask_kwargs or {}
+    chosen_props = prop_choose()
+    layer_view = second_reason(chosen_props)
+    if dump_path is not None:
+        graphdump.dump_graph(GRAPH, dump_path)
+    set_option_generator(layer_view)
+    try:
+        question_info = question_generate(question_type=question_type, view=layer_view, **ask_kwargs)
+    except ValueError as e:
+        if not ask_kwargs:
+            raise
+        # 已知命题可以推出的目标类型命题不足以生成选项时，从推理图的所有可询问命题中提问
+        print(f"{e}，改为从所有可询问命题中提问")
+        question_info = question_generate(question_type=question_type, view=layer_view)
+    return chosen_props, question_info
+
+def _worker_init(dir_path: str):
+    """并行提问和流水线翻译的工作进程的初始化：读取配置文件，加载命题模板和情景
+
+    Args:
+        dir_path (str): 配置文件所在目录路径
+    """
+    config.set_curr_setting_dir(dir_path)
+    with open(Path(dir_path) / config.SETTINGS_FILE, "r", encoding="utf8") as f:
+        settings: dict[str, Any] = json5.load(f)
+    config.set_curr_unit(settings[CURR_UNIT_KEY])
+    prop.init(settings.get(USER_TEMPLATE_KEY))
+    scenario_setup(settings[SCENARIO_KEY])
+    # 情景命题的数据在获取情景命题时加入命题库，翻译命题前需要先加入
+    SCENARIO.get_props()
+
+def _parallel_ask(reset_state: dict[str, Any], question_type: Literal["precise", "correct", "incorrect"], ask_kwargs: dict[str, Any], task: tuple[int, Optional[Path]]) -> tuple[list[prop.Proposition], dict[str, Any]]:
+    """在工作进程中完成一次提问，推理图从共享内存中连接，每次提问使用由重置的随机种子和提问序号确定的随机数序列
+
+    Args:
+        reset_state (dict[str, Any]): 重置的状态，包括共享推理图的描述、约束机器和随机种子
+        question_type (Literal[&quot;precise&quot;, &quot;correct&quot;, &quot;incorrect&quot;]): 问题类型
+        ask_kwargs (dict[str, Any]): 提问参数
+        task (tuple[int, Optional[Path]]): 提问序号和推理图的导出路径
+
+    Returns:
+        tuple[list[prop.Proposition], dict[str, Any]]: 已知信息命题列表和问题信息字典
+    """
+    global GRAPH, CONSTRAINT_MACHINE, PROP_CHOOSE_MACHINE, OPTION_GENERATOR
+    j, dump_path = task
+    # 先释放对上一次重置的推理图的引用，共享内存块才能关闭
+    GRAPH = PROP_CHOOSE_MACHINE = OPTION_GENERATOR = None
+    GRAPH = sharedgraph.attach_graph(reset_state["graph"], SCENARIO.get_rules())
+    CONSTRAINT_MACHINE = reset_state["constraint"]
+    set_random_seed(reset_state["seed"] + j)
+    return ask_once(question_type, ask_kwargs, dump_path)
+
+def _pipeline_translate(guide: dict[str, str], question_type: Literal["precise", "correct", "incorrect"], group: str, knowledge_base: list[knowledge.Knowledge], seed: int, chosen_props: list[prop.Proposition], question_info: dict[str, Any]) -> list[str]:
+    """在工作进程中翻译一道试题，计算难度等级，并序列化为结果文件中的文本
+
+    Args:
+        guide (dict[str, str]): 问题的引导语
+        question_type (Literal[&quot;precise&quot;, &quot;correct&quot;, &quot;incorrect&quot;]): 问题类型
+        group (str): 试题的group属性
+        knowledge_base (list[knowledge.Knowledge]): 出题时使用的外部知识，用于计算难度等级
+        seed (int): 翻译使用的随机种子
+        chosen_props (list[prop.Proposition]): 选择的命题列表
+        question_info (dict[str, Any]): 问题信息字典
+
+    Returns:
+        list[str]: 每个语言版本序列化后的文本
+    """
+    global KNOWLEDGE_BASE
+    KNOWLEDGE_BASE = knowledge_base
+    set_random_seed(seed)
+    return [pipeline.serialize_item(n | {config.GROUP: group}) for n in question_translate(guide, chosen_props, question_info, question_type=question_type)]
+
 def get_level(chosen_props: list[prop.Proposition], question_info: dict[str, Any], question_type: Literal["precise", "correct", "incorrect"] = "precise", lang: str = "cn") -> int:
     """根据问题信息计算问题的难度等级
     
@@ -288,6 +582,45 @@ def get_level(chosen_props: list[prop.Proposition], question_info: dict[str, Any
     curr_level = level.ask_level(step_len, statements_difficulty, option_num, knowledge_diff, scenario_diff, question_difficulty)
     return curr_level
 
+def get_question_tags(question_info: dict[str, Any], question_type: Literal["precise", "correct", "incorrect"] = "precise") -> list[str]:
+    """获得问题相关的命题标签
+
+    Args:
+        question_info (dict[str, Any]): 问题信息字典，包含问题的命题、选项和答案等信息
+        question_type (Literal[&quot;precise&quot;, &quot;correct&quot;, &quot;incorrect&quot;], optional): 问题类型，默认为"precise"。
+
+    Returns:
+        list[str]: 命题标签列表
+
+    Raises:
+        ValueError: 问题类型不合法
+    """
+    if question_type == "precise":
+        return [question_info[machine.QUESTION].get_prop_tag()]
+    elif question_type == "correct" or question_type == "incorrect":
+        return [p.get_prop_tag() for p in question_info[machine.OPTIONS].values()]
+    else:
+        raise ValueError(f"问题类型{question_type}不合法")
+
+def get_question_stats(chosen_props: list[prop.Proposition], question_info: dict[str, Any], question_type: Literal["precise", "correct", "incorrect"] = "precise") -> dict[str, Any]:
+    """在翻译之前计算问题的统计信息，用于判断问题是否符合配额
+
+    Args:
+        chosen_props (list[prop.Proposition]): 选择的命题列表
+        question_info (dict[str, Any]): 问题信息字典，包含问题的命题、选项和答案等信息
+        question_type (Literal[&quot;precise&quot;, &quot;correct&quot;, &quot;incorrect&quot;], optional): 问题类型，默认为"precise"。
+
+    Returns:
+        dict[str, Any]: 问题的难度等级、推理步骤数、情景类型和命题标签
+    """
+    global SCENARIO
+    return {
+        config.LEVEL: get_level(chosen_props, question_info, question_type=question_type),
+        config.STEP: question_info[machine.COT_LENGTH],
+        config.SCENE_TYPE: SCENARIO[scenario.TYPE_NAME],
+        config.QUESTION_TYPE: get_question_tags(question_info, question_type),
+    }
+
 def question_translate(guide: dict[str, str], chosen_props: list[prop.Proposition], question_info: dict[str, Any], question_type: Literal["precise", "correct", "incorrect"] = "precise") -> list[dict[str, Any]]:
     """将问题信息翻译成不同语言的版本\n
     该函数会根据配置文件中的语言设置，将问题信息翻译成不同语言的版本，并返回一个包含所有语言版本的列表
@@ -315,12 +648,7 @@ def question_translate(guide: dict[str, str], chosen_props: list[prop.Propositio
         # 05-02新增：计算问题的难度等级
         question_level = get_level(chosen_props, question_info, question_type=question_type, lang=lang)
         # 05-02新增：获得问题相关的tags
-        if question_type == "precise":
-            question_tags: list[str] = [question.get_prop_tag()]
-        elif question_type == "correct" or question_type == "incorrect":
-            question_tags: list[str] = [p.get_prop_tag() for p in options.values()]
-        else:
-            raise ValueError(f"问题类型{question_type}不合法")
+        question_tags: list[str] = get_question_tags(question_info, question_type)
         str_info = {
             config.TEXT: text,
             config.QUESTION: question_str,
@@ -357,42 +685,132 @@ def main(dir_path: str, question_type: Literal["precise", "correct", "incorrect"
     myobject_list = myobject_setup(settings[OBJECT_KEY])
     # 初始化Event对象
     event_names = event_name_setup(settings[EVENT_KEY])
-    event_iter = event_setup(settings[EVENT_KEY], myobject_list, settings[EVENT_NUM_KEY])
+    event_schedule: str = settings.get(EVENT_SCHEDULE_KEY, RANDOM_SCHEDULE)
+    EVENT_POOL[:] = event_list_setup(settings[EVENT_KEY], myobject_list)
+    event_iter = event_setup(EVENT_POOL, settings[EVENT_NUM_KEY], event_schedule)
     # 命题文件的初始化
     config.set_curr_unit(settings[CURR_UNIT_KEY])
     # 11-28修改：支持用户在settings.json5文件中自定义命题模板用于命题翻译
     prop.init(settings.get(USER_TEMPLATE_KEY)) # 初始化命题库，加载命题文件。必须初始化！
     # 初始化场景
     scenario_setup(settings[SCENARIO_KEY])
+    GRAPH_OPTIONS.update(max_derivations=settings.get(MAX_DERIVATIONS_KEY), materialise_timeline=settings.get(MATERIALISE_TIMELINE_KEY, False), equivalence_classes=settings.get(EQUIVALENCE_CLASSES_KEY, False), max_rounds=settings.get(MAX_ROUNDS_KEY), max_nodes=settings.get(MAX_NODES_KEY), max_seconds=settings.get(MAX_SECONDS_KEY))
+    # 根据配置打开试题指纹库，跨提问、重置和运行去除重复试题
+    store = dedupe.FingerprintStore(dir_path, settings.get(BLOOM_CAPACITY_KEY)) if settings.get(DEDUPE_KEY, False) else None
+    # 设置了配额时，reset_time作为重置次数的上限，所有配额满足后停止生成
+    tracker = quota.QuotaTracker(settings[QUOTA_KEY]) if QUOTA_KEY in settings else None
+    # 设置了多个提问工作进程时，每次重置的推理图导出到共享内存，各次提问在工作进程中并行完成，结果按照提问顺序处理
+    ask_workers: int = settings.get(ASK_WORKERS_KEY) or 1
+    assert ask_workers > 0, "提问工作进程的数量必须为正数"
+    pool = multiprocessing.get_context("spawn").Pool(ask_workers, initializer=_worker_init, initargs=(dir_path,)) if ask_workers > 1 else None
+    # 设置了流水线的工作进程时，翻译和序列化在进程池中进行，结果由写入线程按照提问顺序写入文件，与之后的提问和推理重叠
+    pipeline_workers: Optional[int] = settings.get(PIPELINE_WORKERS_KEY)
+    assert pipeline_workers is None or pipeline_workers > 0, "流水线工作进程的数量必须为正数"
+    res_file: Path = Path(dir_path) / f"{question_type}.json"
+    # 开启去重时保留以往运行保存的试题，新的试题追加在其后，使结果文件与指纹库中的指纹保持一致
+    previous_result: list[dict[str, Any]] = []
+    if store is not None and res_file.exists():
+        with open(res_file, "r", encoding="utf8") as f:
+            previous_result = json.load(f)
+    translate_pool = multiprocessing.get_context("spawn").Pool(pipeline_workers, initializer=_worker_init, initargs=(dir_path,)) if pipeline_workers else None
+    writer = pipeline.JsonArrayWriter(res_file, config.PIPELINE_QUEUE_SIZE, [pipeline.serialize_item(n) for n in previous_result]) if pipeline_workers else None
+    translate_stage = pipeline.OrderedStage(translate_pool, _pipeline_translate, config.PIPELINE_QUEUE_SIZE, writer.put) if pipeline_workers else None
     result = []
+    # 目标导向出题时可以提问的命题类型在各次重置之间不变，只需获取一次
+    candidate_kinds: list[str] = (settings.get(GOAL_KINDS_KEY) or goal.get_goal_kinds(SCENARIO.get_rules())) if settings.get(GOAL_DIRECTED_KEY, False) else []
     for i in range(settings[RESET_TIME_KEY]):
+        if tracker is not None and tracker.is_full():
+            print("所有配额均已满足，停止生成")
+            break
         print(f"第{i+1}次重置")
         # 初始化约束机器
+        # 按照swap方式抽样事件时，只在第一次重置时生成事件时间，之后的重置在上一次的推理图上增量更新
+        rebase: bool = event_schedule == SWAP_SCHEDULE and i > 0
+        # 按照project方式抽样事件时，只在第一次重置时生成事件时间，之后的重置由全部事件的推理图投影得到推理图
+        project: bool = event_schedule == PROJECT_SCHEDULE
         curr_distribution_mode: str = settings.get(DISTRIBUTION_MODE_KEY, "random")
-        constraint_setup(event_names, settings[CONSTRAINT_KEY], settings[TIME_RANGE_KEY]["upper_bound"], settings[TIME_RANGE_KEY]["lower_bound"], curr_distribution_mode)
+        if not rebase and not (project and i > 0):
+            constraint_setup(event_names, settings[CONSTRAINT_KEY], settings[TIME_RANGE_KEY]["upper_bound"], settings[TIME_RANGE_KEY]["lower_bound"], curr_distribution_mode)
         curr_events: tuple[event.Event] = next(event_iter)
         # 05-03新增：外部知识的初始化
         external_knowledge_setup(settings[CURR_UNIT_KEY], settings[KNOWLEDGE_NUM_KEY])
-        graph_setup(curr_events)
+        ask_kwargs: dict[str, Any] = {}
+        if settings.get(GOAL_DIRECTED_KEY, False):
+            # 10-19新增：目标导向出题时先确定提问命题的类型，只提问该类型的命题
+            target_kind = goal_graph_setup(curr_events, candidate_kinds, settings.get(INCREMENTAL_KNOWLEDGE_KEY, False), rebase, settings.get(COMPACT_GRAPH_KEY, False), project)
+            ask_kwargs = {"prop_type": "certain", "kind": target_kind}
+        else:
+            graph_setup(curr_events, settings.get(INCREMENTAL_KNOWLEDGE_KEY, False), rebase, settings.get(COMPACT_GRAPH_KEY, False), project=project)
+        if GRAPH.stop_reason is not None:
+            # 10-19新增：推理预算耗尽时推理图不完整，已知命题可能推不出可询问的命题，跳过本次重置
+            print(f"推理预算{GRAPH.stop_reason}已耗尽，推理图不完整，跳过第{i+1}次重置的提问")
+            continue
         group_result = []
+        dump_paths: list[Optional[Path]] = [Path(dir_path) / config.GRAPH_DUMP_DIR / f"{question_type}-{i}-{j}.bin" if settings.get(DUMP_GRAPH_KEY, False) else None for j in range(settings[ASK_TIME_KEY])]
+        shared: Optional[sharedgraph.SharedGraph] = None
+        pending: Optional[Iterator[tuple[list[prop.Proposition], dict[str, Any]]]] = None
+        if pool is not None:
+            shared = sharedgraph.SharedGraph(GRAPH)
+            reset_state = {"graph": shared.descriptor, "constraint": CONSTRAINT_MACHINE, "seed": random.getrandbits(64)}
+            pending = pool.imap(partial(_parallel_ask, reset_state, question_type, ask_kwargs), list(enumerate(dump_paths)))
+        group_name = f"{Path(dir_path).stem}-{question_type}-{i}"
+        translate_seed: int = random.getrandbits(64) if translate_stage is not None else 0
         for j in range(settings[ASK_TIME_KEY]):
+            if tracker is not None and tracker.is_full():
+                break
             print(f"第{j+1}次提问")
-            # 选择命题
-            chosen_props = prop_choose()
-            second_reason(chosen_props)
-            set_option_generator()
-            question_info = question_generate(question_type=question_type)
+            if pending is not None:
+                chosen_props, question_info = next(pending)
+            else:
+                chosen_props, question_info = ask_once(question_type, ask_kwargs, dump_paths[j])
+            # 在翻译之前检查试题是否落入未满的配额
+            if tracker is not None:
+                question_stats = get_question_stats(chosen_props, question_info, question_type)
+                if not tracker.can_accept(question_stats):
+                    print("试题所属的配额已满，跳过")
+                    continue
+            # 在翻译之前检查试题指纹，重复的试题直接跳过
+            if store is not None and not store.add(dedupe.question_fingerprint(chosen_props, question_info), question_type):
+                print("试题与已有试题重复，跳过")
+                continue
+            if tracker is not None:
+                tracker.add(question_stats)
+            if translate_stage is not None:
+                translate_stage.submit(settings[GUIDE_KEY], question_type, group_name, KNOWLEDGE_BASE, translate_seed + j, chosen_props, question_info)
+                continue
             translated_questions = question_translate(settings[GUIDE_KEY], chosen_props, question_info, question_type=question_type)
             # 将问题信息添加到结果列表中
             group_result.extend(translated_questions)
+        if shared is not None:
+            # 配额已满而提前结束时，等待已经提交的提问完成后再释放共享内存
+            for _ in pending:
+                pass
+            shared.close()
         # 将同一组问题给出group属性名称
-        group_result = [n | {config.GROUP: f"{Path(dir_path).stem}-{question_type}-{i}"} for n in group_result]
+        group_result = [n | {config.GROUP: group_name} for n in group_result]
         result.extend(group_result)
+        if tracker is not None:
+            tracker.report()
+    if pool is not None:
+        pool.close()
+        pool.join()
     # 将结果写入文件
-    res_file: Path = Path(dir_path) / f"{question_type}.json"
-    with open(res_file, "w", encoding="utf8") as f:
-        json.dump(result, f, indent=4, ensure_ascii=False)
-    print(f"问题生成完成，共生成{len(result)}道题目，已保存至{res_file}")
+    if translate_stage is not None:
+        translate_stage.drain()
+        translate_pool.close()
+        translate_pool.join()
+        result_num = writer.close() - len(previous_result)
+    else:
+        with open(res_file, "w", encoding="utf8") as f:
+            json.dump(previous_result + result, f, indent=4, ensure_ascii=False)
+        result_num = len(result)
+    print(f"问题生成完成，共生成{result_num}道题目，已保存至{res_file}")
+    if store is not None:
+        # 结果文件写入成功后才保存本次运行的指纹
+        store.commit()
+        store.report(question_type)
+        store.close()
+    instrument.report()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="时间领域自动出题程序")
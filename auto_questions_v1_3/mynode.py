@@ -12,6 +12,7 @@ CONCLUSION = "conclusion"
 RULE = "rule"
 LAYER = "layer"
 CONDITION_LAYERS = "condition_layers"
+DERIVATION_COUNT = "derivation_count" # 节点被推出的次数，只用于节点视图
 
 class Node(element.Element):
     """推理图中的节点
@@ -42,3 +43,48 @@ class Node(element.Element):
         # 函数不再提供返回
         # 如果节点层数小于当前层数，返回结论命题，否则返回None
         # return self[CONCLUSION] if self[LAYER] <= curr_layer else None
+
+
+class NodeView:
+    """推理图列式存储中单个节点的视图\n
+    与Node相同，可以通过CONDITION、CONCLUSION、RULE、LAYER、CONDITION_LAYERS读取节点信息，
+    LAYER和CONDITION_LAYERS的修改会写回节点表，另外可以通过DERIVATION_COUNT读取节点被推出的次数
+    """
+    __slots__ = ("table", "props", "index")
+
+    def __init__(self, table, props, index: int):
+        """初始化节点视图
+
+        Args:
+            table (nodetable.NodeTable): 节点表
+            props (nodetable.PropTable): 命题表
+            index (int): 节点ID
+        """
+        self.table = table
+        self.props = props
+        self.index = index
+
+    def __getitem__(self, key: str):
+        t = self.table
+        if key == CONDITION:
+            return [self.props[int(j)] for j in t.premises_of(self.index)]
+        elif key == CONCLUSION:
+            return self.props[int(t.conclusion_ids[self.index])]
+        elif key == RULE:
+            return t.rules[int(t.rule_ids[self.index])]
+        elif key == LAYER:
+            return float(t.layers[self.index])
+        elif key == CONDITION_LAYERS:
+            return t.condition_layers[t.premise_ptr[self.index]:t.premise_ptr[self.index + 1]].tolist()
+        elif key == DERIVATION_COUNT:
+            return int(t.derivation_counts[self.index])
+        raise KeyError(f"节点没有属性'{key}'")
+
+    def __setitem__(self, key: str, value):
+        t = self.table
+        if key == LAYER:
+            t.layers[self.index] = value
+        elif key == CONDITION_LAYERS:
+            t.condition_layers[t.premise_ptr[self.index]:t.premise_ptr[self.index + 1]] = value
+        else:
+            raise KeyError(f"节点视图不能修改属性'{key}'")
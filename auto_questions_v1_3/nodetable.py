@@ -0,0 +1,272 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""推理图的列式存储：命题表将命题映射为整数ID，节点表按列保存节点的条件、结论、规则和层级
+"""
+
+import proposition as prop
+import mynode
+import numpy as np
+from collections.abc import Hashable, Iterator, Sequence
+from typing import Any
+
+# 数组的数据类型
+ID_DTYPE = np.int64
+"""命题ID、节点ID的数据类型"""
+RULE_DTYPE = np.int32
+"""规则ID的数据类型"""
+LAYER_DTYPE = np.float64
+"""层级的数据类型，未到达的层级为inf"""
+
+class PropTable:
+    """命题表，为每个不同的命题分配一个整数ID\n
+    相等的命题共用一个ID，命题表中保存第一次加入的命题对象
+    """
+    def __init__(self):
+        self.props: list[prop.Proposition] = []
+        """按照ID排列的命题"""
+        self._ids: dict[Hashable, int] = {}
+        """命题规范键到ID的映射"""
+
+    def intern(self, p: prop.Proposition) -> int:
+        """获取命题的ID，命题不在表中时将其加入
+
+        Args:
+            p (prop.Proposition): 命题
+
+        Returns:
+            int: 命题ID
+        """
+        k = p.key()
+        pid = self._ids.get(k)
+        if pid is None:
+            pid = len(self.props)
+            self._ids[k] = pid
+            self.props.append(p)
+        return pid
+
+    def find(self, p: prop.Proposition) -> int:
+        """查找命题的ID
+
+        Args:
+            p (prop.Proposition): 命题
+
+        Returns:
+            int: 命题ID，不在表中时返回-1
+        """
+        return self._ids.get(p.key(), -1)
+
+    def __getitem__(self, pid: int) -> prop.Proposition:
+        return self.props[pid]
+
+    def __len__(self) -> int:
+        return len(self.props)
+
+    def __contains__(self, p: prop.Proposition) -> bool:
+        return p.key() in self._ids
+
+    def copy(self) -> "PropTable":
+        """复制命题表，命题对象与原命题表共用
+
+        Returns:
+            PropTable: 命题表的副本
+        """
+        table = PropTable()
+        table.props = list(self.props)
+        table._ids = dict(self._ids)
+        return table
+
+    def select(self, mask: np.ndarray) -> tuple["PropTable", np.ndarray]:
+        """保留mask为True的命题，命题顺序不变
+
+        Args:
+            mask (np.ndarray): 与命题ID一一对应的布尔数组
+
+        Returns:
+            tuple[PropTable, np.ndarray]: 新的命题表，以及旧ID到新ID的映射(被删除的命题映射为-1)
+        """
+        table = PropTable()
+        for pid in np.flatnonzero(mask):
+            table.intern(self.props[pid])
+        id_map = np.where(mask, np.cumsum(mask) - 1, -1).astype(ID_DTYPE)
+        return table, id_map
+
+class NodeTable:
+    """按列保存的推理图节点\n
+    条件命题ID采用CSR格式保存：第i个节点的条件为premise_ids[premise_ptr[i]:premise_ptr[i+1]]
+    """
+    def __init__(self):
+        self.premise_ptr: np.ndarray = np.zeros(1, dtype=ID_DTYPE)
+        """条件命题ID的起始位置，长度为节点数量+1"""
+        self.premise_ids: np.ndarray = np.empty(0, dtype=ID_DTYPE)
+        """所有节点的条件命题ID"""
+        self.conclusion_ids: np.ndarray = np.empty(0, dtype=ID_DTYPE)
+        """节点的结论命题ID"""
+        self.rule_ids: np.ndarray = np.empty(0, dtype=RULE_DTYPE)
+        """节点的规则ID"""
+        self.layers: np.ndarray = np.empty(0, dtype=LAYER_DTYPE)
+        """节点的层级"""
+        self.condition_layers: np.ndarray = np.empty(0, dtype=LAYER_DTYPE)
+        """条件的层级，与premise_ids一一对应"""
+        self.derivation_counts: np.ndarray = np.empty(0, dtype=ID_DTYPE)
+        """节点被推出的次数，相同规则、相同条件集合、相同结论的节点合并为一个节点"""
+        self.rules: list[Any] = []
+        """按照ID排列的推理规则"""
+        self._rule_ids: dict[int, int] = {}
+        """推理规则对象id到规则ID的映射"""
+
+    def rule_id(self, r: Any) -> int:
+        """获取推理规则的ID，规则不在表中时将其加入
+
+        Args:
+            r (Any): 推理规则
+
+        Returns:
+            int: 规则ID
+        """
+        rid = self._rule_ids.get(id(r))
+        if rid is None:
+            rid = len(self.rules)
+            self._rule_ids[id(r)] = rid
+            self.rules.append(r)
+        return rid
+
+    def copy(self) -> "NodeTable":
+        """复制节点表，规则对象与原节点表共用
+
+        Returns:
+            NodeTable: 节点表的副本
+        """
+        table = NodeTable()
+        for name in ("premise_ptr", "premise_ids", "conclusion_ids", "rule_ids", "layers", "condition_layers", "derivation_counts"):
+            setattr(table, name, getattr(self, name).copy())
+        table.rules = list(self.rules)
+        table._rule_ids = dict(self._rule_ids)
+        return table
+
+    def select(self, mask: np.ndarray, id_map: np.ndarray) -> "NodeTable":
+        """保留mask为True的节点，并按照id_map重新编号命题ID，节点顺序不变
+
+        Args:
+            mask (np.ndarray): 与节点ID一一对应的布尔数组
+            id_map (np.ndarray): 旧命题ID到新命题ID的映射
+
+        Returns:
+            NodeTable: 新的节点表
+        """
+        table = NodeTable()
+        premise_mask = np.repeat(mask, self.premise_counts())
+        table.premise_ptr = np.concatenate([[0], np.cumsum(self.premise_counts()[mask])]).astype(ID_DTYPE)
+        table.premise_ids = id_map[self.premise_ids[premise_mask]]
+        table.conclusion_ids = id_map[self.conclusion_ids[mask]]
+        table.rule_ids = self.rule_ids[mask]
+        table.layers = self.layers[mask]
+        table.condition_layers = self.condition_layers[premise_mask]
+        table.derivation_counts = self.derivation_counts[mask]
+        table.rules = list(self.rules)
+        table._rule_ids = dict(self._rule_ids)
+        return table
+
+    def extend(self, premises: Sequence[Sequence[int]], conclusions: Sequence[int], rules: Sequence[int]):
+        """批量添加节点
+
+        Args:
+            premises (Sequence[Sequence[int]]): 每个节点的条件命题ID
+            conclusions (Sequence[int]): 每个节点的结论命题ID
+            rules (Sequence[int]): 每个节点的规则ID
+        """
+        if len(conclusions) == 0:
+            return
+        lengths = np.fromiter((len(p) for p in premises), dtype=ID_DTYPE, count=len(premises))
+        flat = np.fromiter((i for p in premises for i in p), dtype=ID_DTYPE, count=int(lengths.sum()))
+        self.premise_ptr = np.concatenate([self.premise_ptr, self.premise_ptr[-1] + np.cumsum(lengths)])
+        self.premise_ids = np.concatenate([self.premise_ids, flat])
+        self.conclusion_ids = np.concatenate([self.conclusion_ids, np.asarray(conclusions, dtype=ID_DTYPE)])
+        self.rule_ids = np.concatenate([self.rule_ids, np.asarray(rules, dtype=RULE_DTYPE)])
+        self.layers = np.concatenate([self.layers, np.full(len(conclusions), np.inf, dtype=LAYER_DTYPE)])
+        self.condition_layers = np.concatenate([self.condition_layers, np.full(len(flat), np.inf, dtype=LAYER_DTYPE)])
+        self.derivation_counts = np.concatenate([self.derivation_counts, np.ones(len(conclusions), dtype=ID_DTYPE)])
+
+    def __len__(self) -> int:
+        return len(self.conclusion_ids)
+
+    def premises_of(self, i: int) -> np.ndarray:
+        """获取第i个节点的条件命题ID
+
+        Args:
+            i (int): 节点ID
+
+        Returns:
+            np.ndarray: 条件命题ID
+        """
+        return self.premise_ids[self.premise_ptr[i]:self.premise_ptr[i + 1]]
+
+    def premise_counts(self) -> np.ndarray:
+        """获取每个节点的条件数量
+
+        Returns:
+            np.ndarray: 条件数量
+        """
+        return np.diff(self.premise_ptr)
+
+    def premise_owner(self) -> np.ndarray:
+        """获取premise_ids中每个条件所属的节点ID
+
+        Returns:
+            np.ndarray: 节点ID，与premise_ids一一对应
+        """
+        return np.repeat(np.arange(len(self), dtype=ID_DTYPE), self.premise_counts())
+
+    def prop_sequence(self, node_ids: np.ndarray) -> np.ndarray:
+        """按照节点顺序依次列出每个节点的条件命题ID和结论命题ID
+
+        Args:
+            node_ids (np.ndarray): 节点ID，需要按升序排列
+
+        Returns:
+            np.ndarray: 命题ID序列
+        """
+        counts = self.premise_counts()[node_ids]
+        total = int(counts.sum()) + len(node_ids)
+        seq = np.empty(total, dtype=ID_DTYPE)
+        is_conclusion = np.zeros(total, dtype=bool)
+        is_conclusion[np.cumsum(counts + 1) - 1] = True
+        seq[is_conclusion] = self.conclusion_ids[node_ids]
+        premise_mask = np.repeat(np.isin(np.arange(len(self)), node_ids), self.premise_counts())
+        seq[~is_conclusion] = self.premise_ids[premise_mask]
+        return seq
+
+def first_occurrence(seq: np.ndarray) -> np.ndarray:
+    """对ID序列去重，保持每个ID第一次出现的顺序
+
+    Args:
+        seq (np.ndarray): ID序列
+
+    Returns:
+        np.ndarray: 去重后的ID序列
+    """
+    if len(seq) == 0:
+        return seq
+    uniq, first = np.unique(seq, return_index=True)
+    return uniq[np.argsort(first, kind="stable")]
+
+class NodeList(Sequence):
+    """推理图节点的只读序列，元素为节点视图
+    """
+    def __init__(self, table: NodeTable, props: PropTable):
+        self.table = table
+        self.props = props
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __getitem__(self, i: int) -> "mynode.NodeView":
+        if i < 0:
+            i += len(self.table)
+        if not 0 <= i < len(self.table):
+            raise IndexError(f"节点序号{i}超出范围")
+        return mynode.NodeView(self.table, self.props, i)
+
+    def __iter__(self) -> Iterator["mynode.NodeView"]:
+        for i in range(len(self.table)):
+            yield mynode.NodeView(self.table, self.props, i)
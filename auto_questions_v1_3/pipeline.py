@@ -0,0 +1,145 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""出题流水线：翻译和序列化在进程池中进行，写入文件在单独的线程中进行\n
+推理和提问依赖跨重置的状态(随机数序列、增量推理的推理图、配额和指纹库)，仍在主进程中依次进行；
+翻译、计算难度等级和序列化只依赖单道试题，提交到进程池后主进程直接开始下一次提问或下一次重置的推理。
+各阶段之间等待处理的任务数量有上限，下游来不及处理时上游等待；结果按照提交顺序取回和写入，与工作进程的数量和完成顺序无关
+"""
+
+import instrument
+import json
+import os
+import queue
+import threading
+from collections import deque
+from collections.abc import Callable, Sequence
+from multiprocessing.pool import AsyncResult, Pool
+from pathlib import Path
+from typing import Any, Optional
+
+STATS: dict[str, int] = {"submitted": 0, "blocked": 0, "written": 0}
+"""流水线的统计信息：提交的任务数量、因等待处理的任务或批次达到上限而等待的次数、写入文件的数组元素数量"""
+instrument.register("出题流水线", lambda: dict(STATS))
+_END = object()
+"""写入线程的结束标记"""
+
+def serialize_item(item: Any) -> str:
+    """将数组元素序列化为json.dump(..., indent=4)中该元素的文本
+
+    Args:
+        item (Any): 数组元素
+
+    Returns:
+        str: 缩进一层后的JSON文本
+    """
+    # 字符串中的换行会被转义，文本中的换行都是缩进产生的
+    return "    " + json.dumps(item, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+
+class OrderedStage:
+    """流水线的一个阶段：任务提交到进程池，结果按照提交顺序交给下游
+    """
+    def __init__(self, pool: Pool, func: Callable[..., Any], max_pending: int, downstream: Callable[[Any], None]):
+        """初始化流水线阶段
+
+        Args:
+            pool (Pool): 执行任务的进程池
+            func (Callable[..., Any]): 任务函数，需要可以被序列化
+            max_pending (int): 最多等待处理的任务数量
+            downstream (Callable[[Any], None]): 接收结果的下游
+        """
+        assert max_pending > 0, "等待处理的任务数量上限必须为正数"
+        self.pool = pool
+        self.func = func
+        self.max_pending = max_pending
+        self.downstream = downstream
+        self._pending: deque[AsyncResult] = deque()
+        """按照提交顺序排列的未交给下游的任务"""
+
+    def submit(self, *args):
+        """提交一个任务，等待处理的任务达到上限时先等待最早的任务完成
+
+        Args:
+            *args: 任务函数的参数
+        """
+        if len(self._pending) >= self.max_pending:
+            STATS["blocked"] += 1
+            self.downstream(self._pending.popleft().get())
+        self._pending.append(self.pool.apply_async(self.func, args))
+        STATS["submitted"] += 1
+        # 已经完成的任务按照提交顺序交给下游，不等待未完成的任务
+        while len(self._pending) > 0 and self._pending[0].ready():
+            self.downstream(self._pending.popleft().get())
+
+    def drain(self):
+        """等待所有任务完成并交给下游
+        """
+        while len(self._pending) > 0:
+            self.downstream(self._pending.popleft().get())
+
+class JsonArrayWriter:
+    """在单独的线程中将已经序列化的数组元素依次写入文件，写出的文件与json.dump(..., indent=4)的结果相同
+
+    元素先写入同名的.tmp临时文件，全部写入成功后才替换目标文件，出错时目标文件保持不变
+    """
+    def __init__(self, path: str | Path, max_queue: int, head: Sequence[str] = ()):
+        """启动写入线程
+
+        Args:
+            path (str | Path): 目标文件路径
+            max_queue (int): 最多等待写入的批次数量
+            head (Sequence[str], optional): 最先写入的已经序列化的数组元素. 默认为空.
+        """
+        self.path = Path(path)
+        self.tmp_path = self.path.with_suffix(".tmp")
+        """写入过程中使用的临时文件"""
+        self.count: int = 0
+        """已经写入的数组元素数量"""
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._error: Optional[BaseException] = None
+        self._queue.put(list(head))
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, items: list[str]):
+        """提交一批已经序列化的数组元素，等待写入的批次达到上限时等待
+
+        Args:
+            items (list[str]): serialize_item()得到的文本
+        """
+        if self._error is not None:
+            self.tmp_path.unlink(missing_ok=True)
+            raise self._error
+        if self._queue.full():
+            STATS["blocked"] += 1
+        self._queue.put(items)
+
+    def close(self) -> int:
+        """写入所有元素并关闭文件，成功时用临时文件替换目标文件，出错时删除临时文件
+
+        Returns:
+            int: 写入的数组元素数量
+        """
+        self._queue.put(_END)
+        self._thread.join()
+        if self._error is not None:
+            self.tmp_path.unlink(missing_ok=True)
+            raise self._error
+        os.replace(self.tmp_path, self.path)
+        return self.count
+
+    def _run(self):
+        try:
+            with open(self.tmp_path, "w", encoding="utf8") as f:
+                f.write("[")
+                while (items := self._queue.get()) is not _END:
+                    for item in items:
+                        f.write(("," if self.count > 0 else "") + "\n" + item)
+                        self.count += 1
+                        STATS["written"] += 1
+                f.write("\n]" if self.count > 0 else "]")
+        except BaseException as e:
+            self._error = e
+            # 出错后继续取出队列中的批次，避免提交方一直等待
+            while self._queue.get() is not _END:
+                pass
@@ -151,6 +151,10 @@ class Proposition(element.Element):
             list[str]: 主要属性列表
         """
         return [key for key in self.attrs if key not in NO_MAIN_ATTR]
+
+    def _key_attrs(self) -> list[str]:
+        # 与__eq__保持一致，规范键忽略ASKABLE、PRECISE属性
+        return self.main_attrs()
     
     # 06-20新增：返回命题的所有主要属性元素
     def all_attr_elements(self) -> list[element.Element]:
@@ -0,0 +1,125 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""按照目标配额生成试题，所有配额都满足后停止生成
+"""
+
+import config
+from typing import Any
+
+# 配额设置中的字段
+STEP_MIN = "min" # 推理步骤数范围的下限(包含)
+STEP_MAX = "max" # 推理步骤数范围的上限(包含)
+NUM = "num" # 目标数量
+# 可以设置配额的维度
+QUOTA_DIMS = [config.LEVEL, config.QUESTION_TYPE, config.STEP, config.SCENE_TYPE]
+"""可以设置配额的维度"""
+
+class QuotaTracker:
+    """试题配额记录器\n
+    配额的写法示例：
+    {
+        "level": {"1": 100, "2": 200, "3": 300},
+        "question_type": {"<命题标签>": 50},
+        "step": [{"min": 0, "max": 3, "num": 200}, {"min": 4, "max": 100, "num": 400}],
+        "scene_type": {"<情景类型>": 600},
+    }\n
+    只有当试题在每个已设置的维度上都落入未满的配额时，试题才会被接受
+    """
+    def __init__(self, quota: dict[str, Any]):
+        """初始化配额记录器
+
+        Args:
+            quota (dict[str, Any]): 配额设置
+
+        Raises:
+            ValueError: 配额维度不合法
+        """
+        for dim in quota:
+            if dim not in QUOTA_DIMS:
+                raise ValueError(f"不支持的配额维度{dim}，可用的维度为{QUOTA_DIMS}")
+        self.targets: dict[str, dict[str, int]] = {}
+        """每个维度中各个配额的目标数量"""
+        self.step_ranges: list[tuple[int, int, str]] = []
+        """推理步骤数的范围及其配额名称"""
+        for dim, value in quota.items():
+            if dim == config.STEP:
+                self.targets[dim] = {}
+                for r in value:
+                    name = f"{r[STEP_MIN]}-{r[STEP_MAX]}"
+                    self.step_ranges.append((r[STEP_MIN], r[STEP_MAX], name))
+                    self.targets[dim][name] = r[NUM]
+            else:
+                self.targets[dim] = {str(k): v for k, v in value.items()}
+        self.counts: dict[str, dict[str, int]] = {dim: {name: 0 for name in buckets} for dim, buckets in self.targets.items()}
+        """每个维度中各个配额已经接受的数量"""
+        self.skipped: int = 0
+        """因为配额已满或不在配额中而跳过的试题数量"""
+
+    def _get_buckets(self, question_info: dict[str, Any]) -> dict[str, list[str]] | None:
+        """获取试题在各个维度上落入的配额
+
+        Args:
+            question_info (dict[str, Any]): 试题的统计信息，包含level、question_type、step、scene_type
+
+        Returns:
+            dict[str, list[str]] | None: 各个维度上的配额名称，如果在某个维度上不属于任何配额则返回None
+        """
+        buckets: dict[str, list[str]] = {}
+        for dim in self.targets:
+            if dim == config.STEP:
+                step: int = question_info[config.STEP]
+                names = [name for low, high, name in self.step_ranges if low <= step <= high][:1]
+            elif dim == config.QUESTION_TYPE:
+                # 一道试题可能有多个命题标签，每个设置了配额的标签都需要计入配额
+                # 没有标签的选项(如"以上都不对")和没有设置配额的标签不参与判断
+                names = sorted({name for name in question_info[config.QUESTION_TYPE] if name in self.targets[dim]})
+            else:
+                names = [str(question_info[dim])]
+            if len(names) == 0 or any(name not in self.targets[dim] for name in names):
+                return None
+            buckets[dim] = names
+        return buckets
+
+    def can_accept(self, question_info: dict[str, Any]) -> bool:
+        """判断试题能否被接受，即试题在每个已设置的维度上都落入未满的配额
+
+        Args:
+            question_info (dict[str, Any]): 试题的统计信息，包含level、question_type、step、scene_type
+
+        Returns:
+            bool: 试题能否被接受
+        """
+        buckets = self._get_buckets(question_info)
+        if buckets is None or any(self.counts[dim][name] >= self.targets[dim][name] for dim, names in buckets.items() for name in names):
+            self.skipped += 1
+            return False
+        return True
+
+    def add(self, question_info: dict[str, Any]):
+        """将已接受的试题计入配额
+
+        Args:
+            question_info (dict[str, Any]): 试题的统计信息，包含level、question_type、step、scene_type
+        """
+        buckets = self._get_buckets(question_info)
+        assert buckets is not None, "试题不属于任何配额，不能计入"
+        for dim, names in buckets.items():
+            for name in names:
+                self.counts[dim][name] += 1
+
+    def is_full(self) -> bool:
+        """判断是否所有配额都已满足
+
+        Returns:
+            bool: 所有配额都已满足
+        """
+        return all(self.counts[dim][name] >= target for dim, buckets in self.targets.items() for name, target in buckets.items())
+
+    def report(self):
+        """输出每个配额的完成进度
+        """
+        print(f"配额进度(已跳过{self.skipped}道试题)：")
+        for dim, buckets in self.targets.items():
+            progress = "，".join(f"{name}: {self.counts[dim][name]}/{target}" for name, target in buckets.items())
+            print(f"  {dim}: {progress}")
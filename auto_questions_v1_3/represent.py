@@ -193,6 +193,37 @@ def time_is_neighbor(time1: "CustomTime", time2: "CustomTime") -> bool:
     delta_list = get_time_delta_range(time1, time2)
     return len(delta_list) == 1 and delta_list[0].is_one()
 
+def get_base_unit(value: Any) -> Optional[str]:
+    """获取时间或时间间隔的基本单位
+
+    Args:
+        value (Any): 时间或时间间隔
+
+    Returns:
+        Optional[str]: 基本单位，不是时间或时间间隔时返回None
+    """
+    if isinstance(value, CustomTime):
+        return TIME_UNIT[TIME_KINDS][value.kind][BASE]
+    if isinstance(value, CustomTimeDelta):
+        return TIME_UNIT[TIMEDELTA_KINDS][value.kind][BASE]
+    return None
+
+def time_ordinal(value: Any) -> Optional[int]:
+    """将时间或时间间隔转换为基本单位的整数，基本单位相同的整数可以直接比较和相加
+
+    Args:
+        value (Any): 时间或时间间隔
+
+    Returns:
+        Optional[int]: 基本单位的整数，不是时间或时间间隔时返回None
+    """
+    base = get_base_unit(value)
+    if base is None:
+        return None
+    if isinstance(value, CustomTime):
+        return value.convert2base()[base]
+    return value[base]
+
 class CustomTime(element.Element):
     """自定义时间的抽象基类
     """
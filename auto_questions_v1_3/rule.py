@@ -12,13 +12,22 @@ import proposition as prop
 import mynode
 import json5
 from tqdm import tqdm
-from itertools import product, permutations
-from collections.abc import Sequence
+from itertools import permutations
+from collections.abc import Callable, Sequence
+from typing import Any, Optional
 import warnings
-from functools import reduce
-from copy import deepcopy
+from bisect import bisect_left
+import copy
+import hashlib
+import json
+import instrument
+from collections import OrderedDict
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import multiprocessing as mp
+import operator
+import re
+import time
+import numpy as np
 
 # constants.
 KIND = "kind"
@@ -32,6 +41,197 @@ CONCLUSION = "conclusion"
 SYMMETRIC = "symmetric"
 JUDGE = "judge"
 
+COMPARE_OPS: dict[str, Callable[[Any, Any], Any]] = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+"""判断条件中支持的比较运算符"""
+_COMPARISON_PATTERN = re.compile(r"^(.+?)(<=|>=|==|<|>)(.+)$")
+_TERM_PATTERN = re.compile(r"^\s*(\w+)\['(\w+)'\]\s*$")
+
+class RuleMemo:
+    """进程级的推理结果缓存，按照最近最少使用的顺序淘汰\n
+    键为(规则定义的哈希值, 条件命题的规范键)，不同重置中重新创建的同名规则可以共用推理结果
+    """
+    def __init__(self, maxsize: int):
+        """初始化推理结果缓存
+
+        Args:
+            maxsize (int): 缓存的最大条目数
+        """
+        self.maxsize: int = maxsize
+        self._entries: OrderedDict[tuple, tuple[prop.Proposition, ...]] = OrderedDict()
+        self.hits: int = 0
+        """命中次数"""
+        self.misses: int = 0
+        """未命中次数"""
+        self.evictions: int = 0
+        """淘汰的条目数"""
+
+    def get(self, key: tuple) -> tuple[prop.Proposition, ...] | None:
+        """查询推理结果
+
+        Args:
+            key (tuple): 缓存键
+
+        Returns:
+            tuple[prop.Proposition, ...] | None: 推理结果，未命中时返回None
+        """
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: tuple, value: tuple[prop.Proposition, ...]):
+        """保存推理结果
+
+        Args:
+            key (tuple): 缓存键
+            value (tuple[prop.Proposition, ...]): 推理结果
+        """
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def discard_rule(self, definition_hash: str):
+        """删除某个规则定义的所有推理结果
+
+        Args:
+            definition_hash (str): 规则定义的哈希值
+        """
+        for key in [k for k in self._entries if k[0] == definition_hash]:
+            del self._entries[key]
+
+    def stats(self) -> dict[str, int | float]:
+        """获取缓存的统计信息
+
+        Returns:
+            dict[str, int | float]: 统计信息
+        """
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0, "size": len(self._entries), "evictions": self.evictions}
+
+RULE_MEMO = RuleMemo(config.RULE_MEMO_SIZE)
+"""进程级的推理结果缓存"""
+instrument.register("推理规则缓存", RULE_MEMO.stats)
+_RULE_FILE_CACHE: dict[tuple[str, int], list[dict]] = {}
+"""(推理规则文件路径, 修改时间)到文件中规则定义的缓存，避免每次获取推理规则时重新解析文件"""
+
+JOIN_STATS: dict[str, int] = {"reordered": 0, "partials": 0, "tuples": 0, "vectorised": 0, "masked": 0}
+"""多条件规则连接的统计信息：调整连接顺序的次数、产生的部分组合数量、产生的完整组合数量、按数组判断的候选命题数量、其中被排除的数量"""
+instrument.register("多条件规则连接", lambda: dict(JOIN_STATS))
+
+def copy_conclusion(conclusion: prop.Proposition) -> prop.Proposition:
+    """复制缓存中的结论命题，属性值与原命题共用，避免不同推理图之间共用同一个命题对象
+
+    Args:
+        conclusion (prop.Proposition): 结论命题
+
+    Returns:
+        prop.Proposition: 结论命题的副本
+    """
+    res = copy.copy(conclusion)
+    res.attrs = dict(conclusion.attrs)
+    res._translated_questions = {}
+    return res
+
+class PropIndex:
+    """按照命题类型划分的命题索引，命题只能追加，并按照加入的顺序编号\n
+    推理图在每轮推理中共用一个索引，通过view()将旧命题和新命题以只读视图的形式交给推理规则
+    """
+    def __init__(self, props: Sequence[prop.Proposition] = ()):
+        self.size: int = 0
+        """索引中的命题数量"""
+        self._positions: dict[str, list[int]] = {}
+        """每种类型的命题在索引中的编号"""
+        self._props: dict[str, list[prop.Proposition]] = {}
+        """每种类型的命题"""
+        self._filtered: dict[tuple[str, tuple[str, ...]], tuple[list[prop.Proposition], list[int], int]] = {}
+        """按照(类型, 属性名)筛选后的命题、编号，以及已经筛选过的该类型命题数量"""
+        self.extend(props)
+
+    def extend(self, props: Sequence[prop.Proposition]):
+        """向索引中追加命题
+
+        Args:
+            props (Sequence[prop.Proposition]): 命题序列
+        """
+        for p in props:
+            self._positions.setdefault(p.kind, []).append(self.size)
+            self._props.setdefault(p.kind, []).append(p)
+            self.size += 1
+
+    def select(self, kind: str, attrs: Sequence[str], start: int = 0, end: int | None = None) -> list[prop.Proposition]:
+        """获取编号在[start, end)之间、类型为kind且具有attrs中所有属性的命题，保持加入的顺序
+
+        Args:
+            kind (str): 命题类型
+            attrs (Sequence[str]): 属性名
+            start (int, optional): 编号的起点. 默认为0.
+            end (int | None, optional): 编号的终点，为None时不限制. 默认为None.
+
+        Returns:
+            list[prop.Proposition]: 命题列表
+        """
+        key = (kind, tuple(attrs))
+        kind_props = self._props.get(kind, [])
+        kind_positions = self._positions.get(kind, [])
+        props, positions, checked = self._filtered.get(key, ([], [], 0))
+        for p, pos in zip(kind_props[checked:], kind_positions[checked:]):
+            if all(p.has_attr(attr) for attr in attrs):
+                props.append(p)
+                positions.append(pos)
+        self._filtered[key] = (props, positions, len(kind_props))
+        low = bisect_left(positions, start)
+        high = bisect_left(positions, end) if end is not None else len(positions)
+        return props[low:high]
+
+    def view(self, start: int = 0, end: int | None = None) -> "PropIndexView":
+        """获取编号在[start, end)之间的命题的只读视图
+
+        Args:
+            start (int, optional): 编号的起点. 默认为0.
+            end (int | None, optional): 编号的终点，为None时为当前的命题数量. 默认为None.
+
+        Returns:
+            PropIndexView: 只读视图
+        """
+        return PropIndexView(self, start, self.size if end is None else end)
+
+class PropIndexView:
+    """命题索引中一段编号范围的只读视图
+    """
+    __slots__ = ("index", "start", "end")
+
+    def __init__(self, index: PropIndex, start: int, end: int):
+        self.index = index
+        self.start = start
+        self.end = end
+
+    def select(self, kind: str, attrs: Sequence[str]) -> list[prop.Proposition]:
+        """获取视图中类型为kind且具有attrs中所有属性的命题
+
+        Args:
+            kind (str): 命题类型
+            attrs (Sequence[str]): 属性名
+
+        Returns:
+            list[prop.Proposition]: 命题列表
+        """
+        return self.index.select(kind, attrs, self.start, self.end)
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
 class Rule(element.Element):
     """推理规则
     """
@@ -42,19 +242,50 @@ class Rule(element.Element):
         assert self.has_attr(JUDGE), f"推理规则{name}缺少判断方式字段"
         assert self.has_attr(CONCLUSION), f"推理规则{name}缺少结论字段"
         self[SYMMETRIC] = kwargs.get(SYMMETRIC, False)
-        # 添加缓存（限制大小防止内存过度使用）
-        self._judge_cache = {}
-        self._conclusion_cache = {}
         self._compiled_judges = None
-        self._max_cache_size = 10000  # 缓存大小限制
+        self._judge_vars: Optional[list[set[int]]] = None
+        """每个判断条件引用的条件命题序号"""
+        self._judge_stats: list[list[int]] = [[0, 0] for _ in self[JUDGE]]
+        """每个判断条件的执行次数和通过次数，用于估计通过率"""
+        self._vector_judges: Optional[list[Optional[tuple[list[tuple[int, str]], str, list[tuple[int, str]]]]]] = None
+        """可以按数组执行的比较类判断条件，元素为(左侧的项, 运算符, 右侧的项)，每一项为(条件序号, 属性名)，不适用的判断条件为None"""
+        # 10-19修改：推理结果改为保存在进程级的RULE_MEMO中，键为规则定义的哈希值和条件命题的规范键
+        self.definition_hash: str = hashlib.sha1(json.dumps([self.kind, self[CONDITION], self[JUDGE], self[CONCLUSION], self[SYMMETRIC]], ensure_ascii=False, sort_keys=True).encode("utf8")).hexdigest()
+        """规则定义的哈希值，定义相同的规则共用推理结果"""
+        self._relation_mappings: dict[bool, tuple[str, str, list[tuple[str, str]]]] = {}
+        """relation类型规则的属性映射，键为是否对称执行，值为(条件类型, 结论类型, [(条件属性, 结论属性)])"""
+        if self.kind == RELATION:
+            for symmetric_execute in ([False, True] if self[SYMMETRIC] else [False]):
+                condition_dict: dict = self[CONDITION] if not symmetric_execute else self[CONCLUSION]
+                conclusion_dict: dict = self[CONCLUSION] if not symmetric_execute else self[CONDITION]
+                self._relation_mappings[symmetric_execute] = (condition_dict[KIND], conclusion_dict[KIND], list(zip(condition_dict[ATTRS], conclusion_dict[ATTRS])))
 
     def translate(self, lang, require = None, **kwargs):
         return super().translate(lang, require, **kwargs)
 
+    def input_kinds(self) -> set[str]:
+        """获取规则条件的命题类型，与reason()中筛选条件命题的方式一致
+
+        Returns:
+            set[str]: 条件的命题类型
+        """
+        if self.kind == RULE:
+            return {c[KIND] for c in self[CONDITION]}
+        return {self[CONDITION][KIND]}
+
+    def output_kinds(self) -> set[str]:
+        """获取规则结论的命题类型
+
+        Returns:
+            set[str]: 结论的命题类型
+        """
+        if self.kind == RULE:
+            return {c[KIND] for c in self[CONCLUSION]}
+        return {self[CONCLUSION][KIND]}
+
     def clear_cache(self):
         """清理缓存以释放内存"""
-        self._judge_cache.clear()
-        self._conclusion_cache.clear()
+        RULE_MEMO.discard_rule(self.definition_hash)
         print(f"推理规则 {self.name} 的缓存已清理")
 
     def _get_relation_conclusion(self, props: Sequence[prop.Proposition], symmetric_execute: bool = False) -> list[prop.Proposition]:
@@ -68,36 +299,80 @@ class Rule(element.Element):
             list[prop.Proposition]: 结论
         """
         results: list[prop.Proposition] = []
-        condition_dict: dict = self[CONDITION] if not symmetric_execute else self[CONCLUSION]
-        conclusion_dict: dict = self[CONCLUSION] if not symmetric_execute else self[CONDITION]
+        condition_kind, conclusion_kind, attr_pairs = self._relation_mappings[symmetric_execute]
         curr_prop = props[0]
         # 05-03增加：如果curr_prop不可被提问，则不进行推理
         if not curr_prop[prop.ASKABLE]:
             return results
         # 条件是否满足规则
-        if curr_prop.kind != condition_dict[KIND]:
+        if curr_prop.kind != condition_kind:
             if self[SYMMETRIC] and not symmetric_execute:
                 return self._get_relation_conclusion(props, symmetric_execute=True)
             return results
-        attrs: list[str] = condition_dict[ATTRS]
-        for attr in attrs:
+        for attr, _ in attr_pairs:
             if not curr_prop.has_attr(attr):
                 return results
         # 判断规则是否可以使用
-        judge_dict: list[str] = self[JUDGE]
-        for judge in judge_dict:
-            judge_res: bool = eval(judge)
-            if not judge_res:
-                return results
+        if not self._judge_relation(curr_prop):
+            return results
         # 获取结论
-        res_prop = prop.Proposition(kind=conclusion_dict[KIND])
-        condition_attrs: list[str] = condition_dict[ATTRS]
-        conclusion_attrs: list[str] = conclusion_dict[ATTRS]
-        for attr1, attr2 in zip(condition_attrs, conclusion_attrs):
+        results.append(self._map_relation(curr_prop, conclusion_kind, attr_pairs))
+        return results
+
+    def _judge_relation(self, curr_prop: prop.Proposition) -> bool:
+        """判断relation类型的规则能否用于命题
+
+        Args:
+            curr_prop (prop.Proposition): 条件命题
+
+        Returns:
+            bool: 规则能否使用
+        """
+        if self._compiled_judges is None:
+            self._compiled_judges = [compile(judge, '<string>', 'eval') for judge in self[JUDGE]]
+        return all(eval(judge, globals(), {"self": self, "curr_prop": curr_prop}) for judge in self._compiled_judges)
+
+    def _map_relation(self, curr_prop: prop.Proposition, conclusion_kind: str, attr_pairs: list[tuple[str, str]]) -> prop.Proposition:
+        """按照属性映射由条件命题得到结论命题
+
+        Args:
+            curr_prop (prop.Proposition): 条件命题
+            conclusion_kind (str): 结论的命题类型
+            attr_pairs (list[tuple[str, str]]): (条件属性, 结论属性)的列表
+
+        Returns:
+            prop.Proposition: 结论命题
+        """
+        res_prop = prop.Proposition(kind=conclusion_kind)
+        for attr1, attr2 in attr_pairs:
             res_prop[attr2] = curr_prop[attr1]
         # 05-03增加：结论命题继承条件命题的askable属性
         res_prop[prop.ASKABLE] = curr_prop[prop.ASKABLE]
-        results.append(res_prop)
+        return res_prop
+
+    def _reason_relation(self, new_view: PropIndexView, reason_round: int, deadline: Optional[float] = None, max_results: Optional[int] = None) -> list[mynode.Node]:
+        """relation类型规则的推理：只有一个条件，因此只需对新命题逐个按照属性映射得到结论
+
+        Args:
+            new_view (PropIndexView): 新命题
+            reason_round (int): 推理的轮次
+            deadline (Optional[float], optional): 停止推理的时刻，由time.perf_counter()得到. 默认为None.
+            max_results (Optional[int], optional): 最多得到的节点数量. 默认为None.
+
+        Returns:
+            list[mynode.Node]: 推理得到的新命题节点
+        """
+        results: list[mynode.Node] = []
+        condition_kind, conclusion_kind, attr_pairs = self._relation_mappings[False]
+        new_props = new_view.select(condition_kind, self[CONDITION][ATTRS])
+        for curr_prop in tqdm(new_props, desc=f"第{reason_round}轮推理使用推理规则{self.name}"):
+            if (max_results is not None and len(results) >= max_results) or (deadline is not None and time.perf_counter() >= deadline):
+                break
+            # 05-03增加：如果curr_prop不可被提问，则不进行推理
+            if not curr_prop[prop.ASKABLE] or not self._judge_relation(curr_prop):
+                continue
+            node_dict = {mynode.CONDITION: [curr_prop], mynode.CONCLUSION: self._map_relation(curr_prop, conclusion_kind, attr_pairs), mynode.RULE: self}
+            results.append(mynode.Node(**node_dict))
         return results
 
     def _get_rule_conclusion(self, props: Sequence[prop.Proposition]) -> list[prop.Proposition]:
@@ -112,16 +387,42 @@ class Rule(element.Element):
         Raises:
             ValueError: 当执行注入语句出现错误时
         """
-        # 优化：缓存判断结果
-        prop_hash = tuple(id(p) for p in props)
-        if prop_hash in self._conclusion_cache:
-            return self._conclusion_cache[prop_hash]
-            
+        # 10-19修改：按照规则定义和条件命题的规范键查询进程级的推理结果缓存
+        memo_key = (self.definition_hash, tuple((p.key(), p[prop.ASKABLE], p[prop.PRECISE]) for p in props))
+        cached = RULE_MEMO.get(memo_key)
+        if cached is not None:
+            return [copy_conclusion(c) for c in cached]
+        results = self._compute_rule_conclusion(props)
+        RULE_MEMO.put(memo_key, tuple(copy_conclusion(c) for c in results))
+        return results
+
+    def derive(self, props: Sequence[prop.Proposition]) -> list[mynode.Node]:
+        """当推理规则的类型为rule时，根据条件推理结论，并构造推理节点
+
+        Args:
+            props (Sequence[prop.Proposition]): 条件
+
+        Returns:
+            list[mynode.Node]: 推理节点，条件不满足判断条件时为空列表
+        """
+        return [mynode.Node(**{mynode.CONDITION: list(props), mynode.CONCLUSION: con, mynode.RULE: self}) for con in self._get_rule_conclusion(props)]
+
+    def _compute_rule_conclusion(self, props: Sequence[prop.Proposition]) -> list[prop.Proposition]:
+        """当推理规则的类型为rule时，根据条件计算结论，不使用缓存
+
+        Args:
+            props (Sequence[prop.Proposition]): 条件
+
+        Returns:
+            list[prop.Proposition]: 结论
+
+        Raises:
+            ValueError: 当执行注入语句出现错误时
+        """
         results: list[prop.Proposition] = []
         # 05-03增加：计算可提问性，如果props都不可被提问，则不进行推理
         askable = any([p[prop.ASKABLE] for p in props])
         if not askable:
-            self._conclusion_cache[prop_hash] = results
             return results
         condition_dicts: list[dict] = self[CONDITION]
         conclusion_dicts: list[dict] = self[CONCLUSION]
@@ -129,13 +430,11 @@ class Rule(element.Element):
         for p, c in zip(props, condition_dicts):
             # 如果输入的类型不满足条件要求的类型，则返回空列表
             if p.kind != c[KIND]:
-                self._conclusion_cache[prop_hash] = results
                 return results
             # 如果输入的属性不满足条件要求的属性，则返回空列表
             attrs: list[str] = c[ATTRS]
             for attr in attrs:
                 if not p.has_attr(attr):
-                    self._conclusion_cache[prop_hash] = results
                     return results
             # 利用exec()函数执行定义语句
             sentence = f"{c['name']} = p"
@@ -149,7 +448,6 @@ class Rule(element.Element):
         for compiled_judge in self._compiled_judges:
             judge_res: bool = eval(compiled_judge)
             if not judge_res:
-                self._conclusion_cache[prop_hash] = results
                 return results
         # 获取结论
         for c in conclusion_dicts:
@@ -161,15 +459,6 @@ class Rule(element.Element):
             # 05-03增加：结论命题继承条件命题的askable属性
             conclusion[prop.ASKABLE] = askable
             results.append(conclusion)
-        
-        # 缓存结果，并检查缓存大小
-        if len(self._conclusion_cache) >= self._max_cache_size:
-            # 清理一半的缓存
-            keys_to_remove = list(self._conclusion_cache.keys())[:self._max_cache_size // 2]
-            for key in keys_to_remove:
-                del self._conclusion_cache[key]
-        
-        self._conclusion_cache[prop_hash] = results
         return results
 
     def _get_filtered_props(self, props: list[prop.Proposition]) -> list[list[prop.Proposition]]:
@@ -206,78 +495,258 @@ class Rule(element.Element):
         
         return con_prop_lists
 
-    def reason(self, old_props: list[prop.Proposition], new_props: list[prop.Proposition], reason_round: int) -> list[mynode.Node]:
+    def reason(self, old_props: Sequence[prop.Proposition] | PropIndexView, new_props: Sequence[prop.Proposition] | PropIndexView, reason_round: int, deadline: Optional[float] = None, max_results: Optional[int] = None) -> list[mynode.Node]:
         """根据规则推理新的命题
 
+        10-19新增：设置了deadline或max_results时，到达停止时刻或得到足够的节点后停止连接，结果只包含已经得到的节点
+
         Args:
-            old_props (list[prop.Proposition]): 旧命题列表
-            new_props (list[prop.Proposition]): 新命题列表
+            old_props (Sequence[prop.Proposition] | PropIndexView): 旧命题列表，或推理图命题索引的只读视图
+            new_props (Sequence[prop.Proposition] | PropIndexView): 新命题列表，或推理图命题索引的只读视图
             reason_round (int): 推理的轮次
+            deadline (Optional[float], optional): 停止推理的时刻，由time.perf_counter()得到，为None时不限制. 默认为None.
+            max_results (Optional[int], optional): 最多得到的节点数量，为None时不限制. 默认为None.
 
         Returns:
             list[mynode.Node]: 推理得到的新命题节点
         """
-        used_props = deepcopy(old_props)
-        all_prop: list[prop.Proposition] = [p for p in old_props] + [p for p in new_props]
+        # 10-19修改：条件命题从按类型划分的命题索引中获取，推理图在每轮推理中共用同一个索引，不再由每条规则遍历所有命题
+        old_view: PropIndexView = old_props if isinstance(old_props, PropIndexView) else PropIndex(old_props).view()
+        new_view: PropIndexView = new_props if isinstance(new_props, PropIndexView) else PropIndex(new_props).view()
+        
+        # 10-19新增：relation类型的规则只有一个条件，只含旧命题的组合都会被跳过，因此只需处理新命题
+        if self.kind == RELATION:
+            return self._reason_relation(new_view, reason_round, deadline, max_results)
         
         # 优化1: 预先过滤可提问的命题
         # 08-25修改：取消这个优化
         # askable_props = [p for p in all_prop if p[prop.ASKABLE]]
         
-        con_prop_lists: list[list[prop.Proposition]] = []
+        # 优化2: 预先过滤符合类型和属性要求的命题
         if self.kind == RULE:
-            con_kinds: list[str] = [c[KIND] for c in self[CONDITION]]
-            # 优化2: 预先过滤符合类型和属性要求的命题
-            for i, kind in enumerate(con_kinds):
-                condition_attrs = self[CONDITION][i][ATTRS]
-                filtered_props = [
-                    p for p in all_prop
-                    if p.kind == kind and all(p.has_attr(attr) for attr in condition_attrs)
-                ]
-                con_prop_lists.append(filtered_props)
+            conditions: list[dict] = list(self[CONDITION])
         elif self.kind == RELATION:
-            con_kind: str = self[CONDITION][KIND]
-            condition_attrs = self[CONDITION][ATTRS]
-            filtered_props = [
-                p for p in all_prop
-                if p.kind == con_kind and all(p.has_attr(attr) for attr in condition_attrs)
-            ]
-            con_prop_lists.append(filtered_props)
+            conditions: list[dict] = [self[CONDITION]]
         else:
             raise ValueError(f"推理规则{self.name}具有不支持的规则类型{self.kind}")
+        old_prop_lists: list[list[prop.Proposition]] = [old_view.select(c[KIND], c[ATTRS]) for c in conditions]
+        con_prop_lists: list[list[prop.Proposition]] = [old_list + new_view.select(c[KIND], c[ATTRS]) for old_list, c in zip(old_prop_lists, conditions)]
         
         # 优化3: 早期退出检查
         if any(len(prop_list) == 0 for prop_list in con_prop_lists):
             return []
         
-        results: list[mynode.Node] = []
-        total = reduce(lambda x, y: x*y, [len(i) for i in con_prop_lists])
-        
+        # 10-19修改：按照代价选择条件的连接顺序，判断条件在其引用的条件命题都确定后立即执行，尽早剪枝
+        return self._join(conditions, old_prop_lists, con_prop_lists, reason_round, deadline, max_results)
+
+    def _get_judge_vars(self) -> list[set[int]]:
+        """获取每个判断条件引用的条件命题序号
+
+        Returns:
+            list[set[int]]: 判断条件引用的条件命题序号，与self[JUDGE]一一对应
+        """
+        if self._judge_vars is None:
+            if self._compiled_judges is None:
+                self._compiled_judges = [compile(judge, '<string>', 'eval') for judge in self[JUDGE]]
+            names: dict[str, int] = {c["name"]: i for i, c in enumerate(self[CONDITION])}
+            self._judge_vars = [{names[n] for n in code.co_names if n in names} for code in self._compiled_judges]
+        return self._judge_vars
+
+    def _plan(self, con_prop_lists: list[list[prop.Proposition]]) -> tuple[list[int], list[list[int]]]:
+        """根据每个条件的候选命题数量和每个判断条件的通过率，选择估计代价最小的连接顺序\n
+        代价为连接过程中产生的部分组合数量之和，通过率按照此前的执行结果估计
+
+        Args:
+            con_prop_lists (list[list[prop.Proposition]]): 每个条件的候选命题
+
+        Returns:
+            tuple[list[int], list[list[int]]]: 条件的连接顺序，以及连接到每一层时需要执行的判断条件序号
+        """
+        judge_vars = self._get_judge_vars()
+        selectivity = [(passed + 1) / (evaluated + 2) for evaluated, passed in self._judge_stats]
+
+        def get_stages(order: Sequence[int]) -> list[list[int]]:
+            stages: list[list[int]] = [[] for _ in order]
+            for j, refs in enumerate(judge_vars):
+                stages[max((order.index(i) for i in refs), default=0)].append(j)
+            return stages
+
+        def get_cost(order: Sequence[int]) -> float:
+            rows, cost = 1.0, 0.0
+            for i, judges in zip(order, get_stages(order)):
+                rows *= len(con_prop_lists[i])
+                for j in judges:
+                    rows *= selectivity[j]
+                cost += rows
+            return cost
+
+        # 条件数量很少(不超过3个)，直接枚举所有顺序，代价相同时保持规则中的原有顺序
+        best = min(permutations(range(len(con_prop_lists))), key=get_cost)
+        if list(best) != list(range(len(con_prop_lists))):
+            JOIN_STATS["reordered"] += 1
+        return list(best), get_stages(best)
+
+    def _join(self, conditions: list[dict], old_prop_lists: list[list[prop.Proposition]], con_prop_lists: list[list[prop.Proposition]], reason_round: int, deadline: Optional[float] = None, max_results: Optional[int] = None) -> list[mynode.Node]:
+        """按照规划的顺序连接条件命题，得到至少包含一个新命题的组合的推理结果，结果按照原有的product顺序排列
+
+        Args:
+            conditions (list[dict]): 规则的条件
+            old_prop_lists (list[list[prop.Proposition]]): 每个条件的旧候选命题
+            con_prop_lists (list[list[prop.Proposition]]): 每个条件的全部候选命题，旧命题在前
+            reason_round (int): 推理的轮次
+            deadline (Optional[float], optional): 停止连接的时刻，由time.perf_counter()得到. 默认为None.
+            max_results (Optional[int], optional): 最多得到的节点数量. 默认为None.
+
+        Returns:
+            list[mynode.Node]: 推理得到的新命题节点
+        """
+        order, stages = self._plan(con_prop_lists)
+        n = len(conditions)
+        # 10-19新增：比较类判断条件在时间值都能转换为整数时，对当前层的所有候选命题按数组一次性执行
+        columns = self._get_ordinal_columns(con_prop_lists)
+        vector_judges = self._get_vector_judges()
+        vector_stages: list[list[int]] = [[j for j in judges if vector_judges[j] is not None and all(columns.get(t) is not None for t in vector_judges[j][0] + vector_judges[j][2])] for judges in stages]
+        scalar_stages: list[list[int]] = [[j for j in judges if j not in vector] for judges, vector in zip(stages, vector_stages)]
         # 优化4: 使用集合来加速成员检查
-        used_props_set = set(id(p) for p in used_props)
-        
-        for curr_props in tqdm(product(*con_prop_lists), total=total, desc=f"第{reason_round}轮推理使用推理规则{self.name}"):
-            # 优化5: 使用集合查找代替列表查找
-            if all(id(p) in used_props_set for p in curr_props):
+        # 10-19修改：直接记录旧命题的id。深拷贝得到的命题id与原命题不同，会导致只含旧命题的组合被重复推理
+        used_props_set = set(id(p) for old_list in old_prop_lists for p in old_list)
+        bound: list[Optional[prop.Proposition]] = [None] * n
+        positions: list[int] = [0] * n
+        env: dict[str, Any] = {"self": self}
+        indexed_results: list[tuple[tuple[int, ...], mynode.Node]] = []
+        exhausted: bool = False
+        """是否已经到达停止时刻或得到足够的节点"""
+
+        def get_positions(depth: int, begin: int) -> Sequence[int]:
+            i = order[depth]
+            end = len(con_prop_lists[i])
+            if len(vector_stages[depth]) == 0 or begin >= end:
+                return range(begin, end)
+            mask = np.ones(end - begin, dtype=bool)
+            for j in vector_stages[depth]:
+                lhs, op, rhs = vector_judges[j]
+                sides = [sum(columns[(k, attr)][begin:] if k == i else columns[(k, attr)][positions[k]] for k, attr in terms) for terms in (lhs, rhs)]
+                judge_mask = np.broadcast_to(COMPARE_OPS[op](*sides), mask.shape)
+                self._judge_stats[j][0] += int(mask.sum())
+                mask &= judge_mask
+                self._judge_stats[j][1] += int(mask.sum())
+            JOIN_STATS["vectorised"] += len(mask)
+            JOIN_STATS["masked"] += len(mask) - int(mask.sum())
+            return (np.flatnonzero(mask) + begin).tolist()
+
+        def search(depth: int, all_old: bool, bar: Optional[tqdm] = None):
+            nonlocal exhausted
+            if depth == n:
+                JOIN_STATS["tuples"] += 1
+                curr_props = tuple(bound)
+                # 优化5: 使用集合查找代替列表查找
+                if all(id(p) in used_props_set for p in curr_props):
+                    return
+                for node in self.derive(curr_props):
+                    indexed_results.append((tuple(positions), node))
+                if max_results is not None and len(indexed_results) >= max_results:
+                    exhausted = True
+                return
+            i = order[depth]
+            # 前面的条件都是旧命题时，最后一个条件只需要考虑新命题
+            begin = len(old_prop_lists[i]) if all_old and depth == n - 1 else 0
+            candidates = con_prop_lists[i]
+            for pos in get_positions(depth, begin):
+                if deadline is not None and not exhausted and time.perf_counter() >= deadline:
+                    exhausted = True
+                if exhausted:
+                    break
+                p = candidates[pos]
+                # 优化6: 同一个命题不能在组合中出现两次
+                if any(q is p for q in bound):
+                    continue
+                bound[i], positions[i] = p, pos
+                env[conditions[i]["name"]] = p
+                JOIN_STATS["partials"] += 1
+                if self._check_judges(scalar_stages[depth], env):
+                    search(depth + 1, all_old and pos < len(old_prop_lists[i]))
+                if bar is not None:
+                    bar.update(pos + 1 - bar.n)
+            bound[i] = None
+
+        with tqdm(total=len(con_prop_lists[order[0]]), desc=f"第{reason_round}轮推理使用推理规则{self.name}") as bar:
+            search(0, True, bar)
+            bar.update(bar.total - bar.n)
+        # 按照条件在规则中的顺序恢复product的顺序，保证推理结果的顺序与连接顺序无关
+        indexed_results.sort(key=lambda x: x[0])
+        return [node for _, node in indexed_results]
+
+    def _get_vector_judges(self) -> list[Optional[tuple[list[tuple[int, str]], str, list[tuple[int, str]]]]]:
+        """识别可以按数组执行的比较类判断条件\n
+        判断条件的两侧都是若干个"条件名['属性名']"之和，运算符为<、>、<=、>=或==。
+        !=不按数组执行，因为规范形式不同的相等时间会被误判为不相等
+
+        Returns:
+            list[Optional[tuple[list[tuple[int, str]], str, list[tuple[int, str]]]]]: 与self[JUDGE]一一对应，不适用的判断条件为None
+        """
+        if self._vector_judges is None:
+            names: dict[str, int] = {c["name"]: i for i, c in enumerate(self[CONDITION])}
+            self._vector_judges = []
+            for judge in self[JUDGE]:
+                parsed = None
+                match = _COMPARISON_PATTERN.match(judge)
+                if match is not None:
+                    left, op, right = match.groups()
+                    sides = [[_TERM_PATTERN.match(term) for term in side.split("+")] for side in (left, right)]
+                    if all(m is not None and m.group(1) in names for side in sides for m in side):
+                        lhs, rhs = [[(names[m.group(1)], m.group(2)) for m in side] for side in sides]
+                        parsed = (lhs, op, rhs)
+                self._vector_judges.append(parsed)
+        return self._vector_judges
+
+    def _get_ordinal_columns(self, con_prop_lists: list[list[prop.Proposition]]) -> dict[tuple[int, str], Optional[np.ndarray]]:
+        """将比较类判断条件用到的属性转换为基本单位的整数数组\n
+        同一个判断条件中所有属性的基本单位必须相同，否则该判断条件中的数组为None，判断条件按原来的方式逐个执行
+
+        Args:
+            con_prop_lists (list[list[prop.Proposition]]): 每个条件的候选命题
+
+        Returns:
+            dict[tuple[int, str], Optional[np.ndarray]]: (条件序号, 属性名)到整数数组的映射
+        """
+        columns: dict[tuple[int, str], Optional[np.ndarray]] = {}
+        units: dict[tuple[int, str], Optional[str]] = {}
+        for parsed in self._get_vector_judges():
+            if parsed is None:
                 continue
-            
-            # 优化6: 使用集合检查重复
-            if len(curr_props) > 1:
-                prop_ids = set(id(p) for p in curr_props)
-                if len(prop_ids) != len(curr_props):
+            terms = parsed[0] + parsed[2]
+            for k, attr in terms:
+                if (k, attr) in units:
                     continue
-            
-            if self.kind == RULE:
-                curr_conclusions = self._get_rule_conclusion(curr_props)
-            elif self.kind == RELATION:
-                curr_conclusions = self._get_relation_conclusion(curr_props)
-            else:
-                raise ValueError(f"推理规则{self.name}具有不支持的规则类型{self.kind}")
-            if len(curr_conclusions) > 0:
-                for con in curr_conclusions:
-                    node_dict = {mynode.CONDITION: list(curr_props), mynode.CONCLUSION: con, mynode.RULE: self}
-                    results.append(mynode.Node(**node_dict))
-        return results
+                if not all(p.has_attr(attr) for p in con_prop_lists[k]):
+                    units[(k, attr)], columns[(k, attr)] = None, None
+                    continue
+                values = [p[attr] for p in con_prop_lists[k]]
+                unit_set = {represent.get_base_unit(v) for v in values}
+                units[(k, attr)] = unit_set.pop() if len(unit_set) == 1 else None
+                columns[(k, attr)] = None if units[(k, attr)] is None else np.fromiter((represent.time_ordinal(v) for v in values), dtype=np.int64, count=len(values))
+            if len({units[t] for t in terms}) != 1:
+                for t in terms:
+                    columns[t] = None
+        return columns
+
+    def _check_judges(self, judges: list[int], env: dict[str, Any]) -> bool:
+        """执行判断条件，并记录每个判断条件的通过情况
+
+        Args:
+            judges (list[int]): 判断条件序号
+            env (dict[str, Any]): 已确定的条件命题，键为条件名称
+
+        Returns:
+            bool: 是否所有判断条件都通过
+        """
+        for j in judges:
+            judge_res: bool = eval(self._compiled_judges[j], globals(), env)
+            self._judge_stats[j][0] += 1
+            if not judge_res:
+                return False
+            self._judge_stats[j][1] += 1
+        return True
 
 def get_reasoning_rules(rule_names: Sequence[str]) -> list[Rule]:
     """根据选择的推理规则名称，获取推理规则
@@ -291,9 +760,13 @@ def get_reasoning_rules(rule_names: Sequence[str]) -> list[Rule]:
     Raises:
         ValueError: 当推理规则的名字重复时
     """
-    with config.RULE_FILE.open("r", encoding="utf-8") as f:
-        data: dict = json5.load(f)
-    rule_dicts: list[dict] = data["rules"]
+    # 10-19修改：规则文件只解析一次，每次调用仍然由规则定义的副本构造新的推理规则
+    file_key = (str(config.RULE_FILE), config.RULE_FILE.stat().st_mtime_ns)
+    if file_key not in _RULE_FILE_CACHE:
+        with config.RULE_FILE.open("r", encoding="utf-8") as f:
+            data: dict = json5.load(f)
+        _RULE_FILE_CACHE[file_key] = data["rules"]
+    rule_dicts: list[dict] = copy.deepcopy(_RULE_FILE_CACHE[file_key])
     # 自检：推理规则的名字不能相同
     rules: list[Rule] = [Rule(**rule_dict) for rule_dict in rule_dicts]
     assert element.name_is_unique(rules), "推理规则的名字不能相同"
@@ -0,0 +1,122 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""将推理图导出到共享内存，供并行提问的工作进程只读使用\n
+同一次重置中的各次提问只读取推理图：选择已知命题、计算层级视图和生成选项都不修改节点表。
+节点表的数组放入multiprocessing.shared_memory的内存块中，工作进程直接以内存块为缓冲区构造只读的numpy数组，不复制节点表。
+命题对象不能放入共享内存，命题表、初始命题和知识命题一起序列化后放入一个内存块，每个工作进程在每次重置时反序列化一次；
+推理规则含有编译后的代码，不能序列化，只记录规则定义的哈希，由工作进程在自己加载的推理规则中查找
+"""
+
+import graph as mygraph
+import nodetable
+import rule
+import pickle
+import numpy as np
+from multiprocessing import shared_memory
+from collections.abc import Sequence
+from typing import Any, Optional
+
+ARRAY_NAMES = ("premise_ptr", "premise_ids", "conclusion_ids", "rule_ids", "layers", "condition_layers", "derivation_counts")
+"""放入共享内存的节点表数组"""
+_ATTACHED: Optional[tuple[str, mygraph.ReasoningGraph, list[shared_memory.SharedMemory]]] = None
+"""工作进程中当前连接的推理图：(命题内存块名称, 推理图, 内存块)"""
+
+class SharedGraph:
+    """导出到共享内存的推理图，创建者负责在所有工作进程用完后调用close()释放内存块
+    """
+    def __init__(self, g: mygraph.ReasoningGraph):
+        """将推理图的命题表和节点表导出到共享内存
+
+        Args:
+            g (mygraph.ReasoningGraph): 推理图
+        """
+        self.blocks: list[shared_memory.SharedMemory] = []
+        """创建的内存块"""
+        t = g.node_table
+        objects = pickle.dumps((g.prop_table.props, g.init_props, g.knowledge_props), protocol=pickle.HIGHEST_PROTOCOL)
+        self.descriptor: dict[str, Any] = {
+            "objects": self._put(np.frombuffer(objects, dtype=np.uint8)),
+            "arrays": {name: self._put(getattr(t, name)) for name in ARRAY_NAMES},
+            "rules": [r.definition_hash for r in t.rules],
+        }
+        """工作进程连接推理图所需的信息，可以序列化后传递给工作进程"""
+
+    def _put(self, a: np.ndarray) -> dict[str, Any]:
+        """将数组复制到新的内存块中
+
+        Args:
+            a (np.ndarray): 数组
+
+        Returns:
+            dict[str, Any]: 内存块名称、dtype和shape，空数组不创建内存块，名称为None
+        """
+        info: dict[str, Any] = {"name": None, "dtype": a.dtype.str, "shape": list(a.shape)}
+        if a.nbytes == 0:
+            return info
+        block = shared_memory.SharedMemory(create=True, size=a.nbytes)
+        np.ndarray(a.shape, dtype=a.dtype, buffer=block.buf)[...] = a
+        self.blocks.append(block)
+        info["name"] = block.name
+        return info
+
+    def close(self):
+        """关闭并删除所有内存块
+        """
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+def _get(info: dict[str, Any], blocks: list[shared_memory.SharedMemory]) -> np.ndarray:
+    """以内存块为缓冲区构造只读数组
+    """
+    if info["name"] is None:
+        return np.empty(tuple(info["shape"]), dtype=info["dtype"])
+    # 工作进程与主进程共用资源跟踪进程，内存块由主进程删除，这里只需打开
+    block = shared_memory.SharedMemory(name=info["name"])
+    blocks.append(block)
+    a = np.ndarray(tuple(info["shape"]), dtype=info["dtype"], buffer=block.buf)
+    a.flags.writeable = False
+    return a
+
+def attach_graph(descriptor: dict[str, Any], rules: Sequence[rule.Rule]) -> mygraph.ReasoningGraph:
+    """在工作进程中连接共享内存中的推理图，描述相同时直接返回已经连接的推理图\n
+    连接新的推理图时关闭上一个推理图的内存块，调用者需要先释放对上一个推理图的引用
+
+    Args:
+        descriptor (dict[str, Any]): SharedGraph.descriptor
+        rules (Sequence[rule.Rule]): 工作进程加载的推理规则，需要包含推理图中的所有规则
+
+    Returns:
+        mygraph.ReasoningGraph: 只读的推理图，节点表的数组直接使用共享内存
+    """
+    global _ATTACHED
+    key = descriptor["objects"]["name"]
+    if _ATTACHED is not None and _ATTACHED[0] == key:
+        return _ATTACHED[1]
+    if _ATTACHED is not None:
+        old_blocks = _ATTACHED[2]
+        _ATTACHED = None
+        for block in old_blocks:
+            try:
+                block.close()
+            except BufferError:
+                # 仍有数组引用该内存块，等引用释放后由垃圾回收解除映射
+                pass
+    blocks: list[shared_memory.SharedMemory] = []
+    props, init_props, knowledge_props = pickle.loads(_get(descriptor["objects"], blocks).tobytes())
+    by_hash = {r.definition_hash: r for r in rules}
+    assert all(h in by_hash for h in descriptor["rules"]), "工作进程中缺少推理图使用的推理规则"
+    node_rules = [by_hash[h] for h in descriptor["rules"]]
+    g = mygraph.ReasoningGraph(init_props, node_rules, knowledge_props)
+    for p in props:
+        g.prop_table.intern(p)
+    t = nodetable.NodeTable()
+    for name in ARRAY_NAMES:
+        setattr(t, name, _get(descriptor["arrays"][name], blocks))
+    t.rules = node_rules
+    t._rule_ids = {id(r): i for i, r in enumerate(node_rules)}
+    g.node_table = t
+    _ATTACHED = (key, g, blocks)
+    return g
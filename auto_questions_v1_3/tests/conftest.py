@@ -0,0 +1,64 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""测试的公共设置：各模块之间以顶层模块名互相引用，需要将程序目录加入模块搜索路径
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import json5
+import pytest
+
+SETTING_DIR = Path(__file__).resolve().parent.parent / "setting_dirs" / "week_schedule"
+"""测试使用的试题配置文件夹"""
+
+class Scenario:
+    """按照试题配置初始化主程序全局状态的辅助对象
+    """
+    def __init__(self, setting_dir: Path = SETTING_DIR, **overrides):
+        import main
+        import config
+        import proposition as prop
+        with open(setting_dir / config.SETTINGS_FILE, "r", encoding="utf8") as f:
+            self.settings: dict = json5.load(f)
+        self.settings.update(overrides)
+        config.set_curr_setting_dir(str(setting_dir))
+        main.set_random_seed(self.settings[main.RANDOM_SEED_KEY])
+        myobject_list = main.myobject_setup(self.settings[main.OBJECT_KEY])
+        self.event_names = main.event_name_setup(self.settings[main.EVENT_KEY])
+        main.EVENT_POOL[:] = main.event_list_setup(self.settings[main.EVENT_KEY], myobject_list)
+        self.events = main.event_setup(main.EVENT_POOL, self.settings[main.EVENT_NUM_KEY])
+        config.set_curr_unit(self.settings[main.CURR_UNIT_KEY])
+        prop.init(self.settings.get(main.USER_TEMPLATE_KEY))
+        main.scenario_setup(self.settings[main.SCENARIO_KEY])
+        main.GRAPH_OPTIONS.clear()
+        main.CLOSURE_CACHE.clear()
+        main.POOL_GRAPHS.clear()
+        main.FULL_GRAPH = None
+
+    def reset(self, knowledge: bool = True) -> tuple:
+        """执行一次重置：生成事件时间、抽样事件和外部知识
+
+        Returns:
+            tuple: 抽样的事件
+        """
+        import main
+        s = self.settings
+        main.constraint_setup(self.event_names, s[main.CONSTRAINT_KEY], s[main.TIME_RANGE_KEY]["upper_bound"], s[main.TIME_RANGE_KEY]["lower_bound"], s.get(main.DISTRIBUTION_MODE_KEY, "random"))
+        events = next(self.events)
+        main.external_knowledge_setup(s[main.CURR_UNIT_KEY], s[main.KNOWLEDGE_NUM_KEY] if knowledge else 0)
+        return events
+
+@pytest.fixture
+def week_schedule():
+    """按照week_schedule的配置初始化的主程序全局状态"""
+    return Scenario()
+
+def closure_of(g) -> tuple[set, set]:
+    """推理图中命题和节点的规范表示，与节点顺序无关"""
+    props = {repr(p.key()) for p in g.get_all_props()}
+    nodes = {(n["rule"].name, tuple(sorted(repr(p.key()) for p in n["condition"])), repr(n["conclusion"].key())) for n in g.nodes}
+    return props, nodes
@@ -0,0 +1,55 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""推理预算的测试：预算在规则的连接过程中生效，预算耗尽的重置被跳过
+"""
+
+import graph
+import json
+import json5
+import main
+import pytest
+from conftest import SETTING_DIR, Scenario, closure_of
+
+def _plain_graph() -> graph.ReasoningGraph:
+    scenario = Scenario(SETTING_DIR.parent / "life_story", event_num=4)
+    events = scenario.reset()
+    main.graph_setup(events)
+    return main.GRAPH
+
+@pytest.mark.parametrize("max_nodes", [1, 50, 500])
+def test_max_nodes_bound(max_nodes):
+    plain = _plain_graph()
+    assert len(plain.node_table) > max_nodes
+    limited = graph.ReasoningGraph(plain.init_props, plain.reasoning_rules, plain.knowledge_props, max_nodes=max_nodes)
+    limited.reason()
+    assert limited.stop_reason == graph.MAX_NODES
+    assert len(limited.node_table) <= max_nodes
+    # 加入的节点都是完整推理中的节点
+    assert closure_of(limited)[1] <= closure_of(plain)[1]
+
+def test_max_nodes_not_reached_keeps_graph():
+    plain = _plain_graph()
+    limited = graph.ReasoningGraph(plain.init_props, plain.reasoning_rules, plain.knowledge_props, max_nodes=len(plain.node_table) * 2, max_seconds=1000)
+    limited.reason()
+    assert limited.stop_reason is None
+    assert closure_of(limited) == closure_of(plain)
+
+def test_join_stops_at_max_results():
+    plain = _plain_graph()
+    r = max(plain.reasoning_rules, key=lambda r: int((plain.node_table.rule_ids == plain.node_table._rule_ids.get(id(r), -1)).sum()))
+    props = plain.get_all_props()
+    assert len(r.reason([], props, 1)) > 3
+    assert len(r.reason([], props, 1, max_results=3)) == 3
+    assert r.reason([], props, 1, deadline=0.0) == []
+
+@pytest.mark.parametrize("budget", [{"max_rounds": 1}, {"max_nodes": 20}])
+def test_exhausted_budget_skips_reset(tmp_path, budget):
+    with open(SETTING_DIR / "settings.json5", "r", encoding="utf8") as f:
+        settings = json5.load(f)
+    settings.update(budget)
+    with open(tmp_path / "settings.json5", "w", encoding="utf8") as f:
+        json.dump(settings, f, ensure_ascii=False)
+    main.main(str(tmp_path), "precise")
+    with open(tmp_path / "precise.json", "r", encoding="utf8") as f:
+        assert json.load(f) == []
@@ -0,0 +1,33 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""压缩推理图的测试：删除与出题无关的节点后，可询问命题的可达性和推理链不变
+"""
+
+import machine
+import main
+import numpy as np
+import proposition as prop
+from conftest import SETTING_DIR, Scenario
+
+def _traces(g, view) -> dict[str, list[tuple]]:
+    return {repr(p.key()): [(n["rule"].name, repr(n["conclusion"].key())) for n in g.backtrace(p, view)] for p in g.get_reachable_props(use_askable=True, view=view)}
+
+def test_compact_keeps_askable_traces():
+    scenario = Scenario(SETTING_DIR.parent / "life_story", event_num=4)
+    events = scenario.reset()
+    main.graph_setup(events)
+    full = main.GRAPH
+    chosen = main.prop_choose()
+    # 不作为条件的命题中，将同类型命题的一半设为不可询问，这些命题及其推导与出题无关
+    premises = set(full.node_table.premise_ids.tolist())
+    unused = [p for i, p in enumerate(full.prop_table.props) if i not in premises and p.kind not in machine.get_choose_kinds()]
+    assert len(unused) > 1
+    for p in unused[::2]:
+        p[prop.ASKABLE] = False
+    removed = {full.prop_table.find(p) for p in unused[::2]}
+    compacted = full.copy()
+    compacted.compact(machine.get_choose_kinds())
+    assert len(compacted.prop_table) == len(full.prop_table) - len(removed)
+    assert len(compacted.nodes) == int((~np.isin(full.node_table.conclusion_ids, list(removed))).sum())
+    assert _traces(compacted, compacted.compute_layers(chosen)) == _traces(full, full.compute_layers(chosen))
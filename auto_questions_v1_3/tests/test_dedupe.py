@@ -0,0 +1,24 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""试题指纹库的测试
+"""
+
+import dedupe
+
+def test_pending_fingerprints_are_saved_only_on_commit(tmp_path):
+    store = dedupe.FingerprintStore(tmp_path)
+    assert store.add("a", "precise")
+    # 本次运行中重复的指纹在保存之前也能被发现
+    assert not store.add("a", "precise")
+    store.close()
+    # 没有调用commit()就结束运行时不保存指纹
+    store = dedupe.FingerprintStore(tmp_path)
+    assert "a" not in store
+    assert store.add("a", "precise")
+    store.commit()
+    store.close()
+    store = dedupe.FingerprintStore(tmp_path, bloom_capacity=10)
+    assert "a" in store
+    assert not store.add("a", "precise")
+    store.close()
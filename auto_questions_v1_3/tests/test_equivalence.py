@@ -0,0 +1,26 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""并查集推理等价关系的测试：命题集合与逐对推理相同，节点是逐对推理的子集
+"""
+
+import equivalence
+import graph
+import main
+import pytest
+from conftest import SETTING_DIR, Scenario, closure_of
+
+@pytest.mark.parametrize("name", ["week_schedule", "life_story"])
+def test_equivalence_classes_keep_plain_closure(name):
+    scenario = Scenario(SETTING_DIR.parent / name, event_num=4)
+    events = scenario.reset()
+    main.graph_setup(events)
+    plain = main.GRAPH
+    assert len(equivalence.find_equivalences(plain.reasoning_rules)) > 0
+    merged = graph.ReasoningGraph(plain.init_props, plain.reasoning_rules, plain.knowledge_props, equivalence_classes=True)
+    merged.reason()
+    merged_props, merged_nodes = closure_of(merged)
+    plain_props, plain_nodes = closure_of(plain)
+    assert merged_props == plain_props
+    # 每个命题对只保留一条推导，保留的推导都是逐对推理中的推导
+    assert merged_nodes <= plain_nodes
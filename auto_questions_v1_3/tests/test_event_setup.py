@@ -0,0 +1,25 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""事件抽样的测试：swap方式在事件数量为1或等于全部事件数量时也能持续抽样
+"""
+
+import main
+import pytest
+import random
+
+@pytest.mark.parametrize("event_num", [1, 3, 6, None])
+def test_swap_schedule(event_num):
+    random.seed(0)
+    event_list = [object() for _ in range(6)]
+    events = main.event_setup(event_list, event_num, main.SWAP_SCHEDULE)
+    expected = len(event_list) if event_num is None else event_num
+    previous = None
+    for _ in range(50):
+        sampled = next(events)
+        assert len(sampled) == expected
+        assert len({id(e) for e in sampled}) == expected
+        if previous is not None:
+            # 每次最多替换两个事件
+            assert len({id(e) for e in previous} - {id(e) for e in sampled}) <= 2
+        previous = sampled
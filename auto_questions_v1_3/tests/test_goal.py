@@ -0,0 +1,63 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""目标导向推理的测试：只使用切片中的规则推理时，目标类型的命题和推导与完整推理相同，且切片确实缩小了推理
+"""
+
+import goal
+import graph
+import main
+import pytest
+from conftest import SETTING_DIR, Scenario, closure_of
+
+def _setup(name: str) -> graph.ReasoningGraph:
+    scenario = Scenario(SETTING_DIR.parent / name)
+    events = scenario.reset()
+    main.graph_setup(events)
+    return main.GRAPH
+
+@pytest.mark.parametrize("name", ["week_schedule", "life_story"])
+def test_backward_slice_keeps_goal_kind(name):
+    full = _setup(name)
+    rules = main.SCENARIO.get_rules()
+    base_kinds = {p.kind for p in full.init_props + full.knowledge_props}
+    full_props, full_nodes = closure_of(full)
+    kind_of = {repr(p.key()): p.kind for p in full.get_all_props()}
+    for kind in goal.get_goal_kinds(rules):
+        sliced_rules = goal.backward_slice(rules, [kind], base_kinds)
+        expected_props = {k for k in full_props if kind_of[k] == kind}
+        if len(sliced_rules) == 0:
+            # 不能由初始命题和知识命题推出的类型在完整推理中也不会出现
+            assert len(expected_props) == 0
+            continue
+        sliced = graph.ReasoningGraph(full.init_props, sliced_rules, full.knowledge_props)
+        sliced.reason()
+        sliced_props, sliced_nodes = closure_of(sliced)
+        assert {k for k in sliced_props if kind_of[k] == kind} == expected_props
+        assert {n for n in sliced_nodes if kind_of[n[2]] == kind} == {n for n in full_nodes if kind_of[n[2]] == kind}
+
+def test_backward_slice_shrinks_graph():
+    full = _setup("life_story")
+    rules = main.SCENARIO.get_rules()
+    base_kinds = {p.kind for p in full.init_props + full.knowledge_props}
+    sliced = graph.ReasoningGraph(full.init_props, goal.backward_slice(rules, ["long_time"], base_kinds), full.knowledge_props)
+    sliced.reason()
+    assert len(sliced.reasoning_rules) < len(rules) // 2
+    assert len(sliced.nodes) * 10 < len(full.nodes)
+
+def test_goal_retries_keep_timeline(monkeypatch):
+    scenario = Scenario(SETTING_DIR.parent / "week_schedule")
+    events = scenario.reset()
+    resamples = []
+    get_time_props = main.CONSTRAINT_MACHINE.get_time_props
+    monkeypatch.setattr(main.CONSTRAINT_MACHINE, "get_time_props", lambda events, resample=True: resamples.append(resample) or get_time_props(events, resample))
+    # 固定候选类型的顺序：week_schedule中推不出during类型的命题，需要更换为gap_time
+    sample = main.random.sample
+    candidates = ["during", "gap_time"]
+    monkeypatch.setattr(main.random, "sample", lambda population, k: list(population) if population == candidates else sample(population, k))
+    kind = main.goal_graph_setup(events, candidates)
+    monkeypatch.setattr(main.random, "sample", sample)
+    assert kind == "gap_time"
+    assert resamples.count(True) == 1
+    # 已知命题可以从没有进入推理图的初始命题中选择
+    assert len(main.prop_choose()) > 0
@@ -0,0 +1,26 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""增量推理的测试：复用情景命题的推理闭包后增量加入初始命题和外部知识，结果与完整推理相同
+"""
+
+import graph
+import knowledge
+import main
+import pytest
+from conftest import SETTING_DIR, Scenario, closure_of
+
+# week_schedule有情景命题、没有外部知识；life_story没有情景命题、有外部知识
+@pytest.mark.parametrize("name", ["week_schedule", "life_story"])
+def test_cached_scenario_closure_matches_full_reasoning(name):
+    scenario = Scenario(SETTING_DIR.parent / name, event_num=4)
+    for _ in range(2):
+        events = scenario.reset()
+        main.graph_setup(events, incremental=True)
+        incremental = main.GRAPH
+        knowledge_props = main.SCENARIO.get_props() + [p for k in main.KNOWLEDGE_BASE for p in k[knowledge.PROPOSITIONS]]
+        full = graph.ReasoningGraph(incremental.init_props, main.SCENARIO.get_rules(), knowledge_props)
+        full.reason()
+        assert closure_of(incremental) == closure_of(full)
+    # 情景命题与事件时间无关，两次重置共用一个缓存的推理闭包
+    assert len(main.CLOSURE_CACHE) == 1
@@ -0,0 +1,37 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""出题流水线写入线程的测试：写出的文件与json.dump相同，出错时不改动原有文件
+"""
+
+import json
+import pipeline
+import pytest
+
+ITEMS = [{"question": "第一题\n换行", "options": {"A": 1, "B": [1, 2]}}, {"question": "第二题", "group": "g-0"}, []]
+
+@pytest.mark.parametrize("head", [0, 1, 3])
+def test_writer_matches_json_dump(tmp_path, head):
+    path = tmp_path / "precise.json"
+    writer = pipeline.JsonArrayWriter(path, 2, [pipeline.serialize_item(i) for i in ITEMS[:head]])
+    for item in ITEMS[head:]:
+        writer.put([pipeline.serialize_item(item)])
+    assert writer.close() == len(ITEMS)
+    assert path.read_text(encoding="utf8") == json.dumps(ITEMS, indent=4, ensure_ascii=False)
+    assert not writer.tmp_path.exists()
+
+def test_writer_empty_array(tmp_path):
+    path = tmp_path / "precise.json"
+    assert pipeline.JsonArrayWriter(path, 2).close() == 0
+    assert path.read_text(encoding="utf8") == json.dumps([], indent=4)
+
+def test_writer_keeps_file_on_error(tmp_path):
+    path = tmp_path / "precise.json"
+    path.write_text("[1]", encoding="utf8")
+    writer = pipeline.JsonArrayWriter(path, 2)
+    # 未序列化的元素使写入线程出错
+    writer.put([pipeline.serialize_item(1), 2])
+    with pytest.raises(TypeError):
+        writer.close()
+    assert path.read_text(encoding="utf8") == "[1]"
+    assert not writer.tmp_path.exists()
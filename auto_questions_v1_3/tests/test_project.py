@@ -0,0 +1,28 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""推理图投影的测试：由全部事件的推理图投影得到的推理图与重新推理的结果相同
+"""
+
+import graph
+import main
+import random
+from conftest import closure_of
+
+def test_projection_matches_fresh_fixpoint(week_schedule):
+    week_schedule.reset(knowledge=False)
+    machine = main.CONSTRAINT_MACHINE
+    rules = main.SCENARIO.get_rules()
+    knowledge_props = main.SCENARIO.get_props()
+    pool_graph = graph.ReasoningGraph(machine.get_time_props(main.EVENT_POOL), rules, knowledge_props)
+    pool_graph.reason()
+    rng = random.Random(0)
+    for size in [2, len(main.EVENT_POOL) // 2, len(main.EVENT_POOL) - 1]:
+        init_props = machine.get_time_props(rng.sample(main.EVENT_POOL, size), resample=False)
+        fresh = graph.ReasoningGraph(init_props, rules, knowledge_props)
+        fresh.reason()
+        projected = pool_graph.project(init_props, knowledge_props)
+        assert closure_of(projected) == closure_of(fresh)
+        assert {p.key() for p in projected.closure_props} == {p.key() for p in fresh.closure_props}
+        # 投影得到的推理图可以继续用于计算层级
+        assert len(projected.compute_layers(init_props).reachable_ids) > 0
@@ -0,0 +1,45 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""试题配额的测试
+"""
+
+import config
+import machine
+import main
+import quota
+
+class TaggedOption:
+    def __init__(self, tag: str):
+        self.tag = tag
+
+    def get_prop_tag(self) -> str:
+        return self.tag
+
+def _stats(tags: list[str], step: int = 2) -> dict:
+    return {config.LEVEL: 1, config.STEP: step, config.SCENE_TYPE: "daily", config.QUESTION_TYPE: tags}
+
+def test_all_wrong_option_does_not_leave_quota():
+    question_info = {machine.OPTIONS: {"A": TaggedOption("before"), "B": TaggedOption("after"), "C": machine.AllWrongOption()}}
+    tags = main.get_question_tags(question_info, "correct")
+    assert "" in tags
+    tracker = quota.QuotaTracker({config.QUESTION_TYPE: {"before": 1, "after": 2}})
+    assert tracker.can_accept(_stats(tags))
+    tracker.add(_stats(tags))
+    assert tracker.counts[config.QUESTION_TYPE] == {"before": 1, "after": 1}
+    # before的配额已满
+    assert not tracker.can_accept(_stats(tags))
+
+def test_question_without_quota_tags_is_rejected():
+    tracker = quota.QuotaTracker({config.QUESTION_TYPE: {"before": 1}})
+    assert not tracker.can_accept(_stats(["", "after"]))
+    assert tracker.skipped == 1
+
+def test_step_ranges_and_is_full():
+    tracker = quota.QuotaTracker({config.STEP: [{"min": 0, "max": 3, "num": 1}, {"min": 4, "max": 100, "num": 1}]})
+    assert not tracker.can_accept(_stats([], step=101))
+    tracker.add(_stats([], step=1))
+    assert not tracker.can_accept(_stats([], step=2))
+    assert not tracker.is_full()
+    tracker.add(_stats([], step=5))
+    assert tracker.is_full()
@@ -0,0 +1,29 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""共享内存推理图的测试：连接得到的推理图与原推理图的命题、节点和层级相同
+"""
+
+import main
+import numpy as np
+import sharedgraph
+from conftest import closure_of
+
+def test_attach_round_trip(week_schedule):
+    events = week_schedule.reset()
+    main.graph_setup(events)
+    g = main.GRAPH
+    shared = sharedgraph.SharedGraph(g)
+    try:
+        attached = sharedgraph.attach_graph(shared.descriptor, main.SCENARIO.get_rules())
+        assert sharedgraph.attach_graph(shared.descriptor, main.SCENARIO.get_rules()) is attached
+        assert closure_of(attached) == closure_of(g)
+        assert not attached.node_table.conclusion_ids.flags.writeable
+        chosen = main.prop_choose()
+        view, attached_view = g.compute_layers(chosen), attached.compute_layers(chosen)
+        assert np.array_equal(view.layers, attached_view.layers)
+        assert np.array_equal(view.reachable_ids, attached_view.reachable_ids)
+    finally:
+        attached = None
+        sharedgraph._ATTACHED = None
+        shared.close()
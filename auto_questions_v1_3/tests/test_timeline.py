@@ -0,0 +1,28 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""成对时间事实直接计算的测试：结果与逐个组合推理的推理闭包相同
+"""
+
+import graph
+import main
+import pytest
+import timeline
+from conftest import SETTING_DIR, Scenario, closure_of
+
+def _node_sequence(g: graph.ReasoningGraph) -> list[tuple]:
+    return [(n["rule"].name, tuple(repr(p.key()) for p in n["condition"]), repr(n["conclusion"].key()), n["conclusion"]["askable"]) for n in g.nodes]
+
+@pytest.mark.parametrize("name", ["week_schedule", "life_story"])
+def test_materialised_timeline_matches_plain_reasoning(name):
+    scenario = Scenario(SETTING_DIR.parent / name, event_num=4)
+    events = scenario.reset()
+    main.graph_setup(events)
+    plain = main.GRAPH
+    direct_before = timeline.STATS["direct"]
+    materialised = graph.ReasoningGraph(plain.init_props, plain.reasoning_rules, plain.knowledge_props, materialise_timeline=True)
+    materialised.reason()
+    assert timeline.STATS["direct"] > direct_before
+    assert closure_of(materialised) == closure_of(plain)
+    # 直接构造的结论与推理规则得到的结论顺序相同
+    assert _node_sequence(materialised) == _node_sequence(plain)
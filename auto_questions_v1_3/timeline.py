@@ -0,0 +1,177 @@
+# encoding: utf8
+# date: 2025-10-19
+
+"""根据采样得到的时间线直接计算成对的时间事实\n
+事件时间确定后，由两个同类时间命题比较得到的事实(before_time、after_time、simultaneous、long_time、short_time、same_len等)完全由时间值决定。
+对于这类规则，将所有候选命题的时间转换为基本单位的整数，用两两之差的矩阵一次性求出满足判断条件的命题对。
+结论的属性为条件属性的复制或两个条件属性之差时，直接用运算符构造结论命题，不再对每个命题对执行规则中的eval/exec；
+其他形式的结论仍调用推理规则得到。推理节点只是条件、结论和规则的引用，加入节点表后以整数ID保存，
+二次推理需要遍历所有推导，因此节点仍在推理时构造
+"""
+
+import represent
+import proposition as prop
+import mynode
+import rule
+import instrument
+import re
+import numpy as np
+from collections.abc import Callable
+from typing import Optional
+
+_JUDGE_PATTERN = re.compile(r"^\s*(\w+)\['(\w+)'\]\s*(<=|>=|==|!=|<|>)\s*(\w+)\['(\w+)'\]\s*$")
+_ATTR_PATTERN = re.compile(r"^\s*(\w+)\['(\w+)'\]\s*$")
+_DIFF_PATTERN = re.compile(r"^\s*(\w+)\['(\w+)'\]\s*-\s*(\w+)\['(\w+)'\]\s*$")
+_SPECS: dict[str, Optional["PairwiseSpec"]] = {}
+"""规则定义哈希到成对比较规则描述的缓存，不适用的规则为None"""
+STATS: dict[str, int] = {"rules": 0, "pairs": 0, "passed": 0, "direct": 0, "fallbacks": 0}
+"""直接计算的统计信息：执行次数、比较的命题对数量、满足判断条件的命题对数量、直接构造结论的命题对数量、退回逐个组合推理的次数"""
+instrument.register("时间线成对事实", lambda: dict(STATS))
+
+class PairwiseSpec:
+    """成对比较规则的描述：规则有两个类型和属性都相同的条件，所有判断条件都是两个条件同一属性之间的比较
+    """
+    def __init__(self, kind: str, attrs: list[str], judges: list[tuple[str, str, bool]], conclusions: Optional[list[tuple[str, list[tuple[str, Callable]]]]] = None):
+        self.kind = kind
+        """条件命题的类型"""
+        self.attrs = attrs
+        """条件命题需要具有的属性"""
+        self.judges = judges
+        """判断条件，元素为(比较的属性, 运算符, 是否以第一个条件作为左侧)"""
+        self.conclusions = conclusions
+        """结论的构造方式，元素为(结论类型, [(属性名, 由两个条件计算属性值的函数)])，为None时调用推理规则得到结论"""
+
+def get_spec(r: rule.Rule) -> Optional[PairwiseSpec]:
+    """判断推理规则是否为成对比较规则，并获取其描述
+
+    Args:
+        r (rule.Rule): 推理规则
+
+    Returns:
+        Optional[PairwiseSpec]: 成对比较规则的描述，不适用时返回None
+    """
+    key = r.definition_hash
+    if key not in _SPECS:
+        _SPECS[key] = _parse_spec(r)
+    return _SPECS[key]
+
+def _parse_spec(r: rule.Rule) -> Optional[PairwiseSpec]:
+    if r.kind != rule.RULE or len(r[rule.CONDITION]) != 2 or len(r[rule.JUDGE]) == 0:
+        return None
+    first, second = r[rule.CONDITION]
+    if first[rule.KIND] != second[rule.KIND] or list(first[rule.ATTRS]) != list(second[rule.ATTRS]):
+        return None
+    judges: list[tuple[str, str, bool]] = []
+    for judge in r[rule.JUDGE]:
+        match = _JUDGE_PATTERN.match(judge)
+        if match is None:
+            return None
+        left, left_attr, op, right, right_attr = match.groups()
+        if left_attr != right_attr or left_attr not in first[rule.ATTRS] or {left, right} != {first["name"], second["name"]}:
+            return None
+        judges.append((left_attr, op, left == first["name"]))
+    return PairwiseSpec(first[rule.KIND], list(first[rule.ATTRS]), judges, _parse_conclusions(r, first["name"], second["name"]))
+
+def _parse_operand(name: str, attr: str, names: tuple[str, str]) -> Optional[Callable]:
+    if name not in names:
+        return None
+    index = names.index(name)
+    return lambda pair: pair[index][attr]
+
+def _parse_conclusions(r: rule.Rule, first_name: str, second_name: str) -> Optional[list[tuple[str, list[tuple[str, Callable]]]]]:
+    """解析结论属性的表达式，只支持条件属性的复制和两个条件属性之差，其他形式返回None
+    """
+    names = (first_name, second_name)
+    conclusions: list[tuple[str, list[tuple[str, Callable]]]] = []
+    for c in r[rule.CONCLUSION]:
+        builders: list[tuple[str, Callable]] = []
+        for attr, code in c[rule.ATTRS].items():
+            if (match := _ATTR_PATTERN.match(code)) is not None:
+                getter = _parse_operand(*match.groups(), names)
+                if getter is None:
+                    return None
+                builders.append((attr, getter))
+            elif (match := _DIFF_PATTERN.match(code)) is not None:
+                left = _parse_operand(match.group(1), match.group(2), names)
+                right = _parse_operand(match.group(3), match.group(4), names)
+                if left is None or right is None:
+                    return None
+                builders.append((attr, lambda pair, left=left, right=right: left(pair) - right(pair)))
+            else:
+                return None
+        conclusions.append((c[rule.KIND], builders))
+    return conclusions
+
+def _derive_direct(r: rule.Rule, spec: PairwiseSpec, pair: tuple[prop.Proposition, prop.Proposition]) -> list[mynode.Node]:
+    """不经过eval/exec，直接构造命题对的结论和推理节点，结果与Rule.derive()相同
+    """
+    askable = any(p[prop.ASKABLE] for p in pair)
+    if not askable:
+        return []
+    # 判断条件已经由时间整数的比较求出，这里用时间对象本身再检查一次，保证与推理规则的判断一致
+    for attr, op, first_left in spec.judges:
+        left, right = (pair[0][attr], pair[1][attr]) if first_left else (pair[1][attr], pair[0][attr])
+        if not rule.COMPARE_OPS[op](left, right):
+            return []
+    nodes: list[mynode.Node] = []
+    for kind, builders in spec.conclusions:
+        conclusion = prop.Proposition(kind=kind)
+        for attr, build in builders:
+            conclusion[attr] = build(pair)
+        conclusion[prop.ASKABLE] = askable
+        nodes.append(mynode.Node(**{mynode.CONDITION: list(pair), mynode.CONCLUSION: conclusion, mynode.RULE: r}))
+    return nodes
+
+def _ordinals(props: list[prop.Proposition], attr: str) -> Optional[np.ndarray]:
+    """获取命题某个属性的基本单位整数，属性值不是同一类时间时返回None
+    """
+    values = [p[attr] for p in props]
+    if len({(type(v), v.kind) for v in values if hasattr(v, "kind")}) > 1:
+        return None
+    ordinals = [represent.time_ordinal(v) for v in values]
+    if any(o is None for o in ordinals):
+        return None
+    return np.asarray(ordinals, dtype=np.int64)
+
+def materialise(r: rule.Rule, old_props: rule.PropIndexView, new_props: rule.PropIndexView) -> Optional[list[mynode.Node]]:
+    """直接计算成对比较规则的推理结果，结果及其顺序与Rule.reason()相同
+
+    Args:
+        r (rule.Rule): 推理规则
+        old_props (rule.PropIndexView): 旧命题
+        new_props (rule.PropIndexView): 新命题
+
+    Returns:
+        Optional[list[mynode.Node]]: 推理得到的新命题节点，规则不适用时返回None，此时应使用Rule.reason()
+    """
+    spec = get_spec(r)
+    if spec is None:
+        return None
+    old_list = old_props.select(spec.kind, spec.attrs)
+    candidates = old_list + new_props.select(spec.kind, spec.attrs)
+    if len(candidates) < 2:
+        return []
+    mask = np.ones((len(candidates), len(candidates)), dtype=bool)
+    for attr, op, first_left in spec.judges:
+        ordinals = _ordinals(candidates, attr)
+        if ordinals is None:
+            STATS["fallbacks"] += 1
+            return None
+        left, right = (ordinals[:, None], ordinals[None, :]) if first_left else (ordinals[None, :], ordinals[:, None])
+        mask &= rule.COMPARE_OPS[op](left, right)
+    # 同一个命题不能出现两次，只含旧命题的组合已经推理过
+    np.fill_diagonal(mask, False)
+    mask[:len(old_list), :len(old_list)] = False
+    STATS["rules"] += 1
+    STATS["pairs"] += len(candidates) ** 2
+    results: list[mynode.Node] = []
+    # argwhere按行优先的顺序返回命题对，与product的顺序一致
+    for i, j in np.argwhere(mask):
+        STATS["passed"] += 1
+        if spec.conclusions is not None:
+            STATS["direct"] += 1
+            results.extend(_derive_direct(r, spec, (candidates[i], candidates[j])))
+        else:
+            # 结论的形式无法直接构造时由推理规则计算，其中会再次检查判断条件
+            results.extend(r.derive((candidates[i], candidates[j])))
+    return results